@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Compare HTTP/1.1 and HTTP/2 upstream pools under fan-out.
+
+Starts a local Hypercorn server that answers after a short delay and fires
+``--fanout`` concurrent GETs per round at it, the way presets or batch
+history fetches do, once through an HTTP/1.1 pool and once through an
+HTTP/2 pool with the same limits. Reports latency percentiles and the
+number of sockets each pool opened.
+
+Requires ``pip install hypercorn 'httpx[http2]'``. The local server speaks
+cleartext HTTP/2 (prior knowledge), standing in for the HTTP/2 that ALPN
+negotiates with the real HTTPS API.
+
+    python scripts/bench_http2.py --fanout 200 --rounds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import httpx
+
+DELAY = 0.02
+
+
+async def app(scope, receive, send):  # type: ignore[no-untyped-def]
+    if scope["type"] != "http":
+        return
+    await asyncio.sleep(DELAY)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b'{"ok": true}'})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _fan_out(pool: httpx.AsyncHTTPTransport, url: str, fanout: int, rounds: int) -> dict:
+    latencies: list[float] = []
+    peak = 0
+    async with httpx.AsyncClient(transport=pool, base_url=url) as client:
+
+        async def one() -> None:
+            start = time.perf_counter()
+            (await client.get("/devices")).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+        for _ in range(rounds):
+            tasks = [asyncio.create_task(one()) for _ in range(fanout)]
+            while not all(t.done() for t in tasks):
+                peak = max(peak, len(pool._pool.connections))
+                await asyncio.sleep(0.001)
+            await asyncio.gather(*tasks)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "sockets": peak,
+    }
+
+
+async def main(fanout: int, rounds: int, max_connections: int) -> None:
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    port = _free_port()
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.loglevel = "WARNING"
+    shutdown = asyncio.Event()
+    server = asyncio.create_task(serve(app, config, shutdown_trigger=shutdown.wait))
+    await asyncio.sleep(0.5)
+
+    url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=max_connections)
+    for label, pool in (
+        ("HTTP/1.1", httpx.AsyncHTTPTransport(limits=limits)),
+        ("HTTP/2  ", httpx.AsyncHTTPTransport(limits=limits, http1=False, http2=True)),
+    ):
+        stats = await _fan_out(pool, url, fanout, rounds)
+        print(
+            f"{label}: p50 {stats['p50']:7.1f} ms  p99 {stats['p99']:7.1f} ms  "
+            f"sockets {stats['sockets']}"
+        )
+
+    shutdown.set()
+    await server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fanout", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--max-connections", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.fanout, args.rounds, args.max_connections))
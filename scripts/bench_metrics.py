@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Measure /metrics exposition after many requests to per-id URLs.
+
+``--requests`` requests, each for a different ``/v1/task/{task_id}`` URL, are
+recorded twice: labelled with the raw path, as the gateway used to do, and
+through :class:`~xyte_mcp.gateway.GatewayMiddleware`, which labels them with
+the route template. The script prints the exposition size and scrape time of
+both, and the time of a scrape served from the render cache.
+
+    python scripts/bench_metrics.py --requests 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+
+def _scrape(render) -> tuple[int, float]:
+    start = time.perf_counter()
+    size = len(render())
+    return size, time.perf_counter() - start
+
+
+def raw_paths(requests: int) -> tuple[int, float]:
+    from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+    registry = CollectorRegistry()
+    latency = Histogram("latency_seconds", "", ["method", "path"], registry=registry)
+    count = Counter("requests_total", "", ["method", "path", "status"], registry=registry)
+    for i in range(requests):
+        latency.labels("GET", f"/v1/task/{i}").observe(0.01)
+        count.labels("GET", f"/v1/task/{i}", 200).inc()
+    return _scrape(lambda: generate_latest(registry))
+
+
+async def _drive(app, requests: int) -> None:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: dict) -> None:
+        pass
+
+    for i in range(requests):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": f"/v1/task/{i}",
+            "headers": [],
+            "query_string": b"",
+        }
+        await app(scope, receive, send)
+
+
+def templated(requests: int) -> tuple[int, float, float]:
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+
+    from xyte_mcp import metrics
+    from xyte_mcp.gateway import GatewayMiddleware
+
+    async def task(_request) -> Response:
+        return Response("ok")
+
+    inner = Starlette(routes=[Route("/task/{task_id}", task)])
+    app = GatewayMiddleware(Starlette(routes=[Mount("/v1", app=inner)]))
+    asyncio.run(_drive(app, requests))
+    size, elapsed = _scrape(metrics.render)
+    metrics.render(max_age=60)
+    _, cached = _scrape(lambda: metrics.render(max_age=60))
+    return size, elapsed, cached
+
+
+def main(requests: int) -> None:
+    size, elapsed = raw_paths(requests)
+    print(f"raw paths  {size / 1e3:10.1f} kB  scrape {elapsed * 1000:9.1f} ms")
+    size, elapsed, cached = templated(requests)
+    print(f"templates  {size / 1e3:10.1f} kB  scrape {elapsed * 1000:9.1f} ms")
+    print(f"cached                   scrape {cached * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+    os.environ.setdefault("XYTE_API_KEY", "bench")
+    main(args.requests)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Measure the overhead of the HTTP middleware stack.
+
+Drives ``xyte_mcp.http:app`` in process, so only the middleware and routing
+are timed, with ``--concurrency`` clients each sending ``--requests``
+requests to two endpoints:
+
+* ``GET /v1/healthz``, the cheapest route, where the middleware dominates;
+* an ``echo_command`` tool call over the streamable-HTTP MCP transport.
+
+Reports requests per second and p50/p99 latency for each.
+
+    python scripts/bench_middleware.py --requests 2000 --concurrency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+HEADERS = {"Authorization": "bench-key", "Accept": "application/json, text/event-stream"}
+
+
+async def _measure(
+    label: str, call: Callable[[], Awaitable[None]], requests: int, concurrency: int
+) -> None:
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        for _ in range(requests // concurrency):
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label}: {len(latencies) / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms"
+    )
+
+
+async def main(requests: int, concurrency: int) -> None:
+    import httpx
+
+    from xyte_mcp import http
+
+    transport = httpx.ASGITransport(app=http.app)
+    async with http.internal_app.router.lifespan_context(http.internal_app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=HEADERS
+        ) as client:
+            init = await client.post(
+                "/v1/mcp/",
+                json={
+                    "jsonrpc": "2.0",
+                    "id": 0,
+                    "method": "initialize",
+                    "params": {
+                        "protocolVersion": "2025-03-26",
+                        "capabilities": {},
+                        "clientInfo": {"name": "bench", "version": "1"},
+                    },
+                },
+            )
+            init.raise_for_status()
+            client.headers["mcp-session-id"] = init.headers["mcp-session-id"]
+            await client.post(
+                "/v1/mcp/", json={"jsonrpc": "2.0", "method": "notifications/initialized"}
+            )
+
+            async def healthz() -> None:
+                (await client.get("/v1/healthz")).raise_for_status()
+
+            # Concurrent calls in one session need distinct JSON-RPC ids
+            ids = itertools.count(1)
+
+            async def tool_call() -> None:
+                response = await client.post(
+                    "/v1/mcp/",
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": next(ids),
+                        "method": "tools/call",
+                        "params": {
+                            "name": "echo_command",
+                            "arguments": {"device_id": "dev-1", "message": "hi"},
+                        },
+                    },
+                )
+                response.raise_for_status()
+
+            for label, call in (("healthz  ", healthz), ("tool call", tool_call)):
+                await call()
+                await _measure(label, call, requests, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    # Keep the rate limiter and log output out of the measurement
+    os.environ.setdefault("XYTE_RATE_LIMIT", "1000000")
+    os.environ.setdefault("XYTE_API_KEY", "bench-key")
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.requests, args.concurrency))
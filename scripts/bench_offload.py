@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Measure event-loop lag while the search filter runs on a large inventory.
+
+A ticker task wakes every millisecond and records how late it ran, while
+``--searches`` searches run over ``--devices`` synthetic devices, first
+inline and then through the offload pool.
+
+    python scripts/bench_offload.py --devices 200000 --searches 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        due = loop.time() + 0.001
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - due)
+
+
+async def _run(records: list, searches: int) -> tuple[float, float]:
+    from xyte_mcp import inventory, offload
+
+    filters = {"name": {"op": "contains", "value": "room 9"}}
+    # Warm the pool and the workers' snapshot cache outside the measurement
+    await offload.map_records(inventory.match_records, records, "devices", None, filters)
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    start = time.perf_counter()
+    for _ in range(searches):
+        await offload.map_records(inventory.match_records, records, "devices", "xy", filters)
+        # Stand-in for the upstream call between searches
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, max(lags, default=0.0)
+
+
+def main(devices: int, searches: int) -> None:
+    from xyte_mcp import offload
+    from xyte_mcp.config import reload_settings
+
+    records = [
+        {"id": str(i), "name": f"Room {i}", "model": "XY-100", "serial_number": f"SN{i}"}
+        for i in range(devices)
+    ]
+    for label, workers in (("inline", "0"), ("offload", "2")):
+        os.environ["XYTE_OFFLOAD_WORKERS"] = workers
+        reload_settings()
+        elapsed, worst = asyncio.run(_run(records, searches))
+        offload.shutdown()
+        print(f"{label:8s} {searches} searches in {elapsed:.2f}s  max loop lag {worst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=200_000)
+    parser.add_argument("--searches", type=int, default=10)
+    args = parser.parse_args()
+    os.environ.setdefault("XYTE_API_KEY", "bench")
+    main(args.devices, args.searches)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Check the cold start of the stdio server against a time budget.
+
+MCP desktop clients launch ``xyte-mcp`` once per session, so startup time is
+paid on every new conversation. For each of ``--runs`` fresh processes this
+script measures the time from launch until the server answers
+``initialize`` over stdio, then prints the slowest imports reported by
+``python -X importtime``. It exits with status 1 when the median startup
+exceeds ``--budget`` seconds.
+
+    python scripts/bench_startup.py --runs 5 --budget 1.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+ENV = {**os.environ, "PYTHONPATH": SRC, "XYTE_API_KEY": os.environ.get("XYTE_API_KEY", "bench")}
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 0,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "bench", "version": "1"},
+    },
+}
+
+
+def time_to_initialize() -> float:
+    """Launch the stdio server and return seconds until ``initialize`` returns."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "xyte_mcp"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=ENV,
+        text=True,
+    )
+    try:
+        assert proc.stdin is not None and proc.stdout is not None
+        proc.stdin.write(json.dumps(INITIALIZE) + "\n")
+        proc.stdin.flush()
+        for line in proc.stdout:
+            if json.loads(line).get("id") == 0:
+                return time.perf_counter() - start
+        raise RuntimeError("server exited before answering initialize")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def slowest_imports(limit: int) -> list[tuple[int, str]]:
+    """Return the ``limit`` top-level imports with the largest cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import xyte_mcp.server"],
+        capture_output=True,
+        env=ENV,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Direct imports of xyte_mcp modules and their first-level dependencies
+        if len(name) - len(name.lstrip()) <= 5:
+            timings.append((int(cumulative), name.strip()))
+    return sorted(timings, reverse=True)[:limit]
+
+
+def main(runs: int, budget: float, top: int) -> int:
+    samples = sorted(time_to_initialize() for _ in range(runs))
+    median = statistics.median(samples)
+    print(f"stdio initialize: median {median:.3f}s  min {samples[0]:.3f}s  max {samples[-1]:.3f}s")
+    print("\nslowest imports (cumulative):")
+    for micros, name in slowest_imports(top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+    if median > budget:
+        print(f"\nFAIL: median startup {median:.3f}s exceeds budget {budget:.3f}s")
+        return 1
+    print(f"\nOK: within budget {budget:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget, args.top))
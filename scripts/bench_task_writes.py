@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Measure the cost of task status writes.
+
+Compares the previous ``session.merge`` path (SELECT, then INSERT/UPDATE)
+with the single-statement upsert now used by ``tasks.save``. Point
+``--database-url`` at Postgres for production-like numbers; the default is
+a throwaway SQLite file.
+
+    python scripts/bench_task_writes.py --tasks 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+
+async def _run(count: int) -> None:
+    from xyte_mcp import db, tasks
+
+    await db.init_db()
+
+    async def merge_save(task: tasks.Task) -> None:
+        async with db.get_session() as session:
+            await session.merge(task)
+            await session.commit()
+
+    for label, save in (("merge ", merge_save), ("upsert", tasks.save)):
+        start = time.perf_counter()
+        for i in range(count):
+            tid = f"{label.strip()}-{i}"
+            for status in ("queued", "running", "done"):
+                await save(tasks.Task(id=tid, status=status, payload={"i": i}))
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {count * 3 / elapsed:8.1f} writes/s")
+    await db.dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    from xyte_mcp import db
+
+    db.DATABASE_URL = args.database_url or (
+        f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    )
+    asyncio.run(_run(args.tasks))
+
+
+if __name__ == "__main__":
+    main()
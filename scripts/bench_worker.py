@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Compare Celery task throughput with and without the persistent runtime.
+
+The benchmark runs ``send_command`` tasks eagerly (no broker) against a local
+HTTP stub and a SQLite task store, first the legacy way - ``asyncio.run`` with
+a fresh client and engine per task - then through ``xyte_mcp.worker.runtime``.
+
+    python scripts/bench_worker.py --tasks 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    tmp = tempfile.mkdtemp()
+    os.environ["XYTE_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/tasks.db"
+
+    from xyte_mcp import db, tasks
+    from xyte_mcp.client import XyteAPIClient
+    from xyte_mcp.worker import runtime
+
+    payload = {"device_id": "1", "name": "ping", "friendly_name": "Ping", "file_id": None}
+    key = "K" * 40
+
+    asyncio.run(db.init_db())
+    asyncio.run(db.dispose_engine())
+
+    async def legacy(tid: str) -> None:
+        client = XyteAPIClient(api_key=key)
+        try:
+            await tasks.execute_send_command(tid, payload, client)
+        finally:
+            await client.close()
+            await db.dispose_engine()
+
+    start = time.perf_counter()
+    for i in range(args.tasks):
+        asyncio.run(legacy(f"legacy-{i}"))
+    legacy_rate = args.tasks / (time.perf_counter() - start)
+
+    async def pooled(tid: str) -> None:
+        client = await runtime.get_client(key)
+        await tasks.execute_send_command(tid, payload, client)
+
+    start = time.perf_counter()
+    for i in range(args.tasks):
+        runtime.run(pooled(f"pooled-{i}"))
+    pooled_rate = args.tasks / (time.perf_counter() - start)
+    runtime.shutdown()
+    server.shutdown()
+
+    print(f"asyncio.run per task : {legacy_rate:8.1f} tasks/s")
+    print(f"persistent runtime   : {pooled_rate:8.1f} tasks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Write the registry snapshot of tool schemas loaded at server startup.
+
+Run after changing tools, their models or the ``mcp``/``pydantic`` versions;
+a stale snapshot is ignored by the server, so forgetting only costs startup
+time.
+
+    python scripts/generate_registry.py
+"""
+from pathlib import Path
+import os
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+import json
+
+# Build every schema from the functions themselves, not a previous snapshot
+os.environ["XYTE_REGISTRY_SNAPSHOT"] = "false"
+
+from xyte_mcp import registry
+from xyte_mcp.server import get_server
+
+
+def main() -> None:
+    snapshot = registry.build_snapshot(get_server())
+    registry.SNAPSHOT_PATH.write_text(json.dumps(snapshot, indent=2, sort_keys=True) + "\n")
+    print(f"Wrote {registry.SNAPSHOT_PATH} ({len(snapshot['tools'])} tools)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,11 @@
 
 from __future__ import annotations
 
-import signal
-from types import FrameType
+from typing import Any
 
 from dotenv import load_dotenv
 
-from .server import get_server
-from .config import get_settings, reload_settings
-from .plugins import sample  # noqa: F401
-from . import plugin
-
-
-def _setup_reload() -> None:
-    """Install SIGHUP handler to reload configuration."""
-
-    def handler(_sig: int, _frame: FrameType | None) -> None:
-        reload_settings()
-        plugin.reload_plugins()
-
-    signal.signal(signal.SIGHUP, handler)
-
-
-_setup_reload()
+from .config import get_settings
 
 # Load environment variables silently
 load_dotenv(verbose=False)
@@ -32,6 +15,16 @@ __version__ = "1.1.0"
 __all__ = ["get_server", "get_settings", "__version__"]
 
 
+def __getattr__(name: str) -> Any:
+    # The server module registers every tool and resource when imported, so
+    # it is only loaded once something asks for it
+    if name == "get_server":
+        from .server import get_server
+
+        return get_server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def serve() -> None:
     """Entry point for serving the MCP server."""
     import sys
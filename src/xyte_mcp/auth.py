@@ -1,44 +1,32 @@
 from __future__ import annotations
 
-from typing import Any
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-from starlette.requests import Request
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp
 
 from .config import get_settings
+from .gateway import GatewayMiddleware, Rejection
+
 
+class AuthHeaderMiddleware(GatewayMiddleware):
+    """Gateway validating the Authorization header depending on deployment mode.
 
-class AuthHeaderMiddleware(BaseHTTPMiddleware):
-    """Validate Authorization header depending on deployment mode."""
+    Without ``XYTE_API_KEY`` every request must carry its own key; with it,
+    a header is optional but must match the configured key.
+    """
 
-    def __init__(self, app: Any) -> None:  # type: ignore[override]
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, limit_per_minute: int | None = None) -> None:
+        super().__init__(app, limit_per_minute=limit_per_minute)
         self.settings = get_settings()
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in {
-            "/healthz",
-            "/readyz",
-            "/metrics",
-            "/v1/healthz",
-            "/v1/readyz",
-            "/v1/metrics",
-        }:
-            return await call_next(request)
-
-        header = request.headers.get("authorization")
+    def authenticate(self, headers: Headers) -> str | Rejection | None:
+        header = (headers.get("authorization") or "").strip()
         env_key = self.settings.xyte_api_key
 
         if env_key is None:
-            if not header or not header.strip():
-                return JSONResponse({"error": "missing_xyte_key"}, status_code=401)
-            request.state.xyte_key = header.strip()
-            return await call_next(request)
-
-        if header:
-            if header.strip() != env_key:
-                return JSONResponse({"error": "invalid_token"}, status_code=403)
-            request.state.xyte_key = header.strip()
+            if not header:
+                return Rejection(401, "missing_xyte_key")
+            return header
 
-        return await call_next(request)
+        if header and header != env_key:
+            return Rejection(403, "invalid_token")
+        return header or None
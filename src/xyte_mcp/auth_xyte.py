@@ -1,59 +1,33 @@
-import hashlib
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp
+
+from .gateway import GatewayMiddleware, Rejection
+from .tenant import request_key
 
 _PUBLIC = {"/healthz", "/readyz", "/metrics", "/docs", "/openapi.json"}
+# Seconds until a denied tenant earns its next request at 60 per minute
+_RETRY_AFTER = 1.0
 
 
-class RequireXyteKey(BaseHTTPMiddleware):
-    """Middleware enforcing presence of per-request Xyte API key."""
+class RequireXyteKey(GatewayMiddleware):
+    """Gateway enforcing presence of a per-request Xyte API key.
 
-    async def dispatch(self, req, call_next):
-        if req.url.path in _PUBLIC:
-            return await call_next(req)
+    Requests are limited to 60 per minute per key through the shared
+    Redis-backed limiter in :mod:`xyte_mcp.rate_limiter`.
+    """
 
-        raw = req.headers.get("x-xyte-api-key") or (
-            req.headers.get("authorization") or ""
-        ).removeprefix("Bearer ")
-        if not raw:
-            return JSONResponse({"error": "missing_xyte_key"}, 401)
-        if len(raw.strip()) < 32:
-            return JSONResponse({"error": "invalid_xyte_key"}, 403)
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app, public_paths=_PUBLIC)
 
-        req.state.xyte_key = raw.strip()
-        req.state.key_id = hashlib.sha256(raw.encode()).hexdigest()[:8]
+    def authenticate(self, headers: Headers) -> str | Rejection:
+        raw = request_key(headers).strip()
+        if not raw:
+            return Rejection(401, "missing_xyte_key")
+        if len(raw) < 32:
+            return Rejection(403, "invalid_xyte_key")
+        return raw
 
+    async def retry_after(self, tenant: str) -> float:
         from xyte_mcp.rate_limiter import consume
 
-        if not await consume(req.state.key_id, limit=60):
-            return JSONResponse({"error": "rate_limit"}, 429)
-
-        return await call_next(req)
-
-
-class AuthHeaderMiddleware(BaseHTTPMiddleware):
-    """Require Authorization header when running in multi-tenant mode."""
-
-    def __init__(self, app):
-        super().__init__(app)
-        from .config import get_settings
-
-        self.settings = get_settings()
-
-    async def dispatch(self, req, call_next):
-        if req.url.path in {
-            "/healthz",
-            "/readyz",
-            "/metrics",
-            "/v1/healthz",
-            "/v1/readyz",
-            "/v1/metrics",
-        }:
-            return await call_next(req)
-
-        header = req.headers.get("authorization")
-        if self.settings.multi_tenant and not header:
-            return JSONResponse({"error": "missing_xyte_key"}, 401)
-        if header:
-            req.state.xyte_key = header.strip()
-        return await call_next(req)
+        return 0.0 if await consume(tenant, limit=60) else _RETRY_AFTER
@@ -1,4 +1,10 @@
--- KEYS[1] = rl:{key_id} ; ARGV[1] = limit ; ARGV[2] = ttl(seconds)
-local c = redis.call("INCR", KEYS[1])
-if c == 1 then redis.call("EXPIRE", KEYS[1], ARGV[2]) end
-if c > tonumber(ARGV[1]) then return 0 else return tonumber(ARGV[1]) - c end
+-- Lease up to ARGV[3] tokens from a fixed window shared by all processes.
+-- KEYS[1] = rl:{key_id} ; ARGV[1] = limit ; ARGV[2] = ttl(seconds) ; ARGV[3] = lease size
+-- Returns {granted, window_ttl_ms}; granted is 0 once the window is exhausted.
+local limit = tonumber(ARGV[1])
+local used = tonumber(redis.call("GET", KEYS[1]) or "0")
+local grant = math.min(tonumber(ARGV[3]), limit - used)
+if grant <= 0 then return {0, redis.call("PTTL", KEYS[1])} end
+local c = redis.call("INCRBY", KEYS[1], grant)
+if c == grant then redis.call("EXPIRE", KEYS[1], ARGV[2]) end
+return {grant, redis.call("PTTL", KEYS[1])}
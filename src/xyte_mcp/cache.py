@@ -0,0 +1,209 @@
+"""Per-tenant response cache shared by all API client instances.
+
+Clients are created per request, so the cache lives at module level and is
+keyed by tenant. Incoming webhook events are mapped to cache keys and either
+patch the cached payload in place or evict it, which keeps long TTLs safe
+for list endpoints. Device updates copy only :data:`DEVICE_EVENT_FIELDS`;
+removals evict. Writes made through the client evict the keys they affect.
+
+Cached payloads are shared by every request of the tenant and must not be
+modified by callers.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from cachetools import LRUCache, TTLCache  # type: ignore[import-untyped]
+from prometheus_client import Counter
+
+from .config import get_settings
+from .logging_utils import log_json
+from .tenant import tenant_key
+
+# Upper bound on the number of tenants with a live cache in this process
+MAX_TENANTS = 1024
+
+CACHE_INVALIDATIONS = Counter(
+    "xyte_cache_invalidations_total",
+    "Cache entries touched by incoming events",
+    ["key", "action"],
+)
+
+# Event type prefix -> cache keys affected by the event.  ``{id}`` is
+# substituted with the identifier found in the event payload.
+EVENT_CACHE_KEYS: Dict[str, tuple[str, ...]] = {
+    "device": ("device:{id}", "devices"),
+    "incident": ("incidents",),
+    "ticket": ("tickets",),
+}
+
+# Device event types that remove the device rather than change it
+_REMOVAL_WORDS = ("delete", "remove", "unclaim")
+# Fields a device event may write into cached devices; others are ignored
+DEVICE_EVENT_FIELDS = frozenset(
+    {
+        "name",
+        "status",
+        "state",
+        "online",
+        "model",
+        "space_id",
+        "serial_number",
+        "firmware_version",
+        "last_seen_at",
+        "configuration",
+    }
+)
+
+# List cache key -> fields that may hold the item list inside the payload
+_LIST_FIELDS = ("items", "devices", "data")
+
+_caches: LRUCache[str, TTLCache[str, Any]] = LRUCache(maxsize=MAX_TENANTS)
+# Bumped whenever a cached payload is modified in place
+_version = 0
+
+
+def get_cache(api_key: str | None) -> TTLCache[str, Any]:
+    """Return the shared cache for the tenant owning ``api_key``."""
+    tenant = tenant_key(api_key)
+    cache = _caches.get(tenant)
+    if cache is None:
+        cache = TTLCache(maxsize=128, ttl=get_settings().xyte_cache_ttl)
+        _caches[tenant] = cache
+    return cache
+
+
+def version() -> int:
+    """Return a counter that changes whenever a cached payload is patched.
+
+    Cached lists keep their identity when patched, so holders of derived
+    data (such as :mod:`xyte_mcp.offload` snapshots) compare this counter
+    to know whether the list still has the content they derived from.
+    """
+    return _version
+
+
+def invalidate(cache: TTLCache[str, Any], *keys: str) -> None:
+    """Drop ``keys`` from ``cache`` after a write made them stale."""
+    global _version
+    popped = [key for key in keys if cache.pop(key, None) is not None]
+    if popped:
+        _version += 1
+        for key in popped:
+            CACHE_INVALIDATIONS.labels(key=key.split(":", 1)[0], action="write").inc()
+
+
+def clear() -> None:
+    """Drop every tenant cache."""
+    _caches.clear()
+
+
+def _event_id(data: Dict[str, Any]) -> Optional[str]:
+    for field in ("device_id", "id", "uuid"):
+        value = data.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+def _list_items(payload: Any) -> List[Any] | None:
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for field in _LIST_FIELDS:
+            value = payload.get(field)
+            if isinstance(value, list):
+                return value
+            if isinstance(value, dict):
+                nested = _list_items(value)
+                if nested is not None:
+                    return nested
+    return None
+
+
+def _patch(cache: TTLCache[str, Any], key: str, item_id: str, changes: Dict[str, Any]) -> bool:
+    """Apply ``changes`` to a cached entry in place; return ``False`` if not possible."""
+    global _version
+    cached = cache.get(key)
+    if cached is None:
+        return True
+    if key.startswith("device:"):
+        target = cached.get("data", cached) if isinstance(cached, dict) else None
+        if not isinstance(target, dict):
+            return False
+        target.update(changes)
+        _version += 1
+        return True
+    items = _list_items(cached)
+    if items is None:
+        return False
+    for item in items:
+        if isinstance(item, dict) and str(item.get("id", item.get("uuid"))) == item_id:
+            item.update(changes)
+            _version += 1
+            return True
+    # Unknown item (e.g. a newly claimed device) - the list is stale
+    return False
+
+
+def _caches_for(tenant: str | None) -> Iterable[TTLCache[str, Any]]:
+    if tenant is None:
+        return list(_caches.values())
+    cache = _caches.get(tenant)
+    return [cache] if cache is not None else []
+
+
+def apply_event(event: Dict[str, Any], tenant: str | None = None) -> None:
+    """Evict or patch cached entries affected by ``event``.
+
+    Args:
+        event: Event with ``type`` and ``data`` fields as pushed to ``/webhook``.
+        tenant: :func:`~xyte_mcp.tenant.tenant_key` of the tenant that sent
+            the event. When omitted every tenant cache in this process is
+            considered.
+    """
+    event_type = str(event.get("type", "")).lower()
+    data = event.get("data") or {}
+    if not isinstance(data, dict):
+        data = {}
+    keys = next(
+        (keys for prefix, keys in EVENT_CACHE_KEYS.items() if event_type.startswith(prefix)),
+        None,
+    )
+    if not keys:
+        return
+
+    item_id = _event_id(data)
+    if event_type.startswith("device"):
+        if any(word in event_type for word in _REMOVAL_WORDS):
+            changes: Dict[str, Any] = {}
+        else:
+            changes = {k: v for k, v in data.items() if k in DEVICE_EVENT_FIELDS}
+    else:
+        changes = {k: v for k, v in data.items() if k not in ("id", "device_id", "uuid")}
+
+    for cache in _caches_for(tenant):
+        for template in keys:
+            if "{id}" in template:
+                if item_id is None:
+                    continue
+                key = template.format(id=item_id)
+            else:
+                key = template
+            if key not in cache:
+                continue
+            action = "evict"
+            if item_id is not None and changes and _patch(cache, key, item_id, changes):
+                action = "patch"
+            else:
+                cache.pop(key, None)
+            CACHE_INVALIDATIONS.labels(key=key.split(":", 1)[0], action=action).inc()
+            log_json(
+                logging.DEBUG,
+                event="cache_invalidation",
+                key=key,
+                action=action,
+                event_type=event_type,
+            )
@@ -0,0 +1,138 @@
+"""Circuit breakers for calls to the Xyte API.
+
+Breakers are shared by every client in the process and keyed by tenant and
+endpoint name (see :data:`xyte_mcp.mapping.DEFAULT_MAPPING`), so a failing
+endpoint only short-circuits calls to that endpoint for that tenant. After
+``XYTE_CIRCUIT_RESET_SECONDS`` an open breaker lets a single probe through;
+its outcome either closes the breaker or opens it again.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Iterator
+
+from cachetools import LRUCache
+from prometheus_client import Counter
+from prometheus_client.core import GaugeMetricFamily
+
+from . import metrics
+from .config import get_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+# Upper bound on (tenant, endpoint) breakers kept per process
+MAX_BREAKERS = 10_000
+
+TRANSITIONS = Counter(
+    "xyte_circuit_transitions_total",
+    "Circuit breaker state changes",
+    ["endpoint", "state"],
+)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    Args:
+        endpoint: Endpoint name used in metrics.
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds the circuit stays open before probing.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            TRANSITIONS.labels(endpoint=self.endpoint, state=state).inc()
+
+    def allow(self) -> bool:
+        """Return ``True`` if a call may proceed.
+
+        In the half-open state only one caller is admitted as the probe until
+        its outcome is recorded.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self._probing:
+            return False
+        self._transition(HALF_OPEN)
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+        self._probing = False
+
+    def abandon(self) -> None:
+        """Forget an admitted call whose outcome says nothing about the upstream."""
+        self._probing = False
+
+
+_breakers: LRUCache[tuple[str, str], CircuitBreaker] = LRUCache(maxsize=MAX_BREAKERS)
+
+
+def get_breaker(tenant: str, endpoint: str) -> CircuitBreaker:
+    """Return the shared breaker for ``tenant`` calling ``endpoint``."""
+    breaker = _breakers.get((tenant, endpoint))
+    if breaker is None:
+        settings = get_settings()
+        breaker = _breakers[(tenant, endpoint)] = CircuitBreaker(
+            endpoint,
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_seconds,
+        )
+    return breaker
+
+
+def reset() -> None:
+    """Drop all breakers."""
+    _breakers.clear()
+
+
+class _BreakerCollector:
+    """Count breakers per endpoint and state at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        counts: dict[tuple[str, str], int] = {}
+        for breaker in list(_breakers.values()):
+            key = (breaker.endpoint, breaker.state)
+            counts[key] = counts.get(key, 0) + 1
+        family = GaugeMetricFamily(
+            "xyte_circuit_breakers",
+            "Circuit breakers by endpoint and state",
+            labels=["endpoint", "state"],
+        )
+        for endpoint in sorted({endpoint for endpoint, _ in counts}):
+            for state in STATES:
+                family.add_metric([endpoint, state], counts.get((endpoint, state), 0))
+        yield family
+
+
+metrics.register_local(_BreakerCollector())
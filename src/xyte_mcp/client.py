@@ -9,10 +9,29 @@ from cachetools import TTLCache  # type: ignore[import-untyped]
 from datetime import datetime
 import anyio
 import time
+from functools import partial
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from prometheus_client import Counter
+from .cache import get_cache, invalidate
+from .circuit import get_breaker
+from .concurrency import UpstreamBusy, get_limiter, parse_retry_after
 from .config import get_settings
 from .mapping import load_mapping
-from .hooks import transform_request, transform_response
+from .retry import (
+    MAX_RETRY_WAIT,
+    RETRIES,
+    RETRIES_DENIED,
+    RetryBudget,
+    backoff_delay,
+    get_budget,
+    is_retryable,
+)
+from .hedging import get_hedger
+from . import offload, usage
+from .hooks import decode_response, has_response_hook, transform_request, transform_response
+from .tenant import key_id
+from .transport import SharedTransport
 
 from .models import (
     ClaimDeviceRequest,
@@ -37,6 +56,10 @@ CACHE_MISSES = Counter(
     ["key"],
 )
 
+tracer = trace.get_tracer(__name__)
+# Returned by _cache_lookup when the key is not cached
+_MISS = object()
+
 
 class XyteAPIClient:
     """Client for interacting with Xyte Organization API."""
@@ -62,8 +85,9 @@ class XyteAPIClient:
             raise ValueError("XYTE_API_KEY must be provided")
 
         self.base_url = base_url or settings.xyte_base_url
-        limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
-        transport = httpx.AsyncHTTPTransport(retries=3, limits=limits)
+        # Connections are pooled per event loop and shared by all clients;
+        # retries are handled by _request so they respect budgets and deadlines
+        transport = SharedTransport()
         headers = {"Content-Type": "application/json"}
         headers["Authorization"] = self.api_key
         self.client = httpx.AsyncClient(
@@ -72,11 +96,8 @@ class XyteAPIClient:
             timeout=30.0,
             transport=transport,
         )
-        self.cache: TTLCache[str, Any] = TTLCache(
-            maxsize=128, ttl=settings.xyte_cache_ttl
-        )
-        self._failures: int = 0
-        self._circuit_open_until: float = 0.0
+        self.cache: TTLCache[str, Any] = get_cache(self.api_key)
+        self.tenant = key_id(self.api_key)
 
     def cache_stats(self) -> Dict[str, Any]:
         """Return simple cache statistics for monitoring."""
@@ -95,31 +116,162 @@ class XyteAPIClient:
             raise httpx.TimeoutException("Deadline exceeded")
         return remaining
 
-    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
-        """Perform an HTTP request with retries and circuit breaker."""
-        if time.monotonic() < self._circuit_open_until:
-            raise httpx.NetworkError("backend_unavailable")
+    async def _request(
+        self, method: str, url: str, *, endpoint: str = "other", **kwargs: Any
+    ) -> httpx.Response:
+        """Perform an HTTP request with retries, circuit breaker and adaptive concurrency.
 
-        backoff = 0.1
-        failures = getattr(self, "_failures", 0)
-        for attempt in range(3):
+        Retries follow :mod:`xyte_mcp.retry`: only safe attempts are repeated,
+        each retry is paid for from the tenant's retry budget and backoff never
+        outlasts the caller's deadline.
+
+        Args:
+            method: HTTP method.
+            url: Path relative to the base URL.
+            endpoint: Mapping name of the endpoint, used to key circuit breakers
+                and concurrency limits.
+        """
+        with tracer.start_as_current_span(
+            f"upstream:{endpoint}",
+            attributes={
+                "http.request.method": method,
+                "xyte.endpoint": endpoint,
+                "xyte.tenant": self.tenant,
+            },
+        ) as span:
+            response = await self._send(method, url, endpoint, **kwargs)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    async def _send(
+        self, method: str, url: str, endpoint: str, **kwargs: Any
+    ) -> httpx.Response:
+        """Send the request of :meth:`_request`, retrying where allowed."""
+        breaker = get_breaker(self.tenant, endpoint)
+        budget = get_budget(self.tenant)
+        budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise httpx.NetworkError("backend_unavailable")
             try:
-                response = await self.client.request(
-                    method, url, timeout=self._request_timeout(), **kwargs
+                response = await self._attempt(method, url, endpoint, attempt, **kwargs)
+            except (httpx.NetworkError, httpx.TimeoutException, UpstreamBusy) as exc:
+                if await self._retry(method, endpoint, attempt, budget, exc=exc):
+                    continue
+                raise
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if await self._retry(
+                method,
+                endpoint,
+                attempt,
+                budget,
+                status=response.status_code,
+                retry_after=retry_after,
+            ):
+                continue
+            return response
+
+    async def _attempt(
+        self, method: str, url: str, endpoint: str, attempt: int, **kwargs: Any
+    ) -> httpx.Response:
+        """Make one attempt of :meth:`_send` in its own span.
+
+        The breaker must already have admitted the attempt; its outcome is
+        recorded here.
+        """
+        breaker = get_breaker(self.tenant, endpoint)
+        limiter = get_limiter(self.tenant, endpoint)
+        queue_timeout = get_settings().upstream_queue_timeout
+        with tracer.start_as_current_span(
+            f"attempt:{endpoint}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "http.request.method": method,
+                "xyte.endpoint": endpoint,
+                "xyte.attempt": attempt,
+            },
+        ) as span:
+            start = time.monotonic()
+            try:
+                timeout = self._request_timeout()
+                await limiter.acquire(
+                    queue_timeout if timeout is None else min(timeout, queue_timeout)
                 )
-                self._failures = 0
-                return response
+            except BaseException:
+                breaker.abandon()
+                raise
+            span.set_attribute("xyte.queue_ms", round((time.monotonic() - start) * 1000, 3))
+            start = time.monotonic()
+            status: int | None = None
+            retry_after: float | None = None
+            try:
+                try:
+                    send = partial(
+                        self.client.request,
+                        method,
+                        url,
+                        timeout=self._request_timeout(),
+                        **kwargs,
+                    )
+                    hedger = get_hedger(endpoint) if method == "GET" else None
+                    response = await (hedger.run(send) if hedger else send())
+                    status = response.status_code
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                finally:
+                    limiter.release(status, time.monotonic() - start, retry_after)
             except (httpx.NetworkError, httpx.TimeoutException):
-                failures += 1
-                self._failures = failures
-                if failures >= 3:
-                    self._circuit_open_until = time.monotonic() + 30
-                if attempt == 2:
-                    raise
-                await anyio.sleep(backoff)
-                backoff *= 2
-        # This should not be reached due to the logic above, but mypy needs it
-        raise httpx.NetworkError("Maximum retries exceeded")
+                breaker.record_failure()
+                raise
+            except BaseException:
+                breaker.abandon()
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            size = len(response.content)
+            span.set_attribute("http.response.status_code", response.status_code)
+            span.set_attribute("http.response.body.size", size)
+            usage.record(self.tenant, "upstream_calls")
+            usage.record(self.tenant, "upstream_bytes", size)
+            if response.status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    async def _retry(
+        self,
+        method: str,
+        endpoint: str,
+        attempt: int,
+        budget: RetryBudget,
+        *,
+        exc: Exception | None = None,
+        status: int | None = None,
+        retry_after: float | None = None,
+    ) -> bool:
+        """Wait before another attempt; return ``False`` if none should be made."""
+        if attempt >= get_settings().retry_attempts:
+            return False
+        if not is_retryable(method, exc, status):
+            return False
+        delay = backoff_delay(attempt, retry_after)
+        try:
+            remaining = self._request_timeout()
+        except httpx.TimeoutException:
+            return False
+        if delay > MAX_RETRY_WAIT or (remaining is not None and delay >= remaining):
+            return False
+        if not budget.try_spend():
+            RETRIES_DENIED.labels(endpoint=endpoint).inc()
+            return False
+        reason = type(exc).__name__ if exc is not None else str(status)
+        RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+        await anyio.sleep(delay)
+        return True
 
     async def __aenter__(self) -> "XyteAPIClient":
         return self
@@ -136,6 +288,38 @@ class XyteAPIClient:
         """Close the HTTP client."""
         await self.client.aclose()
 
+    def _cache_lookup(self, key: str, label: str) -> Any:
+        """Return the cached value for ``key``, or ``_MISS``, and record the outcome."""
+        value = self.cache.get(key, _MISS)
+        hit = value is not _MISS
+        (CACHE_HITS if hit else CACHE_MISSES).labels(key=label).inc()
+        usage.record(self.tenant, "cache_hits" if hit else "cache_misses")
+        span = trace.get_current_span()
+        span.set_attribute("xyte.cache_hit", hit)
+        span.add_event("cache_lookup", {"xyte.cache_key": label, "xyte.cache_hit": hit})
+        return value
+
+    async def _decode(self, name: str, response: httpx.Response) -> Any:
+        """Parse ``response`` and apply the response hook.
+
+        Large bodies are handed to the offload pool when a hook is configured,
+        since the hook may run arbitrary Python over the whole payload.
+        """
+        body = response.content
+        hooked = has_response_hook()
+        offloaded = hooked and len(body) >= get_settings().offload_min_bytes
+        with tracer.start_as_current_span(
+            f"decode:{name}",
+            attributes={
+                "http.response.body.size": len(body),
+                "xyte.response_hook": hooked,
+                "xyte.offloaded": offloaded,
+            },
+        ):
+            if offloaded:
+                return await offload.run(decode_response, name, body)
+            return transform_response(name, response.json())
+
     def _endpoint(self, name: str, **params: Any) -> str:
         path = self.mapping.get(name, "")
         return path.format(**params)
@@ -143,14 +327,13 @@ class XyteAPIClient:
     # Device Operations
     async def get_devices(self) -> Dict[str, Any]:
         """List all devices in the organization."""
-        if "devices" in self.cache:
-            CACHE_HITS.labels(key="devices").inc()
-            return self.cache["devices"]
-        CACHE_MISSES.labels(key="devices").inc()
+        cached = self._cache_lookup("devices", "devices")
+        if cached is not _MISS:
+            return cached
         path = self._endpoint("get_devices")
-        response = await self._request("GET", path)
+        response = await self._request("GET", path, endpoint="get_devices")
         response.raise_for_status()
-        data = transform_response("get_devices", response.json())
+        data = await self._decode("get_devices", response)
         self.cache["devices"] = data
         return data
 
@@ -163,32 +346,38 @@ class XyteAPIClient:
             "POST",
             self._endpoint("claim_device"),
             json=payload,
+            endpoint="claim_device",
         )
         response.raise_for_status()
-        return transform_response("claim_device", response.json())
+        invalidate(self.cache, "devices")
+        return await self._decode("claim_device", response)
 
     async def get_device(self, device_id: str) -> Dict[str, Any]:
         """Return details and status for a single device."""
         cache_key = f"device:{device_id}"
-        if cache_key in self.cache:
-            CACHE_HITS.labels(key="device").inc()
-            return self.cache[cache_key]
-        CACHE_MISSES.labels(key="device").inc()
+        cached = self._cache_lookup(cache_key, "device")
+        if cached is not _MISS:
+            return cached
         response = await self._request(
-            "GET", self._endpoint("get_device", device_id=device_id)
+            "GET",
+            self._endpoint("get_device", device_id=device_id),
+            endpoint="get_device",
         )
         response.raise_for_status()
-        data = transform_response("get_device", response.json())
+        data = await self._decode("get_device", response)
         self.cache[cache_key] = data
         return data
 
     async def delete_device(self, device_id: str) -> Dict[str, Any]:
         """Delete (remove) a device by its ID."""
         response = await self._request(
-            "DELETE", self._endpoint("delete_device", device_id=device_id)
+            "DELETE",
+            self._endpoint("delete_device", device_id=device_id),
+            endpoint="delete_device",
         )
         response.raise_for_status()
-        return transform_response("delete_device", response.json())
+        invalidate(self.cache, f"device:{device_id}", "devices")
+        return await self._decode("delete_device", response)
 
     async def update_device(
         self, device_id: str, device_data: UpdateDeviceRequest
@@ -199,9 +388,11 @@ class XyteAPIClient:
             "PATCH",
             self._endpoint("update_device", device_id=device_id),
             json=payload,
+            endpoint="update_device",
         )
         response.raise_for_status()
-        return transform_response("update_device", response.json())
+        invalidate(self.cache, f"device:{device_id}", "devices")
+        return await self._decode("update_device", response)
 
     async def get_device_histories(
         self,
@@ -240,9 +431,10 @@ class XyteAPIClient:
             "GET",
             self._endpoint("get_device_histories"),
             params=transform_request("get_device_histories", params),
+            endpoint="get_device_histories",
         )
         response.raise_for_status()
-        return transform_response("get_device_histories", response.json())
+        return await self._decode("get_device_histories", response)
 
     async def get_device_analytics(
         self, device_id: str, period: str = "last_30_days"
@@ -252,9 +444,10 @@ class XyteAPIClient:
             "GET",
             self._endpoint("get_device_analytics", device_id=device_id),
             params={"period": period},
+            endpoint="get_device_analytics",
         )
         response.raise_for_status()
-        return transform_response("get_device_analytics", response.json())
+        return await self._decode("get_device_analytics", response)
 
     # Command Operations
     async def send_command(
@@ -266,9 +459,11 @@ class XyteAPIClient:
             "POST",
             self._endpoint("send_command", device_id=device_id),
             json=payload,
+            endpoint="send_command",
         )
         response.raise_for_status()
-        return transform_response("send_command", response.json())
+        invalidate(self.cache, f"device:{device_id}", "devices")
+        return await self._decode("send_command", response)
 
     async def cancel_command(
         self, device_id: str, command_id: str, command_data: CommandRequest
@@ -281,17 +476,20 @@ class XyteAPIClient:
                 "cancel_command", device_id=device_id, command_id=command_id
             ),
             json=payload,
+            endpoint="cancel_command",
         )
         response.raise_for_status()
-        return transform_response("cancel_command", response.json())
+        return await self._decode("cancel_command", response)
 
     async def get_commands(self, device_id: str) -> Dict[str, Any]:
         """List all commands for the specified device."""
         response = await self._request(
-            "GET", self._endpoint("get_commands", device_id=device_id)
+            "GET",
+            self._endpoint("get_commands", device_id=device_id),
+            endpoint="get_commands",
         )
         response.raise_for_status()
-        return transform_response("get_commands", response.json())
+        return await self._decode("get_commands", response)
 
     # Organization Operations
     async def get_organization_info(self, device_id: str) -> Dict[str, Any]:
@@ -302,27 +500,25 @@ class XyteAPIClient:
             "GET",
             self._endpoint("get_organization_info", device_id=device_id),
             json=payload,
+            endpoint="get_organization_info",
         )
         response.raise_for_status()
-        return transform_response("get_organization_info", response.json())
+        return await self._decode("get_organization_info", response)
 
     # Incident Operations
     async def get_incidents(self) -> Dict[str, Any]:
         """Retrieve all incidents for the organization."""
-        if "incidents" in self.cache:
-            CACHE_HITS.labels(key="incidents").inc()
-            return self.cache["incidents"]
-        CACHE_MISSES.labels(key="incidents").inc()
-        response = await self._request("GET", self._endpoint("get_incidents"))
+        cached = self._cache_lookup("incidents", "incidents")
+        if cached is not _MISS:
+            return cached
+        response = await self._request(
+            "GET", self._endpoint("get_incidents"), endpoint="get_incidents"
+        )
         response.raise_for_status()
         
-        # Debug: Log raw response
         import logging
         logger = logging.getLogger(__name__)
-        raw_json = response.json()
-        logger.info(f"[CLIENT] Raw incidents response: {json.dumps(raw_json, default=str)[:1000]}")
-        
-        data = transform_response("get_incidents", raw_json)
+        data = await self._decode("get_incidents", response)
         logger.info(f"[CLIENT] After transform_response: {json.dumps(data, default=str)[:1000]}")
         
         self.cache["incidents"] = data
@@ -331,23 +527,26 @@ class XyteAPIClient:
     # Ticket Operations
     async def get_tickets(self) -> Dict[str, Any]:
         """Retrieve all support tickets for the organization."""
-        if "tickets" in self.cache:
-            CACHE_HITS.labels(key="tickets").inc()
-            return self.cache["tickets"]
-        CACHE_MISSES.labels(key="tickets").inc()
-        response = await self._request("GET", self._endpoint("get_tickets"))
+        cached = self._cache_lookup("tickets", "tickets")
+        if cached is not _MISS:
+            return cached
+        response = await self._request(
+            "GET", self._endpoint("get_tickets"), endpoint="get_tickets"
+        )
         response.raise_for_status()
-        data = transform_response("get_tickets", response.json())
+        data = await self._decode("get_tickets", response)
         self.cache["tickets"] = data
         return data
 
     async def get_ticket(self, ticket_id: str) -> Dict[str, Any]:
         """Retrieve a specific support ticket by ID."""
         response = await self._request(
-            "GET", self._endpoint("get_ticket", ticket_id=ticket_id)
+            "GET",
+            self._endpoint("get_ticket", ticket_id=ticket_id),
+            endpoint="get_ticket",
         )
         response.raise_for_status()
-        return transform_response("get_ticket", response.json())
+        return await self._decode("get_ticket", response)
 
     async def update_ticket(
         self, ticket_id: str, ticket_data: TicketUpdateRequest
@@ -358,17 +557,22 @@ class XyteAPIClient:
             "PUT",
             self._endpoint("update_ticket", ticket_id=ticket_id),
             json=payload,
+            endpoint="update_ticket",
         )
         response.raise_for_status()
-        return transform_response("update_ticket", response.json())
+        invalidate(self.cache, "tickets")
+        return await self._decode("update_ticket", response)
 
     async def mark_ticket_resolved(self, ticket_id: str) -> Dict[str, Any]:
         """Mark the specified ticket as resolved."""
         response = await self._request(
-            "POST", self._endpoint("mark_ticket_resolved", ticket_id=ticket_id)
+            "POST",
+            self._endpoint("mark_ticket_resolved", ticket_id=ticket_id),
+            endpoint="mark_ticket_resolved",
         )
         response.raise_for_status()
-        return transform_response("mark_ticket_resolved", response.json())
+        invalidate(self.cache, "tickets")
+        return await self._decode("mark_ticket_resolved", response)
 
     async def send_ticket_message(
         self, ticket_id: str, message_data: TicketMessageRequest
@@ -379,6 +583,7 @@ class XyteAPIClient:
             "POST",
             self._endpoint("send_ticket_message", ticket_id=ticket_id),
             json=payload,
+            endpoint="send_ticket_message",
         )
         response.raise_for_status()
-        return transform_response("send_ticket_message", response.json())
+        return await self._decode("send_ticket_message", response)
@@ -0,0 +1,242 @@
+"""Adaptive concurrency limits for calls to the Xyte API.
+
+Every (tenant, endpoint) pair gets an AIMD limiter: the number of calls
+allowed in flight grows by one per round trip while responses are healthy
+and is cut multiplicatively when Xyte answers 429/503 or latency rises well
+above the observed baseline. ``Retry-After`` pauses the pair entirely. Calls
+over the limit wait in a bounded FIFO queue until a slot frees up or their
+deadline passes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Mapping
+
+import httpx
+from cachetools import LRUCache
+from prometheus_client import Counter
+from prometheus_client.core import GaugeMetricFamily
+
+from . import metrics
+from .config import get_settings
+
+# Multiplicative decrease applied on 429/503 responses
+BACKOFF_RATIO = 0.5
+# Gentler decrease applied when latency alone signals congestion
+LATENCY_BACKOFF_RATIO = 0.9
+# Latency above this multiple of the baseline counts as congestion
+LATENCY_TOLERANCE = 2.0
+# Longest pause honoured from a Retry-After header
+MAX_RETRY_AFTER = 60.0
+# Upper bound on (tenant, endpoint) limiters kept per process
+MAX_LIMITERS = 10_000
+
+THROTTLED = Counter(
+    "xyte_upstream_throttled_total",
+    "Upstream responses asking the client to slow down",
+    ["endpoint", "status"],
+)
+
+
+class UpstreamBusy(httpx.TransportError):
+    """Raised when a limiter's wait queue is full.
+
+    The request was never sent. Retrying it at once would only join the same
+    full queue, so the retry policy never does.
+    """
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds requested by a ``Retry-After`` header."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter for one tenant and endpoint.
+
+    Args:
+        endpoint: Endpoint name used in metrics.
+        initial: Starting concurrency limit.
+        maximum: Largest limit the limiter may grow to.
+        queue_size: Maximum number of calls waiting for a slot.
+    """
+
+    def __init__(self, endpoint: str, initial: int, maximum: int, queue_size: int) -> None:
+        self.endpoint = endpoint
+        self.limit = float(initial)
+        self.max_limit = float(maximum)
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._timer: tuple[asyncio.AbstractEventLoop, asyncio.TimerHandle] | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _admissible(self, now: float) -> bool:
+        return self.in_flight < int(self.limit) and now >= self.blocked_until
+
+    async def acquire(self, timeout: float | None = None) -> None:
+        """Wait for a free slot.
+
+        Raises:
+            UpstreamBusy: If the wait queue is full.
+            httpx.TimeoutException: If no slot frees up within ``timeout``.
+        """
+        if not self._waiters and self._admissible(time.monotonic()):
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise UpstreamBusy("upstream_busy")
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._schedule_wakeup()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise httpx.TimeoutException("Timed out waiting for upstream capacity")
+            raise
+
+    def release(
+        self, status: int | None, latency: float, retry_after: float | None = None
+    ) -> None:
+        """Return a slot and adapt the limit to the observed response.
+
+        Args:
+            status: HTTP status code, or ``None`` if no response was received.
+            latency: Seconds the call took.
+            retry_after: Delay requested by the upstream, if any.
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        if status in (429, 503):
+            THROTTLED.labels(endpoint=self.endpoint, status=str(status)).inc()
+            self._decrease(now, BACKOFF_RATIO)
+            if retry_after:
+                pause = min(retry_after, MAX_RETRY_AFTER)
+                self.blocked_until = max(self.blocked_until, now + pause)
+        elif status is not None and status < 500:
+            baseline = self.baseline
+            if baseline is None or latency < baseline:
+                self.baseline = latency
+            else:
+                # Drift slowly so the baseline follows lasting shifts
+                self.baseline = baseline + (latency - baseline) * 0.05
+            if baseline is not None and latency > baseline * LATENCY_TOLERANCE:
+                self._decrease(now, LATENCY_BACKOFF_RATIO)
+            elif self.in_flight + 1 >= self.limit / 2:
+                # Only grow while the current limit is actually in use
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _decrease(self, now: float, ratio: float) -> None:
+        # Responses to calls issued before the last cut carry no new signal
+        if now - self._last_decrease < max(self.baseline or 0.0, 0.05):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit * ratio)
+
+    def _wake(self) -> None:
+        now = time.monotonic()
+        while self._waiters and self._admissible(now):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        """Wake waiters once a ``Retry-After`` pause ends."""
+        delay = self.blocked_until - time.monotonic()
+        if not self._waiters or delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._timer is not None:
+            timer_loop, handle = self._timer
+            if timer_loop is loop and not handle.cancelled() and handle.when() <= loop.time() + delay:
+                return
+            handle.cancel()
+        self._timer = (loop, loop.call_later(delay, self._on_timer))
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._wake()
+
+
+_limiters: LRUCache[tuple[str, str], AdaptiveLimiter] = LRUCache(maxsize=MAX_LIMITERS)
+
+
+def get_limiter(tenant: str, endpoint: str) -> AdaptiveLimiter:
+    """Return the shared limiter for ``tenant`` calling ``endpoint``."""
+    limiter = _limiters.get((tenant, endpoint))
+    if limiter is None:
+        settings = get_settings()
+        limiter = _limiters[(tenant, endpoint)] = AdaptiveLimiter(
+            endpoint,
+            initial=settings.upstream_concurrency,
+            maximum=settings.upstream_max_concurrency,
+            queue_size=settings.upstream_queue_size,
+        )
+    return limiter
+
+
+def reset() -> None:
+    """Drop all limiters."""
+    _limiters.clear()
+
+
+class _LimiterCollector:
+    """Aggregate limiter state per endpoint at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        limits: dict[str, float] = {}
+        in_flight: dict[str, int] = {}
+        queued: dict[str, int] = {}
+        for limiter in list(_limiters.values()):
+            name = limiter.endpoint
+            limits[name] = min(limits.get(name, limiter.limit), limiter.limit)
+            in_flight[name] = in_flight.get(name, 0) + limiter.in_flight
+            queued[name] = queued.get(name, 0) + limiter.queued
+        series: tuple[tuple[str, str, Mapping[str, float]], ...] = (
+            (
+                "xyte_upstream_concurrency_limit",
+                "Lowest adaptive concurrency limit across tenants",
+                limits,
+            ),
+            ("xyte_upstream_in_flight", "Upstream calls in flight", in_flight),
+            ("xyte_upstream_queue_depth", "Upstream calls waiting for a concurrency slot", queued),
+        )
+        for metric, doc, values in series:
+            family = GaugeMetricFamily(metric, doc, labels=["endpoint"])
+            for name, value in values.items():
+                family.add_metric([name], value)
+            yield family
+
+
+metrics.register_local(_LimiterCollector())
@@ -16,6 +16,11 @@ class Settings(BaseSettings):
     xyte_cache_ttl: int = Field(default=60, alias="XYTE_CACHE_TTL")
     environment: str = Field(default="prod", alias="XYTE_ENV")
     rate_limit_per_minute: int = Field(default=60, alias="XYTE_RATE_LIMIT")
+    rate_limit_lease: int = Field(default=10, alias="XYTE_RATE_LIMIT_LEASE")
+    rate_limit_tiers: dict[str, int] = Field(
+        default_factory=dict, alias="XYTE_RATE_LIMIT_TIERS"
+    )
+    tenant_tiers: dict[str, str] = Field(default_factory=dict, alias="XYTE_TENANT_TIERS")
     mcp_inspector_port: int = Field(default=8080, alias="MCP_INSPECTOR_PORT")
     mcp_inspector_host: str = Field(default="127.0.0.1", alias="MCP_INSPECTOR_HOST")
     enable_experimental_apis: bool = Field(
@@ -28,9 +33,60 @@ class Settings(BaseSettings):
     enable_async_tasks: bool = Field(
         default=False, alias="ENABLE_ASYNC_TASKS"
     )
+    task_backend: str = Field(default="celery", alias="XYTE_TASK_BACKEND")
+    task_workers: int = Field(default=4, alias="XYTE_TASK_WORKERS")
+    task_queue_size: int = Field(default=1000, alias="XYTE_TASK_QUEUE_SIZE")
+    task_lease_seconds: float = Field(default=60.0, alias="XYTE_TASK_LEASE_SECONDS")
+    db_pool_size: int = Field(default=5, alias="XYTE_DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="XYTE_DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="XYTE_DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="XYTE_DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="XYTE_DB_POOL_PRE_PING")
+    upstream_concurrency: int = Field(default=10, alias="XYTE_UPSTREAM_CONCURRENCY")
+    upstream_max_concurrency: int = Field(
+        default=50, alias="XYTE_UPSTREAM_MAX_CONCURRENCY"
+    )
+    upstream_queue_size: int = Field(default=100, alias="XYTE_UPSTREAM_QUEUE_SIZE")
+    upstream_queue_timeout: float = Field(
+        default=10.0, alias="XYTE_UPSTREAM_QUEUE_TIMEOUT"
+    )
+    circuit_failure_threshold: int = Field(default=3, alias="XYTE_CIRCUIT_FAILURES")
+    circuit_reset_seconds: float = Field(default=30.0, alias="XYTE_CIRCUIT_RESET_SECONDS")
+    retry_attempts: int = Field(default=3, alias="XYTE_RETRY_ATTEMPTS")
+    retry_budget_ratio: float = Field(default=0.2, alias="XYTE_RETRY_BUDGET_RATIO")
+    hedge_endpoints: list[str] = Field(default_factory=list, alias="XYTE_HEDGE_ENDPOINTS")
+    hedge_percentile: float = Field(default=0.95, alias="XYTE_HEDGE_PERCENTILE")
+    hedge_budget_ratio: float = Field(default=0.05, alias="XYTE_HEDGE_BUDGET_RATIO")
+    http2: bool = Field(default=False, alias="XYTE_HTTP2")
+    http_max_connections: int = Field(default=100, alias="XYTE_HTTP_MAX_CONNECTIONS")
+    http_max_keepalive: int = Field(default=20, alias="XYTE_HTTP_MAX_KEEPALIVE")
+    batch_concurrency: int = Field(default=10, alias="XYTE_BATCH_CONCURRENCY")
     allow_all_cors: bool = Field(
         default=False, alias="XYTE_ALLOW_ALL_CORS"
     )
+    registry_snapshot: bool = Field(default=True, alias="XYTE_REGISTRY_SNAPSHOT")
+    http_workers: int = Field(default=1, alias="XYTE_HTTP_WORKERS")
+    worker_max_requests: int = Field(default=0, alias="XYTE_WORKER_MAX_REQUESTS")
+    worker_graceful_timeout: int = Field(default=30, alias="XYTE_WORKER_GRACEFUL_TIMEOUT")
+    metrics_dir: str | None = Field(default=None, alias="PROMETHEUS_MULTIPROC_DIR")
+    metrics_max_paths: int = Field(default=200, alias="XYTE_METRICS_MAX_PATHS")
+    metrics_cache_seconds: float = Field(default=1.0, alias="XYTE_METRICS_CACHE_SECONDS")
+    offload_workers: int = Field(default=2, alias="XYTE_OFFLOAD_WORKERS")
+    offload_min_items: int = Field(default=5000, alias="XYTE_OFFLOAD_MIN_ITEMS")
+    offload_min_bytes: int = Field(default=1_048_576, alias="XYTE_OFFLOAD_MIN_BYTES")
+    loop_lag_interval: float = Field(default=0.5, alias="XYTE_LOOP_LAG_INTERVAL")
+    slow_callback_seconds: float = Field(default=0.25, alias="XYTE_SLOW_CALLBACK_SECONDS")
+    trace_exporter: str = Field(default="console", alias="XYTE_TRACE_EXPORTER")
+    trace_file: str = Field(default="traces.jsonl", alias="XYTE_TRACE_FILE")
+    trace_sample_ratio: float = Field(default=1.0, alias="XYTE_TRACE_SAMPLE_RATIO")
+    trace_slow_ms: float = Field(default=1000.0, alias="XYTE_TRACE_SLOW_MS")
+    slow_traces: int = Field(default=20, alias="XYTE_SLOW_TRACES")
+    slow_trace_window: float = Field(default=600.0, alias="XYTE_SLOW_TRACE_WINDOW")
+    usage_sink: str = Field(default="none", alias="XYTE_USAGE_SINK")
+    usage_flush_seconds: float = Field(default=60.0, alias="XYTE_USAGE_FLUSH_SECONDS")
+    usage_retention_days: int = Field(default=90, alias="XYTE_USAGE_RETENTION_DAYS")
+    usage_sketch_size: int = Field(default=200, alias="XYTE_USAGE_SKETCH_SIZE")
+    admin_token: str | None = Field(default=None, alias="XYTE_ADMIN_TOKEN")
 
     @property
     def multi_tenant(self) -> bool:
@@ -61,7 +117,79 @@ def validate_settings(settings: Settings) -> None:
             logger.debug("Running in single-tenant mode")
     if settings.rate_limit_per_minute <= 0:
         raise ValueError("XYTE_RATE_LIMIT must be positive")
+    if settings.rate_limit_lease <= 0:
+        raise ValueError("XYTE_RATE_LIMIT_LEASE must be positive")
+    if any(limit <= 0 for limit in settings.rate_limit_tiers.values()):
+        raise ValueError("XYTE_RATE_LIMIT_TIERS limits must be positive")
+    unknown = set(settings.tenant_tiers.values()) - set(settings.rate_limit_tiers)
+    if unknown:
+        raise ValueError(f"XYTE_TENANT_TIERS references unknown tiers: {sorted(unknown)}")
     if settings.xyte_cache_ttl <= 0:
         raise ValueError("XYTE_CACHE_TTL must be positive")
+    if settings.task_backend not in ("celery", "local"):
+        raise ValueError("XYTE_TASK_BACKEND must be 'celery' or 'local'")
+    if settings.task_workers <= 0:
+        raise ValueError("XYTE_TASK_WORKERS must be positive")
+    if settings.task_lease_seconds <= 0:
+        raise ValueError("XYTE_TASK_LEASE_SECONDS must be positive")
+    if settings.db_pool_size <= 0:
+        raise ValueError("XYTE_DB_POOL_SIZE must be positive")
+    if not 0 < settings.upstream_concurrency <= settings.upstream_max_concurrency:
+        raise ValueError(
+            "XYTE_UPSTREAM_CONCURRENCY must be positive and at most XYTE_UPSTREAM_MAX_CONCURRENCY"
+        )
+    if settings.upstream_queue_size < 0:
+        raise ValueError("XYTE_UPSTREAM_QUEUE_SIZE must not be negative")
+    if settings.circuit_failure_threshold <= 0:
+        raise ValueError("XYTE_CIRCUIT_FAILURES must be positive")
+    if settings.retry_attempts <= 0:
+        raise ValueError("XYTE_RETRY_ATTEMPTS must be positive")
+    if settings.retry_budget_ratio < 0:
+        raise ValueError("XYTE_RETRY_BUDGET_RATIO must not be negative")
+    if not 0 < settings.hedge_percentile < 1:
+        raise ValueError("XYTE_HEDGE_PERCENTILE must be between 0 and 1")
+    if settings.hedge_budget_ratio < 0:
+        raise ValueError("XYTE_HEDGE_BUDGET_RATIO must not be negative")
+    if settings.http_max_connections <= 0:
+        raise ValueError("XYTE_HTTP_MAX_CONNECTIONS must be positive")
+    if settings.batch_concurrency <= 0:
+        raise ValueError("XYTE_BATCH_CONCURRENCY must be positive")
+    if settings.http_workers <= 0:
+        raise ValueError("XYTE_HTTP_WORKERS must be positive")
+    if settings.http_workers > 1 and settings.task_backend == "local":
+        # Each worker would run its own task pool and queue
+        raise ValueError("XYTE_HTTP_WORKERS above 1 requires XYTE_TASK_BACKEND=celery")
+    if settings.worker_max_requests < 0:
+        raise ValueError("XYTE_WORKER_MAX_REQUESTS must not be negative")
+    if settings.metrics_max_paths <= 0:
+        raise ValueError("XYTE_METRICS_MAX_PATHS must be positive")
+    if settings.metrics_cache_seconds < 0:
+        raise ValueError("XYTE_METRICS_CACHE_SECONDS must not be negative")
+    if settings.worker_graceful_timeout <= 0:
+        raise ValueError("XYTE_WORKER_GRACEFUL_TIMEOUT must be positive")
+    if settings.offload_workers < 0:
+        raise ValueError("XYTE_OFFLOAD_WORKERS must not be negative")
+    if settings.loop_lag_interval <= 0:
+        raise ValueError("XYTE_LOOP_LAG_INTERVAL must be positive")
+    if settings.slow_callback_seconds < 0:
+        raise ValueError("XYTE_SLOW_CALLBACK_SECONDS must not be negative")
+    if settings.trace_exporter not in ("none", "console", "file", "otlp"):
+        raise ValueError("XYTE_TRACE_EXPORTER must be 'none', 'console', 'file' or 'otlp'")
+    if not 0 <= settings.trace_sample_ratio <= 1:
+        raise ValueError("XYTE_TRACE_SAMPLE_RATIO must be between 0 and 1")
+    if settings.trace_slow_ms < 0:
+        raise ValueError("XYTE_TRACE_SLOW_MS must not be negative")
+    if settings.slow_traces < 0:
+        raise ValueError("XYTE_SLOW_TRACES must not be negative")
+    if settings.slow_trace_window <= 0:
+        raise ValueError("XYTE_SLOW_TRACE_WINDOW must be positive")
+    if settings.usage_sink not in ("none", "redis", "db"):
+        raise ValueError("XYTE_USAGE_SINK must be 'none', 'redis' or 'db'")
+    if settings.usage_flush_seconds <= 0:
+        raise ValueError("XYTE_USAGE_FLUSH_SECONDS must be positive")
+    if settings.usage_retention_days <= 0:
+        raise ValueError("XYTE_USAGE_RETENTION_DAYS must be positive")
+    if settings.usage_sketch_size <= 0:
+        raise ValueError("XYTE_USAGE_SKETCH_SIZE must be positive")
     if not settings.xyte_base_url:
         raise ValueError("XYTE_BASE_URL must not be empty")
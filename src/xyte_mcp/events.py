@@ -3,17 +3,32 @@ from __future__ import annotations
 import os
 import json
 import logging
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict
 
-from redis.asyncio import Redis
-
-from . import plugin
+from . import cache, plugin
 from .logging_utils import log_json
+from .tenant import current_tenant_key
 from pydantic import BaseModel, Field
 
-redis = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+if TYPE_CHECKING:  # pragma: no cover - imported for type hints only
+    from redis.asyncio import Redis
+
+# Created on first use so importing this module does not load redis
+redis: "Redis | None" = None
 STREAM = "mcp_events"
 GROUP = "mcp_consumers"
+# Pub/sub channel carrying task status transitions from workers
+TASK_CHANNEL = "mcp_task_updates"
+
+
+def get_redis() -> "Redis":
+    """Return the Redis client used for events, creating it on first use."""
+    global redis
+    if redis is None:
+        from redis.asyncio import Redis
+
+        redis = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return redis
 
 
 class Event(BaseModel):
@@ -24,12 +39,17 @@ class Event(BaseModel):
 
 
 async def push_event(evt: Event | Dict[str, Any]) -> None:
-    """Publish an event to the Redis stream and plugins."""
+    """Publish an event to the Redis stream and plugins.
+
+    Cached API responses affected by the event are refreshed first so that
+    subsequent reads in this process reflect the new state immediately.
+    """
     if isinstance(evt, Event):
         payload = evt.model_dump()
     else:
         payload = evt
-    await redis.xadd(
+    cache.apply_event(payload, current_tenant_key())
+    await get_redis().xadd(
         STREAM,
         {k: json.dumps(v) for k, v in payload.items()},
         maxlen=10000,
@@ -41,16 +61,53 @@ async def push_event(evt: Event | Dict[str, Any]) -> None:
 
 async def pull_event(consumer: str, block: int = 5000) -> Dict[str, Any] | None:
     """Retrieve the next event for a consumer from the Redis stream."""
+    client = get_redis()
     try:
-        await redis.xgroup_create(STREAM, GROUP, id="$", mkstream=True)
+        await client.xgroup_create(STREAM, GROUP, id="$", mkstream=True)
     except Exception:
         pass
-    resp = await redis.xreadgroup(GROUP, consumer, {STREAM: ">"}, 1, block)
+    resp = await client.xreadgroup(GROUP, consumer, {STREAM: ">"}, 1, block)
     if not resp:
         return None
     _, evts = resp[0]
     eid, raw = evts[0]
-    await redis.xack(STREAM, GROUP, eid)
+    await client.xack(STREAM, GROUP, eid)
     result = {k.decode(): json.loads(v) for k, v in raw.items()}
     log_json(logging.INFO, event="pull_event", event_type=result.get("type"))
     return result
+
+
+async def publish_task_update(update: Dict[str, Any]) -> None:
+    """Announce a task status change to servers waiting on it.
+
+    Every transition goes out on the ``TASK_CHANNEL`` pub/sub channel; finished
+    tasks are also announced on the event stream so ``/events`` clients see
+    them. That stream is shared by all tenants, so it carries only the task
+    id and status; the result is read through the task status endpoints.
+    """
+    await get_redis().publish(TASK_CHANNEL, json.dumps(update, default=str))
+    if update.get("status") in ("done", "error"):
+        summary = {"task_id": update.get("task_id"), "status": update.get("status")}
+        await push_event({"type": "task_completed", "data": summary})
+
+
+async def listen_task_updates(
+    callback: Callable[[Dict[str, Any]], None],
+    on_subscribed: Callable[[], None] | None = None,
+) -> None:
+    """Invoke ``callback`` for every task update published on ``TASK_CHANNEL``.
+
+    ``on_subscribed`` is called once the subscription is active.
+    """
+    pubsub = get_redis().pubsub()
+    await pubsub.subscribe(TASK_CHANNEL)
+    if on_subscribed is not None:
+        on_subscribed()
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            callback(json.loads(message["data"]))
+    finally:
+        await pubsub.unsubscribe(TASK_CHANNEL)
+        await pubsub.aclose()
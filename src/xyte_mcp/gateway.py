@@ -0,0 +1,247 @@
+"""Pure-ASGI gateway middleware for the HTTP entrypoints.
+
+A single layer does, for every HTTP request, what used to take several
+stacked middlewares:
+
+* assigns a request ID and exposes the request through
+  :data:`~xyte_mcp.logging_utils.request_var`;
+* authenticates the API key and stores it on ``request.state``, or lets an
+  operator holding ``XYTE_ADMIN_TOKEN`` through to :data:`ADMIN_PATHS`;
+* enforces the per-tenant rate limit;
+* logs the request and records the HTTP metrics.
+
+Metrics are labelled with the route template the request matched, such as
+``/v1/task/{task_id}``, rather than the raw path, so per-id URLs share a
+series. Paths that match no route share the ``unmatched`` label, and at most
+``XYTE_METRICS_MAX_PATHS`` distinct templates are recorded per process.
+
+Being plain ASGI, it passes ``receive`` and ``send`` straight through, so
+streaming responses such as ``/events`` and the streamable-HTTP transport
+are not buffered or moved to another task.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import math
+import time
+import uuid
+from typing import Any, Iterable, Mapping, MutableMapping, NamedTuple
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import BaseRoute, Match, Mount
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import get_settings
+from .limits import TenantRateLimiter, tenant_limit
+from .logging_utils import (
+    HTTP_PATH_OVERFLOW,
+    HTTP_REQUEST_COUNT,
+    HTTP_REQUEST_LATENCY,
+    log_json,
+    request_id_var,
+    request_var,
+)
+from .metrics import OVERFLOW, BoundedLabel
+from .tenant import key_id, request_key
+
+# Paths reachable without credentials and exempt from rate limiting
+PUBLIC_PATHS = frozenset(
+    {
+        "/healthz",
+        "/readyz",
+        "/metrics",
+        "/v1/healthz",
+        "/v1/readyz",
+        "/v1/metrics",
+    }
+)
+
+# Operator endpoints, reachable with ``XYTE_ADMIN_TOKEN`` and no tenant key
+ADMIN_PATHS = frozenset(
+    {
+        "/config",
+        "/debug/slow",
+        "/usage",
+        "/v1/config",
+        "/v1/debug/slow",
+        "/v1/usage",
+    }
+)
+
+# Path label of requests that match no route
+UNMATCHED_PATH = "unmatched"
+# Methods recorded as themselves; others are recorded as "OTHER"
+HTTP_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"}
+)
+
+
+def route_template(scope: Scope, routes: Iterable[BaseRoute]) -> str:
+    """Return the template of the route ``scope`` matches, with its mount prefix."""
+    for route in routes:
+        match, child = route.matches(scope)
+        if match is Match.NONE:
+            continue
+        if isinstance(route, Mount) and route.routes:
+            return route_template({**scope, **child}, route.routes)
+        return scope.get("root_path", "") + getattr(route, "path", "")
+    return UNMATCHED_PATH
+
+
+class Rejection(NamedTuple):
+    """Error response returned when a request fails authentication."""
+
+    status: int
+    error: str
+
+
+def is_admin(headers: Mapping[str, str]) -> bool:
+    """Return ``True`` if ``headers`` carry ``XYTE_ADMIN_TOKEN`` in ``X-Admin-Token``."""
+    expected = get_settings().admin_token
+    token = headers.get("x-admin-token")
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+def _redact(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return (value[:4] + "****") if len(value) > 4 else "****"
+
+
+class GatewayMiddleware:
+    """Authenticate, rate limit and log HTTP requests in one ASGI layer.
+
+    Subclasses decide how credentials are checked by overriding
+    :meth:`authenticate` and may swap the limiter by overriding
+    :meth:`retry_after`.
+
+    Args:
+        app: The wrapped ASGI application.
+        limit_per_minute: Default per-tenant allowance; ``None`` disables the
+            in-process limiter.
+        public_paths: Paths that skip authentication and rate limiting.
+        max_paths: Distinct path labels recorded before further ones go to
+            the overflow label; defaults to ``XYTE_METRICS_MAX_PATHS``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit_per_minute: int | None = None,
+        public_paths: Iterable[str] = PUBLIC_PATHS,
+        max_paths: int | None = None,
+    ) -> None:
+        self.app = app
+        self.limit = limit_per_minute
+        self.public_paths = frozenset(public_paths)
+        self.limiter = TenantRateLimiter()
+        self.path_labels = BoundedLabel(max_paths or get_settings().metrics_max_paths)
+
+    def path_label(self, scope: Scope) -> str:
+        """Return the metrics label for the request path of ``scope``."""
+        # Wrapping a router directly, or running inside a Starlette app's stack
+        app: Any = self.app if hasattr(self.app, "routes") else scope.get("app")
+        label = self.path_labels(route_template(scope, getattr(app, "routes", ())))
+        if label == OVERFLOW:
+            HTTP_PATH_OVERFLOW.inc()
+        return label
+
+    def authenticate(self, headers: Headers) -> str | Rejection | None:
+        """Return the caller's API key, ``None`` if anonymous, or a rejection."""
+        return None
+
+    async def retry_after(self, tenant: str) -> float:
+        """Return seconds ``tenant`` must wait, or ``0.0`` if it may proceed."""
+        if self.limit is None:
+            return 0.0
+        return self.limiter.check(tenant, tenant_limit(tenant, self.limit))
+
+    async def _admit(self, scope: Scope, headers: Headers) -> Response | None:
+        """Return an error response, or ``None`` to pass the request on."""
+        if scope["path"] in self.public_paths:
+            return None
+        if scope["path"] in ADMIN_PATHS and is_admin(headers):
+            return None
+        result = self.authenticate(headers)
+        if isinstance(result, Rejection):
+            return JSONResponse({"error": result.error}, status_code=result.status)
+        tenant = key_id(request_key(headers))
+        if result:
+            state = scope.setdefault("state", {})
+            state["xyte_key"] = result
+            state["key_id"] = tenant
+        retry_after = await self.retry_after(tenant)
+        if retry_after:
+            return JSONResponse(
+                {"error": "rate_limit"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        token_ctx = request_id_var.set(request_id)
+        token_req = request_var.set(Request(scope, receive))
+        headers = Headers(scope=scope)
+        method = scope["method"]
+        path = scope["path"]
+        start = time.monotonic()
+        # Resolved up front: routing rewrites parts of the scope in place
+        label = self.path_label(scope)
+
+        log_json(
+            logging.INFO,
+            event="request_start",
+            method=method,
+            path=path,
+            request_id=request_id,
+            authorization=_redact(headers.get("authorization")),
+        )
+
+        status_code: int | None = None
+
+        async def send_wrapper(message: MutableMapping[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                log_json(
+                    logging.INFO,
+                    event="response_start",
+                    status=status_code,
+                    request_id=request_id,
+                )
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                duration = time.monotonic() - start
+                log_json(
+                    logging.INFO,
+                    event="request_complete",
+                    duration_ms=round(duration * 1000),
+                    request_id=request_id,
+                )
+                method_label = method if method in HTTP_METHODS else "OTHER"
+                HTTP_REQUEST_LATENCY.labels(method_label, label).observe(duration)
+                HTTP_REQUEST_COUNT.labels(method_label, label, status_code or 200).inc()
+            await send(message)
+
+        try:
+            response = await self._admit(scope, headers)
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token_ctx)
+            request_var.reset(token_req)
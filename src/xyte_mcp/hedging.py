@@ -0,0 +1,130 @@
+"""Hedged requests for read endpoints.
+
+When an endpoint listed in ``XYTE_HEDGE_ENDPOINTS`` has not answered within
+the ``XYTE_HEDGE_PERCENTILE`` of its recent latency, a second identical
+request is sent. Whichever response arrives first is used and the other
+request is cancelled. Hedges are paid for from a per-endpoint budget that
+earns ``XYTE_HEDGE_BUDGET_RATIO`` tokens per request, so hedging adds at most
+that fraction of extra upstream load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+import httpx
+from prometheus_client import Counter
+
+from .config import get_settings
+from .retry import RetryBudget
+
+# Number of recent latencies the hedge delay is derived from
+WINDOW = 200
+# Hedging starts once this many latencies have been observed
+MIN_SAMPLES = 20
+# Recompute the percentile after this many new samples
+REFRESH_EVERY = 16
+
+HEDGES_FIRED = Counter(
+    "xyte_hedged_requests_total", "Hedge requests sent", ["endpoint"]
+)
+HEDGES_WON = Counter(
+    "xyte_hedge_wins_total", "Hedge requests that answered first", ["endpoint"]
+)
+
+
+class Hedger:
+    """Latency window and hedge budget for one endpoint.
+
+    Args:
+        endpoint: Endpoint name used in metrics.
+        percentile: Fraction of recent requests expected to finish before a
+            hedge is sent.
+        budget_ratio: Hedges allowed per request.
+    """
+
+    def __init__(self, endpoint: str, percentile: float, budget_ratio: float) -> None:
+        self.endpoint = endpoint
+        self.percentile = percentile
+        self.budget = RetryBudget(budget_ratio, min_per_second=0.0, capacity=5.0)
+        self._latencies: deque[float] = deque(maxlen=WINDOW)
+        self._pending_samples = 0
+        self._delay: float | None = None
+
+    def record(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._pending_samples += 1
+
+    def delay(self) -> float | None:
+        """Return how long to wait before hedging, or ``None`` to not hedge."""
+        if len(self._latencies) < MIN_SAMPLES:
+            return None
+        if self._delay is None or self._pending_samples >= REFRESH_EVERY:
+            ordered = sorted(self._latencies)
+            index = min(int(len(ordered) * self.percentile), len(ordered) - 1)
+            self._delay = ordered[index]
+            self._pending_samples = 0
+        return self._delay
+
+    async def run(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Call ``send`` and hedge it with a second call if it is slow."""
+        self.budget.record_request()
+        start = time.monotonic()
+        delay = self.delay()
+        if delay is None:
+            response = await send()
+            self.record(time.monotonic() - start)
+            return response
+
+        primary = asyncio.ensure_future(send())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.budget.try_spend():
+                HEDGES_FIRED.labels(endpoint=self.endpoint).inc()
+                tasks.add(asyncio.ensure_future(send()))
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        if task is not primary:
+                            HEDGES_WON.labels(endpoint=self.endpoint).inc()
+                        self.record(time.monotonic() - start)
+                        return task.result()
+                    error = error or exc
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_hedgers: dict[str, Hedger] = {}
+
+
+def get_hedger(endpoint: str) -> Hedger | None:
+    """Return the hedger for ``endpoint`` if hedging is enabled for it."""
+    settings = get_settings()
+    if endpoint not in settings.hedge_endpoints:
+        return None
+    hedger = _hedgers.get(endpoint)
+    if hedger is None:
+        hedger = _hedgers[endpoint] = Hedger(
+            endpoint,
+            percentile=settings.hedge_percentile,
+            budget_ratio=settings.hedge_budget_ratio,
+        )
+    return hedger
+
+
+def reset() -> None:
+    """Drop all latency windows and budgets."""
+    _hedgers.clear()
@@ -1,4 +1,5 @@
 import importlib
+import json
 import os
 from typing import Any
 
@@ -38,3 +39,14 @@ def transform_response(name: str, payload: Any) -> Any:
         except Exception:
             return payload
     return payload
+
+
+def has_response_hook() -> bool:
+    """Return ``True`` if the hooks module defines ``transform_response``."""
+    hooks = _load_hooks()
+    return bool(hooks and hasattr(hooks, "transform_response"))
+
+
+def decode_response(name: str, body: bytes) -> Any:
+    """Parse a JSON response body and apply ``transform_response`` to it."""
+    return transform_response(name, json.loads(body))
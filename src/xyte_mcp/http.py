@@ -2,16 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import inspect
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
 from starlette.applications import Starlette
 from starlette.routing import Mount
 from starlette.responses import JSONResponse, HTMLResponse
 
-from .server import get_server
-from .logging_utils import RequestLoggingMiddleware
+from .server import get_server, lifespan as server_lifespan
 from .config import get_settings
-from .http_utils import RateLimitMiddleware
 from .auth import AuthHeaderMiddleware
 from starlette.middleware.cors import CORSMiddleware
 
@@ -32,11 +32,7 @@ def build_openapi(app: Starlette) -> Dict[str, Any]:
 
 
 internal_app = get_server().streamable_http_app()
-internal_app.add_middleware(RequestLoggingMiddleware)
 settings = get_settings()
-internal_app.add_middleware(
-    RateLimitMiddleware, limit_per_minute=settings.rate_limit_per_minute
-)
 cors_origins = ["*"] if settings.allow_all_cors else []
 internal_app.add_middleware(
     CORSMiddleware,
@@ -44,11 +40,23 @@ internal_app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-internal_app.add_middleware(AuthHeaderMiddleware)
+# Outermost: authentication, rate limiting and request logging in one layer
+internal_app.add_middleware(
+    AuthHeaderMiddleware, limit_per_minute=settings.rate_limit_per_minute
+)
 
 routes = [Mount("/v1", app=internal_app)]
 
-app = Starlette(routes=routes)
+
+@asynccontextmanager
+async def lifespan(_app: Any) -> AsyncIterator[None]:
+    # Mounted apps get no lifespan events of their own; the MCP session
+    # manager of ``internal_app`` is started here too.
+    async with internal_app.router.lifespan_context(internal_app), server_lifespan():
+        yield
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
 
 # Optional Swagger UI using FastAPI
 if settings.enable_swagger:
@@ -59,6 +67,7 @@ if settings.enable_swagger:
         logging.getLogger(__name__).warning("FastAPI not installed; Swagger disabled")
     else:
         app = create_documented_app(app)
+        app.router.lifespan_context = lifespan
 
 
 async def openapi_spec(request) -> JSONResponse:
@@ -82,7 +91,17 @@ app.add_route("/v1/docs", api_docs, methods=["GET"])
 
 
 def main() -> None:
-    """Run the HTTP server using Uvicorn."""
+    """Run the HTTP server using Uvicorn.
+
+    With ``XYTE_HTTP_WORKERS`` above one, Uvicorn supervises that many worker
+    processes. Each has its own event loop, upstream connection pools and
+    caches, and ``/metrics`` merges their Prometheus samples through a shared
+    ``PROMETHEUS_MULTIPROC_DIR``. Webhook cache invalidation reaches only the
+    worker that received the event. Workers that exit are replaced. With
+    ``XYTE_WORKER_MAX_REQUESTS`` set, each worker is recycled after roughly
+    that many requests, finishing in-flight ones first. Recycling needs more
+    than one worker.
+    """
     import uvicorn
 
     settings = get_settings()
@@ -93,12 +112,31 @@ def main() -> None:
     
     # Always bind to 0.0.0.0 in production environments like Render
     host = "0.0.0.0" if os.environ.get("PORT") else settings.mcp_inspector_host
+
+    workers = settings.http_workers
+    if workers > 1:
+        import tempfile
+
+        from .metrics import prepare_multiprocess
+
+        prepare_multiprocess(
+            settings.metrics_dir or tempfile.mkdtemp(prefix="xyte-metrics-")
+        )
+    # A lone server is not supervised, so recycling would just stop it
+    max_requests = (settings.worker_max_requests if workers > 1 else 0) or None
     
-    uvicorn.run(
-        "xyte_mcp.http:app",
-        host=host,
-        port=port,
-    )
+    options: dict[str, Any] = {
+        "host": host,
+        "port": port,
+        "workers": workers,
+        "limit_max_requests": max_requests,
+        "timeout_graceful_shutdown": settings.worker_graceful_timeout,
+    }
+    # Jitter keeps workers started together from recycling together; older
+    # Uvicorn releases do not have the option
+    if "limit_max_requests_jitter" in inspect.signature(uvicorn.run).parameters:
+        options["limit_max_requests_jitter"] = (max_requests or 0) // 10
+    uvicorn.run("xyte_mcp.http:app", **options)
 
 
 if __name__ == "__main__":
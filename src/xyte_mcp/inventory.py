@@ -0,0 +1,129 @@
+"""Record extraction and filtering behind the ``search`` tool.
+
+Everything here is plain Python with no I/O, so :mod:`xyte_mcp.offload` can
+run it in a worker process when an inventory is large.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+Filters = Dict[str, Dict[str, str]]
+Match = Tuple[int, str, Dict[str, Any]]
+
+# Fields searched by the ``q:`` free-text filter
+TEXT_FIELDS = {
+    "devices": ("id", "name", "model", "serial_number"),
+    "tickets": ("id", "title", "description"),
+    "incidents": ("uuid", "id", "title", "description"),
+}
+
+
+def parse_query(query: str) -> Tuple[str | None, str | None, Filters]:
+    """Split a search query into its resource type, free text and filters."""
+    filters: Filters = {}
+    resource_type = None
+    free_text = None
+    for token in query.split():
+        if ':' not in token:
+            continue
+        parts = token.split(':', 2)
+        key = parts[0]
+        op = 'eq'
+        value = parts[1]
+        if len(parts) == 3:
+            op = parts[1]
+            value = parts[2]
+        # Remove quotes if present
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]
+        elif value.startswith("'") and value.endswith("'"):
+            value = value[1:-1]
+        if key == 'type':
+            resource_type = value.lower()
+        elif key in ['q', 'query']:
+            free_text = value.lower()
+        else:
+            filters[key] = {'op': op, 'value': value.lower()}
+    return resource_type, free_text, filters
+
+
+def extract_records(kind: str, payload: Any) -> List[Dict[str, Any]]:
+    """Return the records of a list response, wrapped or not."""
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return []
+    if "items" in payload:
+        return payload["items"]
+    if kind in payload:
+        return payload[kind]
+    data = payload.get("data")
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if kind in data:
+            return data[kind]
+        if "items" in data:
+            return data["items"]
+    return []
+
+
+def _matches(record: Dict[str, Any], fields: Tuple[str, ...], free_text: str | None, filters: Filters) -> bool:
+    if free_text:
+        searchable_text = " ".join(str(record.get(f, "")) for f in fields).lower()
+        if free_text not in searchable_text:
+            return False
+    for field, filter_info in filters.items():
+        field_value = str(record.get(field, "")).lower()
+        filter_value = filter_info['value']
+        op = filter_info['op']
+        if op == 'eq' and field_value != filter_value:
+            return False
+        if op == 'neq' and field_value == filter_value:
+            return False
+        if op == 'contains' and filter_value not in field_value:
+            return False
+    return True
+
+
+def _result(kind: str, idx: int, record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    if kind == "devices":
+        result_id = f"device_{record.get('id')}"
+        return result_id, {
+            "id": result_id,
+            "title": f"Device: {record.get('name', 'Unknown')}",
+            "text": f"Model: {record.get('model', 'N/A')}, Serial: {record.get('serial_number', 'N/A')}, Status: {record.get('status', 'Unknown')}",
+            "url": f"/devices/{record.get('id')}" if record.get('id') else None,
+        }
+    if kind == "tickets":
+        result_id = f"ticket_{record.get('id')}"
+        return result_id, {
+            "id": result_id,
+            "title": f"Ticket: {record.get('title', 'Unknown')}",
+            "text": f"Status: {record.get('status', 'N/A')}, Priority: {record.get('priority', 'N/A')}, Description: {record.get('description', 'No description')[:100]}...",
+            "url": f"/tickets/{record.get('id')}" if record.get('id') else None,
+        }
+    # Incidents are identified by uuid
+    incident_id = record.get('uuid') or record.get('id') or f"unknown_{idx}"
+    result_id = f"incident_{incident_id}"
+    description = record.get('description') or 'No description'
+    return result_id, {
+        "id": result_id,
+        "title": f"Incident: {record.get('title', 'Unknown')}",
+        "text": f"Priority: {record.get('priority', 'N/A')}, Status: {record.get('status', 'N/A')}, Description: {description[:100]}...",
+        "url": f"/incidents/{incident_id}",
+    }
+
+
+def match_records(
+    records: List[Dict[str, Any]], kind: str, free_text: str | None, filters: Filters
+) -> List[Match]:
+    """Return ``(index, result_id, result)`` for each record matching the query."""
+    fields = TEXT_FIELDS[kind]
+    matches: List[Match] = []
+    for idx, record in enumerate(records):
+        if _matches(record, fields, free_text, filters):
+            result_id, result = _result(kind, idx, record)
+            matches.append((idx, result_id, result))
+    return matches
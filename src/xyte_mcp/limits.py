@@ -0,0 +1,67 @@
+"""Per-tenant request limits enforced inside a single process.
+
+Limits use the generic cell rate algorithm (GCRA): each tenant is tracked by
+one "theoretical arrival time", so a check is O(1) regardless of traffic and
+memory is bounded by ``MAX_TENANTS``. A tenant evicted from the table simply
+starts again with a full allowance.
+
+Tenants are identified by :func:`xyte_mcp.tenant.key_id`. Their allowance is
+``XYTE_RATE_LIMIT`` unless ``XYTE_TENANT_TIERS`` assigns them a tier from
+``XYTE_RATE_LIMIT_TIERS``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from cachetools import LRUCache
+
+from .config import get_settings
+
+WINDOW_SECONDS = 60.0
+# Upper bound on tenants tracked per limiter
+MAX_TENANTS = 10_000
+
+
+def tenant_limit(tenant: str, default: int | None = None) -> int:
+    """Return the requests-per-minute allowance for ``tenant``."""
+    settings = get_settings()
+    tier = settings.tenant_tiers.get(tenant)
+    if tier is not None:
+        return settings.rate_limit_tiers[tier]
+    return default if default is not None else settings.rate_limit_per_minute
+
+
+class TenantRateLimiter:
+    """GCRA limiter allowing ``limit`` requests per minute for each tenant.
+
+    Args:
+        max_tenants: Number of tenants whose state is retained.
+    """
+
+    def __init__(self, max_tenants: int = MAX_TENANTS) -> None:
+        self._tat: LRUCache[str, float] = LRUCache(maxsize=max_tenants)
+
+    def check(self, tenant: str, limit: int, now: float | None = None) -> float:
+        """Record a request for ``tenant``.
+
+        Returns:
+            ``0.0`` if the request is allowed, otherwise the number of seconds
+            until the tenant may retry.
+        """
+        if now is None:
+            now = time.monotonic()
+        interval = WINDOW_SECONDS / limit
+        tat = max(self._tat.get(tenant, now), now) + interval
+        allow_at = tat - WINDOW_SECONDS
+        if allow_at > now:
+            return allow_at - now
+        self._tat[tenant] = tat
+        return 0.0
+
+    def clear(self) -> None:
+        """Forget the state of every tenant."""
+        self._tat.clear()
+
+    def __len__(self) -> int:
+        return len(self._tat)
@@ -0,0 +1,173 @@
+"""Event-loop responsiveness monitoring.
+
+Three views of time spent on the event loop:
+
+* A background task on each loop sleeps for ``XYTE_LOOP_LAG_INTERVAL``
+  seconds and records how much later than scheduled it woke up
+  (``xyte_event_loop_lag_seconds``).
+* A watchdog thread keeps a callback queued on each loop. If it has not run
+  after ``XYTE_SLOW_CALLBACK_SECONDS``, something is holding the loop, and
+  the watchdog logs a ``slow_callback`` event with the running task and a
+  stack sample of the loop thread, taken while the culprit still runs.
+* :class:`LoopTimer` measures how much of a coroutine's wall time was spent
+  running on the loop. The rest was spent waiting on I/O or for its turn.
+  :func:`~xyte_mcp.logging_utils.instrument` uses it for every tool and
+  resource.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from typing import Any, Awaitable, Generator, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+# Innermost frames kept in a slow-callback stack sample
+STACK_DEPTH = 15
+
+LOOP_LAG = Histogram(
+    "xyte_event_loop_lag_seconds",
+    "Delay between when the lag probe was due to wake and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SLOW_CALLBACKS = Counter(
+    "xyte_event_loop_slow_callbacks_total",
+    "Callbacks that held the event loop longer than XYTE_SLOW_CALLBACK_SECONDS",
+)
+
+
+class _Monitor:
+    """Probe state of one event loop, shared with the watchdog thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float) -> None:
+        self.loop = loop
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.task: asyncio.Task[None] | None = None
+        # When the watchdog's pending ping was posted to the loop
+        self.ping_sent: float | None = None
+        self.reported = False
+
+    async def probe(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(time.monotonic() - due, 0.0))
+
+    def pong(self) -> None:
+        self.ping_sent = None
+        self.reported = False
+
+    def check(self, threshold: float) -> None:
+        """Ping the loop, or report it if the last ping is ``threshold`` overdue."""
+        if self.task is None or self.task.done() or not self.loop.is_running():
+            return
+        now = time.monotonic()
+        if self.ping_sent is None:
+            self.ping_sent = now
+            try:
+                self.loop.call_soon_threadsafe(self.pong)
+            except RuntimeError:  # loop closed meanwhile
+                pass
+            return
+        blocked = now - self.ping_sent
+        if self.reported or blocked <= threshold:
+            return
+        self.reported = True
+        SLOW_CALLBACKS.inc()
+        frame = sys._current_frames().get(self.thread_id)
+        task = asyncio.current_task(self.loop)
+        coro = task.get_coro() if task is not None else None
+        # Imported here to avoid a cycle: logging_utils uses LoopTimer
+        from .logging_utils import log_json
+
+        log_json(
+            logging.WARNING,
+            event="slow_callback",
+            blocked_ms=round(blocked * 1000),
+            task=task.get_name() if task is not None else None,
+            coroutine=getattr(coro, "__qualname__", None),
+            stack=traceback.format_stack(frame, limit=STACK_DEPTH) if frame else [],
+        )
+
+
+_monitors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Monitor]" = (
+    weakref.WeakKeyDictionary()
+)
+_watchdog: threading.Thread | None = None
+_watchdog_lock = threading.Lock()
+
+
+def _watch(threshold: float) -> None:
+    while True:
+        time.sleep(threshold / 4)
+        for monitor in list(_monitors.values()):
+            monitor.check(threshold)
+
+
+def _start_watchdog(threshold: float) -> None:
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = threading.Thread(
+                target=_watch, args=(threshold,), name="xyte-loop-watchdog", daemon=True
+            )
+            _watchdog.start()
+
+
+def ensure_started() -> None:
+    """Start monitoring the running loop if it is not monitored yet."""
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(loop)
+    if monitor is not None and monitor.task is not None and not monitor.task.done():
+        return
+    settings = get_settings()
+    monitor = _monitors[loop] = _Monitor(loop, settings.loop_lag_interval)
+    monitor.task = loop.create_task(monitor.probe())
+    if settings.slow_callback_seconds > 0:
+        _start_watchdog(settings.slow_callback_seconds)
+
+
+class LoopTimer:
+    """Await an awaitable and record how long its steps ran on the loop.
+
+    ``busy`` covers the awaitable's own task only; work it hands to other
+    tasks, threads or processes counts as waiting.
+    """
+
+    __slots__ = ("_steps", "busy")
+
+    def __init__(self, awaitable: Awaitable[T]) -> None:
+        self._steps = awaitable.__await__()
+        self.busy = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        steps = self._steps
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = steps.send(value)
+                else:
+                    yielded = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.busy += time.perf_counter() - start
+            try:
+                value = yield yielded
+                error = None
+            except BaseException as exc:  # delivered to the coroutine
+                value, error = None, exc
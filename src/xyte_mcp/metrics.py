@@ -0,0 +1,143 @@
+"""Prometheus exposition for single and multi-worker deployments.
+
+With one process, ``/metrics`` renders the default registry. When the HTTP
+server runs several workers (``XYTE_HTTP_WORKERS``), :func:`prepare_multiprocess`
+points ``PROMETHEUS_MULTIPROC_DIR`` at a shared directory before the workers
+start. Each worker then writes its counters, histograms and gauges to its own
+files there, and :func:`render` merges them with ``MultiProcessCollector``.
+Whichever worker serves the scrape reports totals for all of them.
+
+Collectors that read live in-process state, such as connection pools,
+concurrency limiters and circuit breakers, cannot be merged from files. They
+are registered with :func:`register_local` and report the state of the worker
+that serves the scrape.
+
+Label values that come from requests go through :class:`BoundedLabel`, so a
+flood of distinct values cannot grow the exposition without bound.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+# Label value standing in for values beyond a BoundedLabel's limit
+OVERFLOW = "__overflow__"
+# Files written for ``livesum``/``liveall`` gauges, named after the owning pid
+_LIVE_FILE = re.compile(r"^gauge_live\w+?_(\d+)\.db$")
+
+_local: list[Any] = []
+# (monotonic time, exposition) of the last render, reused within max_age
+_last: tuple[float, bytes] | None = None
+_render_lock = threading.Lock()
+
+
+def multiprocess_dir() -> str | None:
+    """Return the shared metrics directory, or ``None`` in single-process mode."""
+    return os.environ.get(MULTIPROC_ENV) or None
+
+
+def register_local(collector: Any) -> None:
+    """Register a collector that reports this process's in-memory state."""
+    REGISTRY.register(collector)
+    _local.append(collector)
+
+
+class BoundedLabel:
+    """Admit up to ``limit`` distinct values of a label.
+
+    Values already admitted pass through; new ones beyond the limit become
+    :data:`OVERFLOW`. The admitted set is per process and never shrinks, so
+    a series, once created, keeps receiving its samples.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: str) -> str:
+        if value in self._seen:
+            return value
+        with self._lock:
+            if len(self._seen) < self.limit:
+                self._seen.add(value)
+                return value
+        return OVERFLOW
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+def render(max_age: float = 0.0) -> bytes:
+    """Return the Prometheus text exposition for this deployment.
+
+    Args:
+        max_age: Reuse the previous exposition if it is at most this many
+            seconds old, so that several scrapers hitting the server within
+            one interval pay for a single collection.
+    """
+    global _last
+    if max_age <= 0:
+        return _collect()
+    with _render_lock:
+        now = time.monotonic()
+        if _last is None or now - _last[0] > max_age:
+            _last = (now, _collect())
+        return _last[1]
+
+
+def _collect() -> bytes:
+    if multiprocess_dir() is None:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _local:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def prepare_multiprocess(path: str) -> None:
+    """Point worker processes at ``path`` for metrics, clearing old files.
+
+    Must run in the parent before the workers are started, since
+    ``prometheus_client`` picks its storage when it is first imported.
+    """
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+    os.environ[MULTIPROC_ENV] = str(directory)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def reap_dead_workers(path: str) -> None:
+    """Drop live gauges left behind by workers that were killed."""
+    for file in Path(path).glob("gauge_live*.db"):
+        match = _LIVE_FILE.match(file.name)
+        if match and not _pid_alive(int(match.group(1))):
+            multiprocess.mark_process_dead(int(match.group(1)), path)
+
+
+if multiprocess_dir() is not None:
+    # Running as a worker: a recycled or killed predecessor may have left live
+    # gauges behind, and this worker's own must go when it exits.
+    reap_dead_workers(multiprocess_dir())  # type: ignore[arg-type]
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
@@ -1,7 +1,7 @@
 """Pydantic models used by server tools and resources."""
 
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 class ClaimDeviceRequest(BaseModel):
     """Request model for claiming a device."""
 
@@ -105,6 +105,39 @@ class SendCommandRequest(DeviceId, CommandRequest):
     pass
 
 
+class SendCommandBatchRequest(BaseModel):
+    """Parameters for queueing several commands in one call."""
+
+    commands: list[SendCommandRequest] = Field(
+        ..., min_length=1, max_length=500, description="Commands to queue"
+    )
+
+
+class SendCommandBulkRequest(CommandRequest):
+    """Parameters for sending one command to many devices."""
+
+    device_ids: Optional[list[str]] = Field(
+        None, min_length=1, max_length=500, description="Identifiers of the target devices"
+    )
+    query: Optional[str] = Field(
+        None,
+        description=(
+            "Select devices whose id, name, model, type, status or space contains "
+            "every word of this text (case-insensitive)"
+        ),
+    )
+    max_devices: int = Field(
+        100, ge=1, le=500, description="Refuse to run if more devices than this match"
+    )
+    dry_run: bool = Field(False, description="Resolve targets without sending")
+
+    @model_validator(mode="after")
+    def _one_selector(self) -> "SendCommandBulkRequest":
+        if (self.device_ids is None) == (self.query is None):
+            raise ValueError("Provide exactly one of device_ids or query")
+        return self
+
+
 class CancelCommandRequest(CommandId, CommandRequest):
     """Parameters for canceling a command."""
 
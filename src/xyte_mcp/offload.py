@@ -0,0 +1,145 @@
+"""Run CPU-heavy work on large payloads in a process pool.
+
+Filtering a large inventory or applying a ``transform_response`` hook to a
+big response would otherwise hold the event loop and stall every other
+session. Work on payloads above ``XYTE_OFFLOAD_MIN_ITEMS`` records or
+``XYTE_OFFLOAD_MIN_BYTES`` bytes goes to a pool of ``XYTE_OFFLOAD_WORKERS``
+processes. Smaller payloads, or all payloads when the pool size is 0, are
+processed inline.
+
+Inventories are pickled once per version. The client cache returns the same
+list object until it expires, so :func:`map_records` keeps the pickled
+snapshot for that object. Webhook events patch cached lists in place, so a
+snapshot is also tied to :func:`xyte_mcp.cache.version` and re-pickled once
+a patch has happened. Workers keep the decoded records, and later calls
+send only the snapshot key. The pickled snapshot is sent again only to a
+worker that has not seen it yet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Tuple, TypeVar
+
+from cachetools import LRUCache
+from prometheus_client import Counter
+
+from . import cache
+from .config import get_settings
+from .logging_utils import log_json
+
+T = TypeVar("T")
+
+# Inventory versions kept pickled in this process and decoded in each worker
+MAX_SNAPSHOTS = 16
+
+OFFLOADED = Counter(
+    "xyte_offload_tasks_total",
+    "Payloads processed in the offload process pool",
+    ["task"],
+)
+
+_pool: ProcessPoolExecutor | None = None
+# id(records) -> (records, cache version, key, pickled records); holding
+# ``records`` keeps the id valid
+_snapshots: LRUCache[int, Tuple[Any, int, str, bytes]] = LRUCache(maxsize=MAX_SNAPSHOTS)
+# Worker side: snapshot key -> decoded records
+_decoded: LRUCache[str, Any] = LRUCache(maxsize=MAX_SNAPSHOTS)
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    workers = get_settings().offload_workers
+    if workers <= 0:
+        return None
+    if _pool is None:
+        # Spawned workers do not inherit the event loop, sockets or locks
+        _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown() -> None:
+    """Stop the worker processes and drop cached snapshots."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    _snapshots.clear()
+
+
+def _snapshot(records: List[Any]) -> Tuple[str, bytes]:
+    version = cache.version()
+    entry = _snapshots.get(id(records))
+    if entry is None or entry[0] is not records or entry[1] != version:
+        blob = pickle.dumps(records, pickle.HIGHEST_PROTOCOL)
+        entry = (records, version, uuid.uuid4().hex, blob)
+        _snapshots[id(records)] = entry
+    return entry[2], entry[3]
+
+
+def _call_with_snapshot(
+    fn: Callable[..., T], key: str, blob: bytes | None, args: tuple
+) -> Tuple[bool, T | None]:
+    """Worker entry point: apply ``fn`` to the snapshot ``key``.
+
+    Returns ``(False, None)`` when the snapshot is not cached here and
+    ``blob`` was not sent.
+    """
+    records = _decoded.get(key)
+    if records is None:
+        if blob is None:
+            return False, None
+        records = _decoded[key] = pickle.loads(blob)
+    return True, fn(records, *args)
+
+
+async def _submit(pool: ProcessPoolExecutor, fn: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def _broken(task: str) -> None:
+    global _pool
+    log_json(logging.WARNING, event="offload_pool_broken", task=task)
+    _pool = None
+
+
+async def map_records(fn: Callable[..., T], records: List[Any], *args: Any) -> T:
+    """Return ``fn(records, *args)``, in the pool when ``records`` is large.
+
+    ``fn`` must be a module-level function so workers can import it.
+    """
+    pool = _get_pool()
+    if pool is None or len(records) < get_settings().offload_min_items:
+        return fn(records, *args)
+    task = fn.__name__
+    key, blob = _snapshot(records)
+    try:
+        hit, value = await _submit(pool, _call_with_snapshot, fn, key, None, args)
+        if not hit:
+            hit, value = await _submit(pool, _call_with_snapshot, fn, key, blob, args)
+    except BrokenProcessPool:
+        _broken(task)
+        return fn(records, *args)
+    OFFLOADED.labels(task=task).inc()
+    return value  # type: ignore[return-value]
+
+
+async def run(fn: Callable[..., T], *args: Any) -> T:
+    """Return ``fn(*args)`` computed in the pool, or inline if it is disabled."""
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    task = fn.__name__
+    try:
+        value = await _submit(pool, fn, *args)
+    except BrokenProcessPool:
+        _broken(task)
+        return fn(*args)
+    OFFLOADED.labels(task=task).inc()
+    return value
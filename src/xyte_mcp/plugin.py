@@ -7,7 +7,7 @@ import importlib.metadata
 import logging
 import os
 from typing import Iterable, List, Protocol, cast
-from .logging_utils import log_json
+from . import logging_utils
 
 PLUGIN_API_VERSION = "1.0"
 
@@ -59,7 +59,7 @@ def _load_from_paths(paths: Iterable[str]) -> None:
             candidate = cast(MCPPlugin, getattr(module, "plugin", module))
             register_plugin(candidate)
         except Exception as exc:  # pragma: no cover - plugin loading should not fail tests
-            log_json(logging.ERROR, event="plugin_load_error", plugin=path, error=str(exc))
+            logging_utils.log_json(logging.ERROR, event="plugin_load_error", plugin=path, error=str(exc))
 
 
 def _load_from_entrypoints() -> None:
@@ -75,9 +75,9 @@ def _load_from_entrypoints() -> None:
                 candidate = cast(MCPPlugin, getattr(ep.load(), "plugin", ep.load()))
                 register_plugin(candidate)
             except Exception as exc:  # pragma: no cover - don't break on plugin errors
-                log_json(logging.ERROR, event="plugin_entry_point_error", plugin=ep.name, error=str(exc))
+                logging_utils.log_json(logging.ERROR, event="plugin_entry_point_error", plugin=ep.name, error=str(exc))
     except Exception as exc:  # pragma: no cover - optional feature
-        log_json(logging.ERROR, event="plugin_discovery_error", error=str(exc))
+        logging_utils.log_json(logging.ERROR, event="plugin_discovery_error", error=str(exc))
 
 
 def load_plugins(force_reload: bool = False) -> None:
@@ -105,7 +105,7 @@ def fire_event(event: dict) -> None:
             try:
                 hook(event)
             except Exception as exc:
-                log_json(logging.ERROR, event="plugin_event_error", error=str(exc))
+                logging_utils.log_json(logging.ERROR, event="plugin_event_error", error=str(exc))
 
 
 def fire_log(message: str, level: int) -> None:
@@ -116,4 +116,4 @@ def fire_log(message: str, level: int) -> None:
             try:
                 hook(message, level)
             except Exception as exc:
-                log_json(logging.ERROR, event="plugin_log_error", error=str(exc))
\ No newline at end of file
+                logging_utils.log_json(logging.ERROR, event="plugin_log_error", error=str(exc))
\ No newline at end of file
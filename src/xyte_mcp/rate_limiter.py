@@ -1,18 +1,163 @@
-import os
+"""Per-tenant request limiting shared across processes through Redis.
+
+Each process keeps a small token bucket per API key and leases quota from
+the shared Redis window in chunks of ``XYTE_RATE_LIMIT_LEASE`` tokens, so
+most requests are admitted without a Redis round trip. When Redis cannot be
+reached the limiter falls back to a process-local window and retries Redis
+after ``REDIS_RETRY_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
 import importlib.resources
-from typing import Awaitable, cast
+import logging
+import os
+import time
+from typing import Any, Awaitable, cast
+
 import redis.asyncio as aioredis
+from cachetools import LRUCache
+from prometheus_client import Counter, Histogram
+from redis.exceptions import NoScriptError
+
+from .config import get_settings
+from .logging_utils import log_json
+
+WINDOW_SECONDS = 60
+REDIS_RETRY_SECONDS = 5.0
+# Upper bound on tenants tracked per process
+MAX_BUCKETS = 10_000
 
-redis_client: aioredis.Redis = aioredis.from_url(
-    os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LIMITER_LATENCY = Histogram(
+    "xyte_rate_limiter_seconds",
+    "Time spent deciding whether a request is within its rate limit",
+    ["path"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
 )
-lua = (importlib.resources.files("xyte_mcp") / "bucket.lua").read_text()
-SHA: Awaitable[str] = redis_client.script_load(lua)
+LEASE_REFILLS = Counter(
+    "xyte_rate_limiter_lease_refills_total",
+    "Quota leases requested from Redis",
+    ["result"],
+)
+
+_redis: aioredis.Redis | None = None
+_sha: str | None = None
+_redis_down_until = 0.0
+
+
+class _Bucket:
+    """Quota held locally for a single API key."""
+
+    __slots__ = ("tokens", "expires", "blocked_until", "window_start", "used", "lock")
+
+    def __init__(self) -> None:
+        self.tokens = 0
+        self.expires = 0.0
+        self.blocked_until = 0.0
+        # Process-local window used while Redis is unavailable
+        self.window_start = 0.0
+        self.used = 0
+        self.lock = asyncio.Lock()
+
+    def take(self, now: float) -> bool:
+        if self.tokens > 0 and now < self.expires:
+            self.tokens -= 1
+            return True
+        return False
+
+
+_buckets: LRUCache[str, _Bucket] = LRUCache(maxsize=MAX_BUCKETS)
+
+
+def _get_redis() -> aioredis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis
+
+
+def _bucket(key_id: str) -> _Bucket:
+    bucket = _buckets.get(key_id)
+    if bucket is None:
+        bucket = _buckets[key_id] = _Bucket()
+    return bucket
+
+
+async def _lease(key_id: str, limit: int, size: int) -> tuple[int, int]:
+    """Lease up to ``size`` tokens; return ``(granted, window_ttl_ms)``."""
+    global _sha
+    client = _get_redis()
+    if _sha is None:
+        lua = (importlib.resources.files("xyte_mcp") / "bucket.lua").read_text()
+        _sha = await client.script_load(lua)
+    args = (f"rl:{key_id}", str(limit), str(WINDOW_SECONDS), str(size))
+    try:
+        raw = await cast(Awaitable[Any], client.evalsha(_sha, 1, *args))
+    except NoScriptError:
+        # Redis was restarted or flushed; load the script again
+        _sha = None
+        return await _lease(key_id, limit, size)
+    granted, ttl_ms = raw
+    return int(granted), int(ttl_ms)
+
+
+def _consume_local(bucket: _Bucket, limit: int, now: float) -> bool:
+    if now - bucket.window_start >= WINDOW_SECONDS:
+        bucket.window_start = now
+        bucket.used = 0
+    if bucket.used >= limit:
+        return False
+    bucket.used += 1
+    return True
+
 
 async def consume(key_id: str, limit: int = 60) -> bool:
-    sha = await SHA
-    remain_raw = redis_client.evalsha(
-        sha, 1, f"rl:{key_id}", str(limit), "60"
-    )
-    count = await cast(Awaitable[int], remain_raw)
-    return count != 0
+    """Return ``True`` if ``key_id`` may make another request this minute."""
+    global _redis_down_until
+    start = time.perf_counter()
+    bucket = _bucket(key_id)
+    now = time.monotonic()
+    if now < bucket.blocked_until or bucket.take(now):
+        allowed = now >= bucket.blocked_until
+        LIMITER_LATENCY.labels("local").observe(time.perf_counter() - start)
+        return allowed
+
+    async with bucket.lock:
+        now = time.monotonic()
+        if now < bucket.blocked_until or bucket.take(now):
+            # Another request refilled the bucket while we waited
+            allowed = now >= bucket.blocked_until
+            LIMITER_LATENCY.labels("local").observe(time.perf_counter() - start)
+            return allowed
+        if now >= _redis_down_until:
+            size = min(get_settings().rate_limit_lease, limit)
+            try:
+                granted, ttl_ms = await _lease(key_id, limit, size)
+            except Exception as exc:
+                _redis_down_until = now + REDIS_RETRY_SECONDS
+                LEASE_REFILLS.labels("error").inc()
+                log_json(logging.WARNING, event="rate_limiter_redis_unavailable", error=str(exc))
+            else:
+                expires = now + (ttl_ms / 1000 if ttl_ms > 0 else WINDOW_SECONDS)
+                LEASE_REFILLS.labels("granted" if granted else "exhausted").inc()
+                if granted:
+                    bucket.tokens, bucket.expires = granted - 1, expires
+                else:
+                    # Answer locally until the shared window rolls over
+                    bucket.blocked_until = expires
+                LIMITER_LATENCY.labels("redis").observe(time.perf_counter() - start)
+                return bool(granted)
+
+        allowed = _consume_local(bucket, limit, now)
+        LIMITER_LATENCY.labels("fallback").observe(time.perf_counter() - start)
+        return allowed
+
+
+def reset() -> None:
+    """Forget all local quota and the cached Redis connection."""
+    global _redis, _sha, _redis_down_until
+    _buckets.clear()
+    _redis = None
+    _sha = None
+    _redis_down_until = 0.0
@@ -0,0 +1,136 @@
+"""Precomputed tool schemas loaded at startup.
+
+Registering a tool makes FastMCP build a Pydantic argument model and a JSON
+schema for it, and that is most of the cost of registering the server's
+tools. ``scripts/generate_registry.py`` records the schemas in
+``registry_snapshot.json``, together with a hash of the package sources and
+the ``mcp`` and ``pydantic`` versions. On startup a snapshot whose hash
+matches is used. Tools then take their schema from the snapshot, and their
+argument model is built on the first call. A stale or missing snapshot is
+ignored, and tools are registered the normal way.
+
+Installing the snapshot relies on FastMCP internals (``ToolManager.add_tool``
+and its ``_tools`` mapping). When the installed ``mcp`` release does not
+have them in the expected shape, or passes registration options this module
+does not know, tools are registered the normal way too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.tools import Tool
+from mcp.server.fastmcp.utilities.func_metadata import FuncMetadata, func_metadata
+from mcp.types import ToolAnnotations
+
+from .logging_utils import log_json
+
+SNAPSHOT_PATH = Path(__file__).with_name("registry_snapshot.json")
+_PACKAGE_ROOT = Path(__file__).parent
+# Libraries whose schema generation the snapshot stands in for
+_VERSIONED = ("mcp", "pydantic")
+# Tool fields a SnapshotTool is built with
+_TOOL_FIELDS = frozenset(
+    {"fn", "name", "description", "parameters", "fn_metadata", "is_async"}
+    | {"context_kwarg", "annotations"}
+)
+
+
+def source_hash() -> str:
+    """Hash the package sources and schema-relevant library versions."""
+    digest = hashlib.sha256()
+    for name in _VERSIONED:
+        digest.update(f"{name}=={importlib.metadata.version(name)}\n".encode())
+    for path in sorted(_PACKAGE_ROOT.rglob("*.py")):
+        digest.update(path.relative_to(_PACKAGE_ROOT).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> dict[str, Any] | None:
+    """Return the snapshot at ``path`` if it matches the current sources."""
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("hash") != source_hash():
+        log_json(logging.WARNING, event="registry_snapshot_stale", path=str(path))
+        return None
+    return snapshot
+
+
+def build_snapshot(server: FastMCP) -> dict[str, Any]:
+    """Record the schemas of every tool registered on ``server``."""
+    tools = {
+        tool.name: {"parameters": tool.parameters, "context_kwarg": tool.context_kwarg}
+        for tool in server._tool_manager.list_tools()
+    }
+    return {"hash": source_hash(), "tools": dict(sorted(tools.items()))}
+
+
+class SnapshotTool(Tool):
+    """Tool whose argument model is built on its first call."""
+
+    fn_metadata: FuncMetadata | None = None  # type: ignore[assignment]
+
+    async def run(self, arguments: dict[str, Any], context: Any = None) -> Any:
+        if self.fn_metadata is None:
+            skip = [self.context_kwarg] if self.context_kwarg is not None else []
+            self.fn_metadata = func_metadata(self.fn, skip_names=skip)
+        return await super().run(arguments, context)
+
+
+def _supported(server: FastMCP) -> bool:
+    """Return ``True`` if ``server`` has the internals :func:`install` hooks."""
+    manager = getattr(server, "_tool_manager", None)
+    return (
+        callable(getattr(manager, "add_tool", None))
+        and isinstance(getattr(manager, "_tools", None), dict)
+        and _TOOL_FIELDS <= set(Tool.model_fields)
+    )
+
+
+def install(server: FastMCP, snapshot: dict[str, Any]) -> None:
+    """Register tools on ``server`` from ``snapshot`` where it has an entry.
+
+    Does nothing when this ``mcp`` release lacks the hooked internals.
+    """
+    if not _supported(server):
+        log_json(logging.WARNING, event="registry_snapshot_unsupported")
+        return
+    manager = server._tool_manager
+    add_tool = manager.add_tool
+    entries = snapshot["tools"]
+
+    def add_snapshot_tool(
+        fn: Callable[..., Any],
+        name: str | None = None,
+        description: str | None = None,
+        annotations: ToolAnnotations | None = None,
+        **options: Any,
+    ) -> Tool:
+        entry = entries.get(name or fn.__name__)
+        # Options added by later mcp releases may change the schema
+        if entry is None or options:
+            return add_tool(
+                fn, name=name, description=description, annotations=annotations, **options
+            )
+        tool = SnapshotTool(
+            fn=fn,
+            name=name or fn.__name__,
+            description=description or fn.__doc__ or "",
+            parameters=entry["parameters"],
+            is_async=inspect.iscoroutinefunction(fn),
+            context_kwarg=entry["context_kwarg"],
+            annotations=annotations,
+        )
+        return manager._tools.setdefault(tool.name, tool)
+
+    manager.add_tool = add_snapshot_tool  # type: ignore[method-assign]
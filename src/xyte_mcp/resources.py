@@ -1,10 +1,18 @@
 """Resource handlers providing read-only data to MCP clients."""
 
 from typing import Any, Dict
+import asyncio
 import json
 
+from .config import get_settings
 from .deps import get_client
-from .utils import handle_api, validate_device_id, validate_ticket_id
+from .utils import (
+    MCPError,
+    enforce_rate_limit,
+    handle_api,
+    validate_device_id,
+    validate_ticket_id,
+)
 from .user import get_preferences
 
 
@@ -41,6 +49,65 @@ async def device_status(request: Optional[Request], device_id: str) -> Dict[str,
         return await handle_api("get_device", client.get_device(device_id))
 
 
+# Largest number of devices accepted by a single status lookup
+MAX_STATUS_DEVICES = 200
+
+
+async def devices_status(
+    request: Optional[Request], device_ids: list[str]
+) -> Dict[str, Any]:
+    """Return status for several devices in one call.
+
+    Duplicate ids are collapsed, cached devices are served without an API
+    call and the rest are fetched concurrently over a single client. Each
+    fetch counts against the tenant's rate limit, like a single
+    ``get_device`` call; a call served entirely from the cache counts once.
+    Devices that fail, including those over the limit, are reported under
+    ``errors`` instead of failing the call.
+    """
+    ids = list(dict.fromkeys(validate_device_id(str(d)) for d in device_ids))
+    if not ids:
+        raise MCPError(code="invalid_params", message="device_ids must not be empty")
+    if len(ids) > MAX_STATUS_DEVICES:
+        raise MCPError(
+            code="invalid_params",
+            message=f"At most {MAX_STATUS_DEVICES} devices can be queried at once",
+        )
+
+    devices: Dict[str, Any] = {}
+    errors: Dict[str, Dict[str, str]] = {}
+    async with get_client(request) as client:
+        cached = [d for d in ids if f"device:{d}" in client.cache]
+        if len(cached) == len(ids):
+            enforce_rate_limit()
+        semaphore = asyncio.Semaphore(get_settings().batch_concurrency)
+
+        async def fetch(device_id: str) -> None:
+            async with semaphore:
+                try:
+                    if device_id not in cached:
+                        # Checked before the call is created, so none is left unawaited
+                        enforce_rate_limit()
+                    devices[device_id] = await handle_api(
+                        "get_device", client.get_device(device_id), rate_limit=False
+                    )
+                except MCPError as exc:
+                    errors[device_id] = {"code": exc.code, "message": str(exc)}
+
+        await asyncio.gather(*(fetch(d) for d in ids))
+
+    return {
+        "devices": {d: devices[d] for d in ids if d in devices},
+        "errors": errors,
+        "summary": {
+            "requested": len(ids),
+            "cached": len(cached),
+            "fetched": len(devices) - len(cached),
+            "failed": len(errors),
+        },
+    }
+
+
 async def device_logs(request: Optional[Request], device_id: str) -> Dict[str, Any]:
     """Return recent logs for a device (sample resource)."""
     device_id = validate_device_id(device_id)
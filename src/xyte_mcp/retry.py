@@ -0,0 +1,130 @@
+"""Retry policy for calls to the Xyte API.
+
+A call is retried only when doing so is safe and worthwhile:
+
+* idempotent methods are retried on network errors, timeouts and
+  429/502/503/504 responses;
+* other methods (``POST``, ``PATCH``) are retried only when the request
+  provably never reached the server (connection failures and pool timeouts);
+* calls turned away by a full concurrency queue are never retried;
+* every retry is paid for from a per-tenant budget that earns
+  ``XYTE_RETRY_BUDGET_RATIO`` tokens per request, which caps retry
+  amplification when the upstream browns out;
+* delays use full-jitter exponential backoff, respect ``Retry-After`` and
+  are abandoned when they would overrun the caller's deadline.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+import httpx
+from cachetools import LRUCache
+from prometheus_client import Counter
+
+from .concurrency import UpstreamBusy
+from .config import get_settings
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Failures raised before any bytes of the request were sent
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+BASE_DELAY = 0.1
+MAX_DELAY = 2.0
+# Longest wait, including Retry-After, before a retry is abandoned
+MAX_RETRY_WAIT = 10.0
+# Retries always available per second, so low-traffic tenants can still retry
+MIN_RETRIES_PER_SECOND = 1.0
+# Upper bound on tenants whose budget is tracked per process
+MAX_BUDGETS = 10_000
+
+RETRIES = Counter(
+    "xyte_upstream_retries_total",
+    "Retried calls to the Xyte API",
+    ["endpoint", "reason"],
+)
+RETRIES_DENIED = Counter(
+    "xyte_upstream_retries_denied_total",
+    "Retries skipped because the tenant's retry budget was exhausted",
+    ["endpoint"],
+)
+
+
+def is_retryable(
+    method: str, exc: Exception | None = None, status: int | None = None
+) -> bool:
+    """Return ``True`` if a failed attempt may safely be repeated."""
+    if isinstance(exc, UpstreamBusy):
+        return False
+    if exc is not None and isinstance(exc, UNSENT_ERRORS):
+        return True
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return False
+    if exc is not None:
+        return isinstance(exc, (httpx.NetworkError, httpx.TimeoutException))
+    return status in RETRY_STATUSES
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Full-jitter delay before retry number ``attempt`` (starting at 1)."""
+    delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of requests.
+
+    Args:
+        ratio: Tokens earned per request; one token pays for one retry.
+        min_per_second: Tokens earned per second regardless of traffic.
+        capacity: Maximum tokens that can be saved up.
+    """
+
+    def __init__(
+        self,
+        ratio: float,
+        min_per_second: float = MIN_RETRIES_PER_SECOND,
+        capacity: float = 10.0,
+    ) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.balance = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, tokens: float) -> None:
+        now = time.monotonic()
+        tokens += (now - self._updated) * self.min_per_second
+        self._updated = now
+        self.balance = min(self.capacity, self.balance + tokens)
+
+    def record_request(self) -> None:
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry, returning ``False`` if the budget is empty."""
+        self._refill(0.0)
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+_budgets: LRUCache[str, RetryBudget] = LRUCache(maxsize=MAX_BUDGETS)
+
+
+def get_budget(tenant: str) -> RetryBudget:
+    """Return the retry budget shared by all calls made for ``tenant``."""
+    budget = _budgets.get(tenant)
+    if budget is None:
+        budget = _budgets[tenant] = RetryBudget(get_settings().retry_budget_ratio)
+    return budget
+
+
+def reset() -> None:
+    """Drop all retry budgets."""
+    _budgets.clear()
@@ -1,20 +1,25 @@
 """MCP server for Xyte Organization API."""
 
 import logging
+import signal
 import sys
 import os
 import json
-from typing import Any, Dict, TYPE_CHECKING
+import threading
+from contextlib import asynccontextmanager
+from types import FrameType
+from typing import Any, AsyncIterator, Dict, TYPE_CHECKING
 import inspect
 from starlette.applications import Starlette
 from xyte_mcp.auth_xyte import RequireXyteKey
+from xyte_mcp.gateway import is_admin
 
 # Fix import paths for mcp dev
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 # Import everything using absolute imports
 import xyte_mcp.plugin as plugin
-from xyte_mcp.config import get_settings, validate_settings
+from xyte_mcp.config import get_settings, reload_settings, validate_settings
 from xyte_mcp.events import push_event, pull_event
 from mcp.server.fastmcp.server import Context
 from xyte_mcp.logging_utils import instrument, request_var
@@ -22,8 +27,13 @@ import xyte_mcp.resources as resources
 import xyte_mcp.tools as tools
 import xyte_mcp.tasks as tasks
 import xyte_mcp.prompts as prompts
+import xyte_mcp.registry as registry
+import xyte_mcp.inventory as inventory
+import xyte_mcp.offload as offload
+from xyte_mcp.task_backend import get_backend
+from xyte_mcp.metrics import render as render_metrics
 
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 
@@ -89,6 +99,12 @@ mcp = FastMCP(
     instructions="Live Xyte API (devices/tickets/incidents). Use search tool. ALWAYS start queries with type:<devices|tickets|incidents>."
 )
 
+# Reuse tool schemas generated by scripts/generate_registry.py when current
+if get_settings().registry_snapshot:
+    _snapshot = registry.load_snapshot()
+    if _snapshot is not None:
+        registry.install(mcp, _snapshot)
+
 
 @mcp.custom_route("/healthz", methods=["GET"])
 async def health(_: Request) -> Response:
@@ -105,23 +121,62 @@ async def ready(_: Request) -> Response:
 @mcp.custom_route("/metrics", methods=["GET"])
 async def metrics(_: Request) -> Response:
     """Expose Prometheus metrics."""
-    data = generate_latest()
+    data = render_metrics(get_settings().metrics_cache_seconds)
     return Response(data, media_type=CONTENT_TYPE_LATEST)
 
 
+def _is_operator(request: Request) -> bool:
+    """Return ``True`` if ``request`` may read the operator endpoints.
+
+    ``X-Admin-Token`` matching ``XYTE_ADMIN_TOKEN`` is accepted in every
+    mode; in single-tenant mode the server's own API key is accepted too.
+    """
+    if is_admin(request.headers):
+        return True
+    settings = get_settings()
+    api_key = request.headers.get("Authorization") or request.headers.get("X-API-Key")
+    return not settings.multi_tenant and api_key == settings.xyte_api_key
+
+
 @mcp.custom_route("/config", methods=["GET"])
 async def config_endpoint(request: Request) -> JSONResponse:
     """Return sanitized configuration for debugging purposes."""
-    settings = get_settings()
-    api_key = request.headers.get("Authorization") or request.headers.get("X-API-Key")
-    if settings.multi_tenant or api_key != settings.xyte_api_key:
+    if not _is_operator(request):
         return JSONResponse({"error": "unauthorized"}, status_code=401)
 
-    cfg = settings.model_dump()
+    cfg = get_settings().model_dump()
     cfg["xyte_api_key"] = "***"
+    if cfg["admin_token"]:
+        cfg["admin_token"] = "***"
     return JSONResponse({"config": cfg})
 
 
+@mcp.custom_route("/debug/slow", methods=["GET"])
+async def slow_traces_endpoint(request: Request) -> JSONResponse:
+    """Return the slowest recent traces kept in memory."""
+    if not _is_operator(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+
+    from .tracing import slow_traces
+
+    return JSONResponse({"traces": slow_traces()})
+
+
+@mcp.custom_route("/usage", methods=["GET"])
+async def usage_endpoint(request: Request) -> JSONResponse:
+    """Return the tenants with the most usage of each measure."""
+    if not _is_operator(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    try:
+        limit = int(request.query_params.get("limit", "10"))
+    except ValueError:
+        return JSONResponse({"error": "invalid_limit"}, status_code=400)
+
+    from . import usage
+
+    return JSONResponse({"top": usage.top(max(limit, 0))})
+
+
 @mcp.custom_route("/webhook", methods=["POST"])
 async def webhook(req: Request) -> JSONResponse:
     """Receive external events and enqueue them for streaming."""
@@ -205,6 +260,10 @@ async def _device_status_wrapper(device_id: str) -> Dict[str, Any]:
     return await resources.device_status(_req(), device_id)
 
 
+async def _devices_status_wrapper(device_ids: str) -> Dict[str, Any]:
+    return await resources.devices_status(_req(), device_ids.split(","))
+
+
 
 
 async def _organization_info_wrapper(device_id: str) -> Dict[str, Any]:
@@ -247,6 +306,10 @@ mcp.resource(
     "device://{device_id}/status",
     description="Current status of a device",
 )(instrument("resource", "device_status")(_device_status_wrapper))
+mcp.resource(
+    "devices://status/{device_ids}",
+    description="Current status of several devices (comma-separated ids)",
+)(instrument("resource", "devices_status")(_devices_status_wrapper))
 if get_settings().enable_experimental_apis:
     async def _device_logs_wrapper(device_id: str) -> Dict[str, Any]:
         return await resources.device_logs(_req(), device_id)
@@ -296,6 +359,10 @@ mcp.tool(
     description="Send a command to a device",
         annotations=ToolAnnotations(readOnlyHint=False, destructiveHint=True),
     )(instrument("tool", "send_command")(tools.send_command))
+mcp.tool(
+    description="Send one command to many devices (explicit ids or a search query)",
+        annotations=ToolAnnotations(readOnlyHint=False, destructiveHint=True),
+    )(instrument("tool", "send_command_bulk")(tools.send_command_bulk))
 mcp.tool(
     description="Cancel a previously sent command",
         annotations=ToolAnnotations(readOnlyHint=False, destructiveHint=False),
@@ -457,36 +524,7 @@ async def search(ctx: Context, query: str) -> Dict[str, Any]:
         _search_cache.clear()
         
         # Parse query DSL
-        tokens = query.split()
-        filters = {}
-        resource_type = None
-        free_text = None
-        
-        for token in tokens:
-            if ':' in token:
-                parts = token.split(':', 2)
-                if len(parts) >= 2:
-                    key = parts[0]
-                    op = 'eq'
-                    value = parts[1]
-                    
-                    # Handle operator
-                    if len(parts) == 3:
-                        op = parts[1]
-                        value = parts[2]
-                    
-                    # Remove quotes if present
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    elif value.startswith("'") and value.endswith("'"):
-                        value = value[1:-1]
-                    
-                    if key == 'type':
-                        resource_type = value.lower()
-                    elif key in ['q', 'query']:
-                        free_text = value.lower()
-                    else:
-                        filters[key] = {'op': op, 'value': value.lower()}
+        resource_type, free_text, filters = inventory.parse_query(query)
         
         # Validate resource type
         if not resource_type:
@@ -513,212 +551,23 @@ async def search(ctx: Context, query: str) -> Dict[str, Any]:
                 }]
             }
         
-        # Search devices
-        if resource_type in ['all', 'devices']:
-            devices = await resources.list_devices(_req())
-            logger.info(f"[SEARCH] Devices API response: {json.dumps(devices, default=str)[:500]}")
-            
-            # Handle both wrapped and unwrapped responses
-            device_list = []
-            if isinstance(devices, dict):
-                if "items" in devices:
-                    device_list = devices["items"]
-                elif "devices" in devices:
-                    device_list = devices["devices"]
-                elif "data" in devices:
-                    # Check if data contains devices
-                    if isinstance(devices["data"], list):
-                        device_list = devices["data"]
-                    elif isinstance(devices["data"], dict) and "devices" in devices["data"]:
-                        device_list = devices["data"]["devices"]
-                    elif isinstance(devices["data"], dict) and "items" in devices["data"]:
-                        device_list = devices["data"]["items"]
-                elif isinstance(devices.get("data"), list):
-                    device_list = devices["data"]
-            elif isinstance(devices, list):
-                device_list = devices
-            
-            logger.info(f"[SEARCH] Processing {len(device_list)} devices")
-            
-            for device in device_list:
-                    # Apply filters
-                    match = True
-                    
-                    # Free text search
-                    if free_text:
-                        searchable_text = " ".join([
-                            str(device.get("id", "")),
-                            str(device.get("name", "")),
-                            str(device.get("model", "")),
-                            str(device.get("serial_number", "")),
-                        ]).lower()
-                        if free_text not in searchable_text:
-                            match = False
-                    
-                    # Apply specific filters
-                    for field, filter_info in filters.items():
-                        field_value = str(device.get(field, "")).lower()
-                        filter_value = filter_info['value']
-                        op = filter_info['op']
-                        
-                        if op == 'eq' and field_value != filter_value:
-                            match = False
-                        elif op == 'neq' and field_value == filter_value:
-                            match = False
-                        elif op == 'contains' and filter_value not in field_value:
-                            match = False
-                    
-                    if match:
-                        result_id = f"device_{device.get('id')}"
-                        _search_cache[result_id] = device
-                        results.append({
-                            "id": result_id,
-                            "title": f"Device: {device.get('name', 'Unknown')}",
-                            "text": f"Model: {device.get('model', 'N/A')}, Serial: {device.get('serial_number', 'N/A')}, Status: {device.get('status', 'Unknown')}",
-                            "url": f"/devices/{device.get('id')}" if device.get('id') else None
-                        })
-        
-        # Search tickets
-        if resource_type in ['all', 'tickets']:
-            tickets = await resources.list_tickets(_req())
-            logger.info(f"[SEARCH] Tickets API response: {json.dumps(tickets, default=str)[:500]}")
-            
-            # Handle both wrapped and unwrapped responses
-            ticket_list = []
-            if isinstance(tickets, dict):
-                if "items" in tickets:
-                    ticket_list = tickets["items"]
-                elif "tickets" in tickets:
-                    ticket_list = tickets["tickets"]
-                elif "data" in tickets:
-                    # Check if data contains tickets
-                    if isinstance(tickets["data"], list):
-                        ticket_list = tickets["data"]
-                    elif isinstance(tickets["data"], dict) and "tickets" in tickets["data"]:
-                        ticket_list = tickets["data"]["tickets"]
-                    elif isinstance(tickets["data"], dict) and "items" in tickets["data"]:
-                        ticket_list = tickets["data"]["items"]
-                elif isinstance(tickets.get("data"), list):
-                    ticket_list = tickets["data"]
-            elif isinstance(tickets, list):
-                ticket_list = tickets
-            
-            logger.info(f"[SEARCH] Processing {len(ticket_list)} tickets")
-            
-            for ticket in ticket_list:
-                    match = True
-                    
-                    if free_text:
-                        searchable_text = " ".join([
-                            str(ticket.get("id", "")),
-                            str(ticket.get("title", "")),
-                            str(ticket.get("description", "")),
-                        ]).lower()
-                        if free_text not in searchable_text:
-                            match = False
-                    
-                    for field, filter_info in filters.items():
-                        field_value = str(ticket.get(field, "")).lower()
-                        filter_value = filter_info['value']
-                        op = filter_info['op']
-                        
-                        if op == 'eq' and field_value != filter_value:
-                            match = False
-                        elif op == 'neq' and field_value == filter_value:
-                            match = False
-                        elif op == 'contains' and filter_value not in field_value:
-                            match = False
-                    
-                    if match:
-                        result_id = f"ticket_{ticket.get('id')}"
-                        _search_cache[result_id] = ticket
-                        results.append({
-                            "id": result_id,
-                            "title": f"Ticket: {ticket.get('title', 'Unknown')}",
-                            "text": f"Status: {ticket.get('status', 'N/A')}, Priority: {ticket.get('priority', 'N/A')}, Description: {ticket.get('description', 'No description')[:100]}...",
-                            "url": f"/tickets/{ticket.get('id')}" if ticket.get('id') else None
-                        })
-        
-        # Search incidents
-        if resource_type in ['all', 'incidents']:
-            incidents = await resources.list_incidents(_req())
-            logger.info(f"[SEARCH] Incidents API response: {json.dumps(incidents, default=str)[:500]}")
-            
-            # Handle both wrapped and unwrapped responses
-            incident_list = []
-            if isinstance(incidents, dict):
-                logger.info(f"[SEARCH DEBUG] incidents is dict with keys: {list(incidents.keys())}")
-                if "items" in incidents:
-                    incident_list = incidents["items"]
-                    logger.info(f"[SEARCH DEBUG] Found 'items' key, extracted {len(incident_list)} incidents")
-                elif "incidents" in incidents:
-                    incident_list = incidents["incidents"]
-                    logger.info(f"[SEARCH DEBUG] Found 'incidents' key, extracted {len(incident_list)} incidents")
-                elif "data" in incidents:
-                    # Check if data contains incidents
-                    if isinstance(incidents["data"], list):
-                        incident_list = incidents["data"]
-                        logger.info(f"[SEARCH DEBUG] Found 'data' key with list, extracted {len(incident_list)} incidents")
-                    elif isinstance(incidents["data"], dict) and "incidents" in incidents["data"]:
-                        incident_list = incidents["data"]["incidents"]
-                        logger.info(f"[SEARCH DEBUG] Found 'data.incidents' key, extracted {len(incident_list)} incidents")
-                    elif isinstance(incidents["data"], dict) and "items" in incidents["data"]:
-                        incident_list = incidents["data"]["items"]
-                        logger.info(f"[SEARCH DEBUG] Found 'data.items' key, extracted {len(incident_list)} incidents")
-                elif isinstance(incidents.get("data"), list):
-                    incident_list = incidents["data"]
-                    logger.info(f"[SEARCH DEBUG] Found 'data' key with list (via get), extracted {len(incident_list)} incidents")
-                else:
-                    logger.warning(f"[SEARCH DEBUG] Dict but no recognized keys. Keys: {list(incidents.keys())}")
-            elif isinstance(incidents, list):
-                incident_list = incidents
-                logger.info(f"[SEARCH DEBUG] incidents is a list, extracted {len(incident_list)} incidents")
-            else:
-                logger.warning(f"[SEARCH DEBUG] incidents is neither dict nor list: {type(incidents)}")
-            
-            logger.info(f"[SEARCH] Processing {len(incident_list)} incidents")
-            
-            for idx, incident in enumerate(incident_list):
-                    logger.info(f"[SEARCH DEBUG] Processing incident {idx}: {json.dumps(incident, default=str)[:200]}")
-                    match = True
-                    
-                    if free_text:
-                        # Use uuid instead of id for incidents
-                        searchable_text = " ".join([
-                            str(incident.get("uuid", "")),
-                            str(incident.get("id", "")),
-                            str(incident.get("title", "")),
-                            str(incident.get("description", "")),
-                        ]).lower()
-                        if free_text not in searchable_text:
-                            match = False
-                    
-                    for field, filter_info in filters.items():
-                        field_value = str(incident.get(field, "")).lower()
-                        filter_value = filter_info['value']
-                        op = filter_info['op']
-                        
-                        if op == 'eq' and field_value != filter_value:
-                            match = False
-                        elif op == 'neq' and field_value == filter_value:
-                            match = False
-                        elif op == 'contains' and filter_value not in field_value:
-                            match = False
-                    
-                    if match:
-                        # Use uuid as the identifier for incidents
-                        incident_id = incident.get('uuid') or incident.get('id') or f"unknown_{idx}"
-                        result_id = f"incident_{incident_id}"
-                        _search_cache[result_id] = incident
-                        logger.info(f"[SEARCH DEBUG] Adding incident to results: {result_id}")
-                        # Handle None description properly
-                        description = incident.get('description') or 'No description'
-                        results.append({
-                            "id": result_id,
-                            "title": f"Incident: {incident.get('title', 'Unknown')}",
-                            "text": f"Priority: {incident.get('priority', 'N/A')}, Status: {incident.get('status', 'N/A')}, Description: {description[:100]}...",
-                            "url": f"/incidents/{incident_id}"
-                        })
+        # Large inventories are filtered in the offload pool (see xyte_mcp.offload)
+        sources = {
+            "devices": resources.list_devices,
+            "tickets": resources.list_tickets,
+            "incidents": resources.list_incidents,
+        }
+        for kind, list_records in sources.items():
+            if resource_type not in ['all', kind]:
+                continue
+            records = inventory.extract_records(kind, await list_records(_req()))
+            logger.info(f"[SEARCH] Processing {len(records)} {kind}")
+            matches = await offload.map_records(
+                inventory.match_records, records, kind, free_text, filters
+            )
+            for idx, result_id, result in matches:
+                _search_cache[result_id] = records[idx]
+                results.append(result)
         
         # Return full results for ChatGPT deep research
         logger.info(f"[SEARCH] Returning {len(results)} results")
@@ -844,6 +693,10 @@ async def get_device_status_tool(ctx: Context, device_id: str) -> Dict[str, Any]
     """Get current status of a specific device."""
     return await resources.device_status(_req(), device_id)
 
+async def get_devices_status_tool(ctx: Context, device_ids: list[str]) -> Dict[str, Any]:
+    """Get current status of several devices in one call."""
+    return await resources.devices_status(_req(), device_ids)
+
 async def get_device_commands_tool(ctx: Context, device_id: str) -> Dict[str, Any]:
     """Get commands issued to a specific device."""
     return await resources.list_device_commands(_req(), device_id)
@@ -868,6 +721,10 @@ mcp.tool(
     description="Get device status by ID",
     annotations=ToolAnnotations(readOnlyHint=True),
 )(instrument("tool", "get_device_status")(get_device_status_tool))
+mcp.tool(
+    description="Get status for many devices at once; failures are reported per device",
+    annotations=ToolAnnotations(readOnlyHint=True),
+)(instrument("tool", "get_devices_status")(get_devices_status_tool))
 mcp.tool(
     description="Get device command history",
     annotations=ToolAnnotations(readOnlyHint=True),
@@ -884,13 +741,37 @@ mcp.tool(
     description="Get status of an asynchronous task",
     annotations=ToolAnnotations(readOnlyHint=True),
 )(tasks.get_task_status)
+mcp.tool(
+    description="Send commands to many devices asynchronously as one batch",
+    annotations=ToolAnnotations(readOnlyHint=False, destructiveHint=True),
+)(tasks.send_command_batch)
+mcp.tool(
+    description="Get aggregated status of a command batch",
+    annotations=ToolAnnotations(readOnlyHint=True),
+)(tasks.get_batch_status)
 
 
 @mcp.custom_route("/task/{task_id}", methods=["GET"])
 async def task_status(request: Request) -> JSONResponse:
-    """Expose async task status via HTTP."""
+    """Expose async task status via HTTP.
+
+    ``?wait=<seconds>`` turns the call into a long-poll that returns as soon
+    as the task finishes.
+    """
     tid = request.path_params.get("task_id", "")
-    result = await tasks.get_task_status(tid)
+    try:
+        wait = float(request.query_params.get("wait", 0))
+    except ValueError:
+        return JSONResponse({"error": "invalid_wait"}, status_code=400)
+    result = await tasks.read_task_status(tid, wait=wait)
+    return JSONResponse(result)
+
+
+@mcp.custom_route("/batch/{batch_id}", methods=["GET"])
+async def batch_status(request: Request) -> JSONResponse:
+    """Expose aggregated batch status via HTTP."""
+    bid = request.path_params.get("batch_id", "")
+    result = await tasks.get_batch_status(bid)
     return JSONResponse(result)
 
 
@@ -914,10 +795,54 @@ mcp.prompt()(prompts.proactive_projector_maintenance_check)
 mcp.prompt()(prompts.troubleshoot_offline_device_workflow)
 
 
+_reload_handler_installed = False
+
+
+def _setup_reload() -> None:
+    """Install a SIGHUP handler that reloads configuration and plugins."""
+    global _reload_handler_installed
+    if _reload_handler_installed or threading.current_thread() is not threading.main_thread():
+        return
+
+    def handler(_sig: int, _frame: FrameType | None) -> None:
+        reload_settings()
+        plugin.reload_plugins()
+
+    signal.signal(signal.SIGHUP, handler)
+    _reload_handler_installed = True
+
+
+@asynccontextmanager
+async def lifespan() -> AsyncIterator[None]:
+    """Run the server's background services while it is up.
+
+    With async tasks enabled the task backend starts here, so the local
+    backend resumes tasks left unfinished by a previous process at startup.
+    The offload process pool is stopped on the way out.
+    """
+    backend = get_backend() if get_settings().enable_async_tasks else None
+    if backend is not None:
+        await backend.start()
+    try:
+        yield
+    finally:
+        if backend is not None:
+            await backend.stop()
+        offload.shutdown()
+
+
+async def _run_stdio(server: Any) -> None:
+    async with lifespan():
+        await server.run_stdio_async()
+
+
 def get_server() -> Any:
     """Get the MCP server instance."""
     settings = get_settings()
     validate_settings(settings)
+    _setup_reload()
+    # Registers its payload transform in every mode
+    from .plugins import sample  # noqa: F401
 
     # Check if we're in ChatGPT mode
     CHATGPT_MODE = os.environ.get("CHATGPT_MODE", "false").lower() == "true"
@@ -948,6 +873,8 @@ def get_server() -> Any:
         chatgpt_mcp.custom_route("/readyz", methods=["GET"])(ready)
         chatgpt_mcp.custom_route("/metrics", methods=["GET"])(metrics)
         chatgpt_mcp.custom_route("/config", methods=["GET"])(config_endpoint)
+        chatgpt_mcp.custom_route("/debug/slow", methods=["GET"])(slow_traces_endpoint)
+        chatgpt_mcp.custom_route("/usage", methods=["GET"])(usage_endpoint)
         chatgpt_mcp.custom_route("/webhook", methods=["POST"])(webhook)
         chatgpt_mcp.custom_route("/events", methods=["GET"])(stream_events)
         chatgpt_mcp.custom_route("/tools", methods=["GET"])(list_tools)
@@ -980,7 +907,9 @@ def main() -> None:
         server = get_server()
         # Restore stdout only for MCP protocol
         sys.stdout = original_stdout
-        server.run(transport="stdio")
+        import anyio
+
+        anyio.run(_run_stdio, server)
     except Exception as e:
         sys.stderr.write(f"Server error: {e}\n")
         sys.exit(1)
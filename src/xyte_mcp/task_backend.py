@@ -0,0 +1,230 @@
+"""Pluggable execution backends for asynchronous tasks.
+
+``XYTE_TASK_BACKEND=celery`` (the default) hands tasks to the Celery worker
+through Redis. ``XYTE_TASK_BACKEND=local`` runs them inside the server
+process on a bounded pool of asyncio workers fed by a priority queue, which
+suits single-node deployments and tests that should not need external
+services. Both backends persist state through the ``Task`` model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict, Protocol
+
+from .config import get_settings
+from .logging_utils import log_json
+
+# Statuses of tasks that were accepted but never finished
+PENDING_STATUSES = ("queued", "running")
+
+
+class TaskBackend(Protocol):
+    """Interface implemented by task execution backends."""
+
+    async def start(self) -> None:
+        ...
+
+    async def stop(self) -> None:
+        ...
+
+    def lease(self) -> Dict[str, Any]:
+        ...
+
+    async def submit(
+        self, task_id: str, payload: Dict[str, Any], xyte_key: str, priority: int = 0
+    ) -> None:
+        ...
+
+
+class CeleryBackend:
+    """Dispatch tasks to the Celery ``long`` queue."""
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    def lease(self) -> Dict[str, Any]:
+        """Celery redelivers unacknowledged tasks itself; no lease is kept."""
+        return {}
+
+    async def submit(
+        self, task_id: str, payload: Dict[str, Any], xyte_key: str, priority: int = 0
+    ) -> None:
+        from .worker.long import send_command_long
+
+        send_command_long.delay(task_id, payload, xyte_key)
+
+
+class LocalBackend:
+    """Run tasks on in-process asyncio workers.
+
+    Each task row records the process running it (``owner``) and holds a
+    lease that this process renews while the task is unfinished. Another
+    process, or this one after a restart, takes over a task only once its
+    lease has lapsed, claiming the row with a single conditional ``UPDATE``
+    so that exactly one of them runs it again.
+
+    Args:
+        workers: Number of tasks executed concurrently.
+        queue_size: Maximum number of tasks waiting for a worker.
+        lease_seconds: How long a task stays claimed without a renewal.
+    """
+
+    def __init__(
+        self, workers: int = 4, queue_size: int = 1000, lease_seconds: float = 60.0
+    ) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: asyncio.PriorityQueue[tuple[int, int, str, Dict[str, Any], str]] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._seq = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._starting: asyncio.Lock | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and self._loop is asyncio.get_running_loop()
+
+    async def start(self) -> None:
+        """Start the worker pool and take over tasks left by stopped processes."""
+        loop = asyncio.get_running_loop()
+        if self._starting is None or self._loop is not loop:
+            self._starting = asyncio.Lock()
+            self._tasks = []
+            self._loop = loop
+        async with self._starting:
+            if self._tasks:
+                return
+            from .db import init_db
+
+            self._queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+            await init_db()
+            await self._resume()
+            self._tasks = [
+                loop.create_task(self._worker(), name=f"xyte-task-worker-{i}")
+                for i in range(self.workers)
+            ]
+            self._tasks.append(loop.create_task(self._maintain(), name="xyte-task-leases"))
+
+    async def stop(self) -> None:
+        """Cancel the workers and release their tasks to the next process."""
+        from .tasks import release_leases
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await release_leases(self.owner, PENDING_STATUSES)
+        except Exception as exc:  # pragma: no cover - leases then expire on their own
+            log_json(logging.WARNING, event="task_release_error", error=str(exc))
+
+    def lease(self) -> Dict[str, Any]:
+        """Return the ownership fields to store with a task submitted here."""
+        return {"owner": self.owner, "lease_expires": time.time() + self.lease_seconds}
+
+    async def submit(
+        self, task_id: str, payload: Dict[str, Any], xyte_key: str, priority: int = 0
+    ) -> None:
+        from .utils import MCPError
+
+        if not self.running:
+            raise MCPError(code="task_backend_stopped", message="Task workers are not running")
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait((priority, next(self._seq), task_id, payload, xyte_key))
+        except asyncio.QueueFull:
+            raise MCPError(code="queue_full", message="Task queue is full, retry later")
+
+    async def join(self) -> None:
+        """Wait until every queued task has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _maintain(self) -> None:
+        from .tasks import renew_leases
+
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await renew_leases(
+                    self.owner, time.time() + self.lease_seconds, PENDING_STATUSES
+                )
+                await self._resume()
+            except Exception as exc:
+                log_json(logging.WARNING, event="task_lease_error", error=str(exc))
+
+    async def _resume(self) -> None:
+        from .tasks import Task, claim, fetch_pending, save
+        from .tenant import tenant_key
+
+        assert self._queue is not None
+        key = get_settings().xyte_api_key
+        now = time.time()
+        for task in await fetch_pending(PENDING_STATUSES, lease_expired_at=now):
+            if self._queue.full():
+                break  # the rest is claimed by a later sweep
+            if not await claim(
+                task.id, self.owner, now, now + self.lease_seconds, PENDING_STATUSES
+            ):
+                continue  # another process got there first
+            if key and task.payload and task.tenant == tenant_key(key):
+                self._queue.put_nowait((0, next(self._seq), task.id, task.payload, key))
+                log_json(logging.INFO, event="task_resumed", task_id=task.id)
+            else:
+                # Per-request tenant keys are never persisted, so the task
+                # cannot be replayed on behalf of its caller.
+                await save(
+                    Task(id=task.id, status="error", result={"msg": "interrupted by restart"})
+                )
+
+    async def _worker(self) -> None:
+        from .client import XyteAPIClient
+        from .tasks import execute_send_command
+
+        assert self._queue is not None
+        while True:
+            _, _, task_id, payload, key = await self._queue.get()
+            try:
+                async with XyteAPIClient(api_key=key) as client:
+                    await execute_send_command(task_id, payload, client)
+            except Exception as exc:  # pragma: no cover - keep the worker alive
+                log_json(logging.ERROR, event="task_worker_error", task_id=task_id, error=str(exc))
+            finally:
+                self._queue.task_done()
+
+
+_backend: TaskBackend | None = None
+
+
+def get_backend() -> TaskBackend:
+    """Return the task backend selected by ``XYTE_TASK_BACKEND``."""
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.task_backend == "local":
+            _backend = LocalBackend(
+                workers=settings.task_workers,
+                queue_size=settings.task_queue_size,
+                lease_seconds=settings.task_lease_seconds,
+            )
+        else:
+            _backend = CeleryBackend()
+    return _backend
+
+
+def reset_backend() -> None:
+    """Drop the cached backend so the next call re-reads settings."""
+    global _backend
+    _backend = None
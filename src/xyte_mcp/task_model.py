@@ -0,0 +1,27 @@
+"""Database table backing asynchronous tasks.
+
+Kept apart from :mod:`xyte_mcp.tasks` so SQLModel and SQLAlchemy are only
+imported once a task is actually stored or read.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, SQLModel
+
+
+class Task(SQLModel, table=True):  # type: ignore[misc,call-arg]
+    __table_args__ = (Index("ix_task_batch_id_status", "batch_id", "status"),)
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    status: str
+    batch_id: str | None = Field(default=None)
+    payload: dict | None = Field(default=None, sa_column=Column(JSON))
+    result: dict | None = Field(default=None, sa_column=Column(JSON))
+    # ``tenant_key`` of the tenant that queued the task
+    tenant: str | None = Field(default=None)
+    # Local backend process running the task, until ``lease_expires`` (epoch seconds)
+    owner: str | None = Field(default=None)
+    lease_expires: float | None = Field(default=None)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
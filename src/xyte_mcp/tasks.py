@@ -1,43 +1,406 @@
+import asyncio
 import uuid
 import logging
-from datetime import datetime, timezone
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Set,
+)
 
-from sqlmodel import SQLModel, Field
-from sqlalchemy import JSON, Column
 from mcp.server.fastmcp import Context
 
-from .db import get_session
-from .models import SendCommandRequest, ToolResponse
+from .models import CommandRequest, SendCommandBatchRequest, SendCommandRequest, ToolResponse
 from .logging_utils import log_json, request_var
 
+if TYPE_CHECKING:  # pragma: no cover - imported for type hints only
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-class Task(SQLModel, table=True):  # type: ignore[misc,call-arg]
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    status: str
-    payload: dict | None = Field(default=None, sa_column=Column(JSON))
-    result: dict | None = Field(default=None, sa_column=Column(JSON))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    from .client import XyteAPIClient
+    from .task_model import Task
+
+TERMINAL_STATUSES = ("done", "error")
+# Upper bound for long-poll waits on task status
+MAX_WAIT_SECONDS = 60.0
+_PROGRESS = {"queued": 0.0, "running": 0.5, "done": 1.0, "error": 1.0}
+
+# Task ID -> queues of callers waiting for the next status change
+_waiters: Dict[str, Set["asyncio.Queue[Dict[str, Any]]"]] = {}
+_listener: "asyncio.Task[None] | None" = None
+_listener_ready: "asyncio.Event | None" = None
+# Longest wait for the update subscription before reading a task's state
+LISTENER_READY_SECONDS = 1.0
+LISTENER_MAX_BACKOFF = 30.0
+
+
+def __getattr__(name: str) -> Any:
+    # ``Task`` is loaded on first use to keep SQLModel out of server startup
+    if name == "Task":
+        from .task_model import Task
+
+        return Task
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@asynccontextmanager
+async def get_session() -> AsyncIterator["AsyncSession"]:
+    """Open a database session, importing the database layer on first use."""
+    from .db import get_session as db_session
+
+    async with db_session() as session:
+        yield session
+
+
+def _insert_for(session: Any) -> Any:
+    """Return the dialect-specific ``insert`` supporting upserts, if any."""
+    dialect = getattr(getattr(session, "bind", None), "dialect", None)
+    name = getattr(dialect, "name", None)
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert
+    return None
 
 
 async def save(task: "Task") -> None:
+    """Insert ``task`` or update the status fields of the existing row.
+
+    Fields left as ``None`` on ``task`` keep their stored value, so status
+    transitions do not wipe the payload or batch membership. On PostgreSQL and
+    SQLite this is a single ``INSERT ... ON CONFLICT DO UPDATE`` statement.
+    """
+    values: Dict[str, Any] = {
+        "id": task.id,
+        "status": task.status,
+        "updated_at": task.updated_at,
+    }
+    for field in ("batch_id", "payload", "result", "tenant", "owner", "lease_expires"):
+        value = getattr(task, field)
+        if value is not None:
+            values[field] = value
+
+    from .task_model import Task
+
+    async with get_session() as session:
+        insert = _insert_for(session)
+        if insert is not None:
+            stmt = insert(Task).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={k: v for k, v in values.items() if k != "id"},
+            )
+            await session.execute(stmt)
+        else:
+            current = await session.get(Task, task.id)
+            if current is None:
+                session.add(task)
+            else:
+                for field, value in values.items():
+                    setattr(current, field, value)
+        await session.commit()
+
+
+async def save_many(tasks: Iterable["Task"]) -> None:
+    """Insert several new tasks in a single transaction."""
     async with get_session() as session:
-        await session.merge(task)
+        session.add_all(list(tasks))
         await session.commit()
 
 
-async def fetch(tid: str) -> Task | None:
+async def fail_tasks(task_ids: List[str], message: str) -> None:
+    """Mark several tasks as failed with ``message`` in one statement."""
+    from datetime import datetime, timezone
+
+    from sqlalchemy import update
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    async with get_session() as session:
+        await session.execute(
+            update(Task)
+            .where(col(Task.id).in_(task_ids))
+            .values(
+                status="error",
+                result={"msg": message},
+                updated_at=datetime.now(timezone.utc),
+            )
+        )
+        await session.commit()
+
+
+async def fetch(tid: str) -> "Task | None":
+    from .task_model import Task
+
     async with get_session() as session:
         return await session.get(Task, tid)
 
 
+def _caller_tenant() -> str | None:
+    """Return the tenant whose tasks the caller may read, ``None`` for any.
+
+    In multi-tenant mode that is the :func:`~xyte_mcp.tenant.tenant_key` of
+    the request's API key; task and batch ids alone grant no access.
+    """
+    from .config import get_settings
+    from .tenant import current_tenant_key
+
+    if not get_settings().multi_tenant:
+        return None
+    return current_tenant_key() or ""
+
+
+def _visible(task: "Task | None") -> bool:
+    if task is None:
+        return False
+    tenant = _caller_tenant()
+    return tenant is None or task.tenant == tenant
+
+
+async def fetch_pending(
+    statuses: Iterable[str], lease_expired_at: float | None = None
+) -> List["Task"]:
+    """Return tasks whose status is one of ``statuses``.
+
+    With ``lease_expired_at`` only tasks without a lease, or whose lease ended
+    before that time, are returned.
+    """
+    from sqlalchemy import select
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    stmt = select(Task).where(col(Task.status).in_(list(statuses)))
+    if lease_expired_at is not None:
+        stmt = stmt.where(_lease_expired(lease_expired_at))
+    async with get_session() as session:
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+async def claim(
+    task_id: str, owner: str, now: float, lease_expires: float, statuses: Iterable[str]
+) -> bool:
+    """Take over an unfinished task whose lease ended before ``now``.
+
+    The check and the update are one statement, so when several processes
+    race for the same task exactly one of them gets ``True``.
+    """
+    from sqlalchemy import update
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    stmt = (
+        update(Task)
+        .where(
+            col(Task.id) == task_id,
+            col(Task.status).in_(list(statuses)),
+            _lease_expired(now),
+        )
+        .values(owner=owner, lease_expires=lease_expires)
+    )
+    async with get_session() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+    return bool(result.rowcount == 1)  # type: ignore[attr-defined]
+
+
+def _lease_expired(now: float) -> Any:
+    from sqlalchemy import or_
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    return or_(col(Task.lease_expires).is_(None), col(Task.lease_expires) < now)
+
+
+async def renew_leases(owner: str, lease_expires: float, statuses: Iterable[str]) -> None:
+    """Extend the lease of every unfinished task run by ``owner``."""
+    await _set_leases(owner, lease_expires, statuses)
+
+
+async def release_leases(owner: str, statuses: Iterable[str]) -> None:
+    """Let other processes take over the unfinished tasks of ``owner`` at once."""
+    await _set_leases(owner, None, statuses)
+
+
+async def _set_leases(owner: str, lease_expires: float | None, statuses: Iterable[str]) -> None:
+    from sqlalchemy import update
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    async with get_session() as session:
+        await session.execute(
+            update(Task)
+            .where(col(Task.owner) == owner, col(Task.status).in_(list(statuses)))
+            .values(lease_expires=lease_expires)
+        )
+        await session.commit()
+
+
+async def execute_send_command(
+    task_id: str, payload: Dict[str, Any], client: "XyteAPIClient"
+) -> None:
+    """Run a queued ``send_command`` task and persist its outcome.
+
+    Args:
+        task_id: Identifier of the ``Task`` row to update.
+        payload: ``SendCommandRequest`` fields captured when the task was queued.
+        client: API client bound to the tenant that queued the task.
+    """
+    from .task_model import Task
+
+    await _transition(Task(id=task_id, status="running", payload=payload))
+    try:
+        data = SendCommandRequest(**payload)
+        command = CommandRequest(**data.model_dump(exclude={"device_id"}))
+        result = await client.send_command(data.device_id, command)
+        await _transition(Task(id=task_id, status="done", payload=payload, result=result))
+    except Exception as exc:  # pragma: no cover - best effort
+        await _transition(
+            Task(id=task_id, status="error", payload=payload, result={"msg": str(exc)})
+        )
+    log_json(logging.INFO, event="task_finished", task_id=task_id)
+
+
+async def _transition(task: "Task") -> None:
+    """Persist a status change and announce it to waiting clients."""
+    update = {"task_id": task.id, "status": task.status, "result": task.result}
+    await save(task)
+    notify_task_update(update)
+    try:
+        from .events import publish_task_update
+
+        await publish_task_update(update)
+    except Exception as exc:  # pragma: no cover - Redis is optional here
+        log_json(
+            logging.WARNING,
+            event="task_publish_error",
+            task_id=update["task_id"],
+            error=str(exc),
+        )
+
+
+def notify_task_update(update: Dict[str, Any]) -> None:
+    """Wake callers in this process waiting on the task in ``update``."""
+    for queue in _waiters.get(str(update.get("task_id")), ()):
+        queue.put_nowait(update)
+
+
+async def _listen_forever(ready: asyncio.Event) -> None:
+    from .events import listen_task_updates
+
+    delay = 1.0
+    while True:
+        try:
+            await listen_task_updates(notify_task_update, on_subscribed=ready.set)
+            delay = 1.0
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Waiters should not hold back for a subscription that failed
+            ready.set()
+            log_json(logging.WARNING, event="task_listener_error", error=str(exc))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTENER_MAX_BACKOFF)
+
+
+def _ensure_listener() -> asyncio.Event:
+    """Subscribe to task updates published by workers in any process.
+
+    Returns an event that is set once the subscription is active, or once it
+    failed, so that callers read the current state only after any later
+    change is certain to reach them.
+    """
+    global _listener, _listener_ready
+    loop = asyncio.get_running_loop()
+    if (
+        _listener is None
+        or _listener_ready is None
+        or _listener.done()
+        or _listener.get_loop() is not loop
+    ):
+        _listener_ready = asyncio.Event()
+        _listener = loop.create_task(
+            _listen_forever(_listener_ready), name="xyte-task-listener"
+        )
+    return _listener_ready
+
+
+async def _wait(
+    task_id: str, timeout: float, progress: Callable[[float], Awaitable[None]] | None
+) -> Dict[str, Any]:
+    queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    _waiters.setdefault(task_id, set()).add(queue)
+    try:
+        ready = _ensure_listener()
+        try:
+            await asyncio.wait_for(ready.wait(), LISTENER_READY_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        task = await fetch(task_id)
+        if not task or not _visible(task):
+            return {"status": "unknown"}
+        state: Dict[str, Any] = {"status": task.status, "result": task.result}
+        if task.status in TERMINAL_STATUSES:
+            return state
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(timeout, MAX_WAIT_SECONDS)
+        while state["status"] not in TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                update = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            state = {"status": update["status"], "result": update.get("result")}
+            if progress is not None:
+                await progress(_PROGRESS.get(state["status"], 0.0))
+        return state
+    finally:
+        waiting = _waiters.get(task_id)
+        if waiting is not None:
+            waiting.discard(queue)
+            if not waiting:
+                _waiters.pop(task_id, None)
+
+
+async def wait_for_task(task_id: str, timeout: float, ctx: Context) -> Dict[str, Any]:
+    """Wait up to ``timeout`` seconds for a task to finish.
+
+    The database is read once, after subscribing to task updates; later
+    state changes arrive as notifications and are forwarded to ``ctx`` as MCP
+    progress updates.
+    """
+
+    async def progress(value: float) -> None:
+        await ctx.report_progress(value, 1.0)
+
+    return await _wait(task_id, timeout, progress)
+
+
 async def send_command_async(
-    data: SendCommandRequest, ctx: Context | None = None
+    data: SendCommandRequest, ctx: Context | None = None, priority: int = 0
 ) -> ToolResponse:
     """Initiate a command asynchronously and return a task ID.
 
     When ``ENABLE_ASYNC_TASKS`` is ``False`` the command is executed
-    synchronously and the final result is returned directly.
+    synchronously and the final result is returned directly. Otherwise the
+    task is handed to the backend selected by ``XYTE_TASK_BACKEND``; lower
+    ``priority`` values run first on the local backend.
     """
 
     if ctx is None:
@@ -56,19 +419,144 @@ async def send_command_async(
     if req is None:
         raise ValueError("Request object missing")
 
+    from .task_backend import get_backend
+    from .task_model import Task
+    from .tenant import tenant_key
+
+    backend = get_backend()
     tid = str(uuid.uuid4())
-    await save(Task(id=tid, status="queued", payload=data.model_dump()))
-    from .worker.long import send_command_long
-    send_command_long.delay(tid, data.model_dump(), req.state.xyte_key)
+    await save(
+        Task(
+            id=tid,
+            status="queued",
+            payload=data.model_dump(),
+            tenant=tenant_key(req.state.xyte_key),
+            **backend.lease(),
+        )
+    )
+    try:
+        await backend.submit(tid, data.model_dump(), req.state.xyte_key, priority)
+    except Exception as exc:
+        await save(Task(id=tid, status="error", result={"msg": str(exc)}))
+        raise
     log_json(logging.INFO, event="task_created", task_id=tid)
     return ToolResponse(summary="queued", data={"task_id": tid})
 
 
-async def get_task_status(task_id: str) -> Dict[str, Any]:
-    """Return status information about a previously started task."""
+async def send_command_batch(data: SendCommandBatchRequest, ctx: Context) -> ToolResponse:
+    """Queue several commands at once and return a batch ID.
+
+    All tasks are inserted in one transaction and tagged with the batch ID so
+    ``get_batch_status`` can report progress with a single query. When
+    ``ENABLE_ASYNC_TASKS`` is ``False`` the commands run synchronously.
+    """
+    from .config import get_settings
+
+    if not get_settings().enable_async_tasks:
+        from .tools.device import send_command, SendCommandArgs
+
+        results = []
+        for command in data.commands:
+            result = await send_command(SendCommandArgs(**command.model_dump()), ctx)
+            results.append({"device_id": command.device_id, "result": result.data})
+        return ToolResponse(summary="done", data={"status": "done", "results": results})
+
+    req = request_var.get()
+    if req is None:
+        raise ValueError("Request object missing")
+
+    from .task_backend import get_backend
+    from .task_model import Task
+    from .tenant import tenant_key
+
+    backend = get_backend()
+    batch_id = str(uuid.uuid4())
+    tenant = tenant_key(req.state.xyte_key)
+    rows = [
+        Task(
+            status="queued",
+            batch_id=batch_id,
+            payload=command.model_dump(),
+            tenant=tenant,
+            **backend.lease(),
+        )
+        for command in data.commands
+    ]
+    queued = [(row.id, command.model_dump()) for row, command in zip(rows, data.commands)]
+    await save_many(rows)
+    for i, (tid, payload) in enumerate(queued):
+        try:
+            await backend.submit(tid, payload, req.state.xyte_key)
+        except Exception as exc:
+            # Tasks never handed to the backend would otherwise stay queued
+            await fail_tasks([t for t, _ in queued[i:]], str(exc))
+            raise
+    log_json(logging.INFO, event="batch_created", batch_id=batch_id, size=len(queued))
+    return ToolResponse(
+        summary=f"{len(queued)} commands queued",
+        data={"batch_id": batch_id, "task_ids": [tid for tid, _ in queued]},
+        next_steps=["get_batch_status"],
+    )
+
+
+async def get_batch_status(batch_id: str) -> Dict[str, Any]:
+    """Return task counts per status for a batch."""
+    from sqlalchemy import func, select
+    from sqlmodel import col
+
+    from .task_model import Task
+
+    stmt = select(col(Task.status), func.count()).where(col(Task.batch_id) == batch_id)
+    tenant = _caller_tenant()
+    if tenant is not None:
+        stmt = stmt.where(col(Task.tenant) == tenant)
+    async with get_session() as session:
+        result = await session.execute(stmt.group_by(col(Task.status)))
+        counts = {status: count for status, count in result.all()}
+    total = sum(counts.values())
+    if not total:
+        log_json(logging.INFO, event="batch_status_unknown", batch_id=batch_id)
+        return {"batch_id": batch_id, "status": "unknown"}
+    pending = sum(counts.get(s, 0) for s in ("queued", "running"))
+    log_json(logging.INFO, event="batch_status", batch_id=batch_id, pending=pending)
+    return {
+        "batch_id": batch_id,
+        "status": "running" if pending else "done",
+        "total": total,
+        "counts": counts,
+    }
+
+
+async def read_task_status(
+    task_id: str,
+    wait: float = 0.0,
+    progress: Callable[[float], Awaitable[None]] | None = None,
+) -> Dict[str, Any]:
+    """Return a task's status, waiting up to ``wait`` seconds for it to finish.
+
+    ``progress`` is called with the progress fraction of every state change
+    seen while waiting.
+    """
+    if wait > 0:
+        status = await _wait(task_id, wait, progress)
+        log_json(logging.INFO, event="task_status", task_id=task_id, status=status["status"])
+        return status
     task = await fetch(task_id)
-    if not task:
+    if not task or not _visible(task):
         log_json(logging.INFO, event="task_status_unknown", task_id=task_id)
         return {"status": "unknown"}
     log_json(logging.INFO, event="task_status", task_id=task_id, status=task.status)
     return {"status": task.status, "result": task.result}
+
+
+async def get_task_status(task_id: str, ctx: Context, wait: float = 0.0) -> Dict[str, Any]:
+    """Return status information about a previously started task.
+
+    Pass ``wait`` (seconds, at most 60) to block until the task finishes
+    instead of polling; progress is reported while waiting.
+    """
+    if wait > 0:
+        status = await wait_for_task(task_id, wait, ctx)
+        log_json(logging.INFO, event="task_status", task_id=task_id, status=status["status"])
+        return status
+    return await read_task_status(task_id)
@@ -0,0 +1,60 @@
+"""Helpers for identifying the tenant behind a request."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Mapping
+
+from .logging_utils import request_var
+
+DEFAULT_TENANT = "default"
+
+
+def tenant_key(raw_key: str | None) -> str:
+    """Return the full, non-reversible digest of an API key.
+
+    Use it to key per-tenant state such as caches and pooled clients, where
+    two tenants sharing an identifier would see each other's data.
+    """
+    if not raw_key:
+        return DEFAULT_TENANT
+    return hashlib.sha256(raw_key.strip().encode()).hexdigest()
+
+
+def key_id(raw_key: str | None) -> str:
+    """Return a short, non-reversible identifier for an API key.
+
+    Only 32 bits long, so fit for log fields and metric labels but not for
+    keying tenant data; use :func:`tenant_key` for that.
+    """
+    if not raw_key:
+        return DEFAULT_TENANT
+    return tenant_key(raw_key)[:8]
+
+
+def request_key(headers: Mapping[str, str]) -> str:
+    """Return the raw API key sent in ``X-Xyte-API-Key`` or ``Authorization``."""
+    return headers.get("x-xyte-api-key") or (
+        headers.get("authorization") or ""
+    ).removeprefix("Bearer ")
+
+
+def current_key_id() -> str | None:
+    """Return the key identifier for the active request, if any."""
+    req = request_var.get()
+    if req is None:
+        return None
+    cached = getattr(req.state, "key_id", None)
+    if cached:
+        return cached
+    raw = getattr(req.state, "xyte_key", None)
+    return key_id(raw) if raw else None
+
+
+def current_tenant_key() -> str | None:
+    """Return the :func:`tenant_key` of the active request, if any."""
+    req = request_var.get()
+    if req is None:
+        return None
+    raw = getattr(req.state, "xyte_key", None)
+    return tenant_key(raw) if raw else None
@@ -5,6 +5,7 @@ from .device import (
     delete_device,
     update_device,
     send_command,
+    send_command_bulk,
     cancel_command,
     search_device_histories,
     get_device_analytics_report,
@@ -27,6 +28,7 @@ __all__ = [
     "delete_device",
     "update_device",
     "send_command",
+    "send_command_bulk",
     "cancel_command",
     "search_device_histories",
     "get_device_analytics_report",
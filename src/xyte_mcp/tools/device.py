@@ -6,10 +6,13 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 import anyio
+import asyncio
 
 from ..deps import get_client
+from ..config import get_settings
 from ..utils import (
     MCPError,
+    enforce_rate_limit,
     get_session_state,
     handle_api,
     validate_device_id,
@@ -24,6 +27,7 @@ from ..client import (
 from ..models import (
     UpdateDeviceArgs,
     SendCommandArgs,
+    SendCommandBulkRequest,
     CancelCommandRequest,
     SearchDeviceHistoriesRequest,
     ToolResponse,
@@ -120,6 +124,98 @@ async def send_command(
         )
 
 
+def _device_list(payload: Any) -> list[Dict[str, Any]]:
+    """Extract the device records from a ``get_devices`` response."""
+    for key in ("items", "devices", "data"):
+        if isinstance(payload, dict) and key in payload:
+            return _device_list(payload[key])
+    return payload if isinstance(payload, list) else []
+
+
+def _matches(device: Dict[str, Any], words: list[str]) -> bool:
+    fields = ("id", "name", "model", "type", "status", "space_name")
+    text = " ".join(str(device.get(f, "")) for f in fields).lower()
+    return all(word in text for word in words)
+
+
+async def send_command_bulk(data: SendCommandBulkRequest, ctx: Context) -> ToolResponse:
+    """Send the same command to many devices concurrently.
+
+    Every device counts against the caller's rate limit; devices over it are
+    reported as failed with ``rate_limited``.
+    """
+    async with get_client(request_var.get()) as client:
+        if data.device_ids is not None:
+            targets = list(dict.fromkeys(validate_device_id(d) for d in data.device_ids))
+        else:
+            inventory = await handle_api("get_devices", client.get_devices())
+            words = (data.query or "").lower().split()
+            targets = [
+                str(dev.get("id"))
+                for dev in _device_list(inventory)
+                if dev.get("id") is not None and _matches(dev, words)
+            ]
+        if not targets:
+            raise MCPError(code="device_not_found", message="No devices matched the selector")
+        if len(targets) > data.max_devices:
+            raise MCPError(
+                code="too_many_devices",
+                message=f"{len(targets)} devices matched; raise max_devices to confirm",
+            )
+
+        total = len(targets)
+        if data.dry_run:
+            log_json(
+                logging.INFO,
+                event="dry_run_send_command_bulk",
+                command=data.name,
+                devices=total,
+            )
+            return ToolResponse(
+                data={"dry_run": True, "device_ids": targets},
+                summary=f"Dry run: would send '{data.friendly_name}' to {total} devices",
+            )
+
+        req = CommandRequest(
+            name=data.name,
+            friendly_name=data.friendly_name,
+            file_id=data.file_id,
+            extra_params=data.extra_params or {},
+        )
+        semaphore = asyncio.Semaphore(get_settings().batch_concurrency)
+        results: Dict[str, str] = {}
+        # Report roughly every 5% so large fleets do not flood the client
+        step = max(1, total // 20)
+
+        async def dispatch(device_id: str) -> None:
+            async with semaphore:
+                try:
+                    # Checked before the call is created, so none is left unawaited
+                    enforce_rate_limit()
+                    await handle_api(
+                        "send_command", client.send_command(device_id, req), rate_limit=False
+                    )
+                    results[device_id] = "sent"
+                except MCPError as exc:
+                    results[device_id] = exc.code
+            done = len(results)
+            if done % step == 0 or done == total:
+                await ctx.report_progress(done, total, f"{done}/{total} devices")
+
+        await ctx.info(f"Sending command {data.name} to {total} devices")
+        await asyncio.gather(*(dispatch(d) for d in targets))
+
+    failed = {d: code for d, code in results.items() if code != "sent"}
+    return ToolResponse(
+        data={
+            "sent": [d for d in targets if results.get(d) == "sent"],
+            "failed": failed,
+        },
+        summary=f"Command '{data.friendly_name}' sent to {total - len(failed)}/{total} devices",
+        next_steps=["get_devices_status"],
+    )
+
+
 async def cancel_command(data: CancelCommandRequest, ctx: Context | None = None) -> Dict[str, Any]:
     """Cancel a previously sent command."""
     req_obj = request_var.get() if ctx else None
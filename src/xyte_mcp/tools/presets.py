@@ -1,5 +1,4 @@
 from pathlib import Path
-import yaml  # type: ignore[import-untyped]
 
 from ..models import CommandRequest, ToolResponse
 from ..deps import get_client
@@ -11,6 +10,8 @@ async def start_meeting_room_preset(
     room: str, preset: str = "default", ctx: Context | None = None
 ) -> ToolResponse:
     """Power on and configure all devices for the given room preset."""
+    import yaml  # type: ignore[import-untyped]
+
     f = Path(__file__).resolve().parent.parent / "presets" / f"{preset}.yaml"
     steps = yaml.safe_load(f.read_text())
     req_obj = request_var.get() if ctx else None
@@ -0,0 +1,343 @@
+"""OpenTelemetry SDK setup.
+
+Imported only by :func:`xyte_mcp.logging_utils.configure_logging`, so
+processes that never configure tracing do not load the SDK.
+
+Finished spans are queued to a ``BatchSpanProcessor``, which exports them
+from a background thread. Ending a span on the request path then costs only
+an enqueue. ``XYTE_TRACE_EXPORTER`` chooses where spans go:
+
+* ``console``: a short line per span on stderr.
+* ``file``: JSON lines appended to ``XYTE_TRACE_FILE``.
+* ``otlp``: an OTLP/HTTP collector configured with the standard
+  ``OTEL_EXPORTER_OTLP_*`` variables. Requires ``xyte-mcp[otlp]``.
+* ``none``: spans are not exported.
+
+Sampling happens in two steps. :class:`HeadSampler` keeps
+``XYTE_TRACE_SAMPLE_RATIO`` of new traces. The rest are still recorded, and
+:class:`TailSamplingProcessor` buffers their spans until the local root
+ends. It then exports the whole trace if any span failed or a tool call took
+longer than ``XYTE_TRACE_SLOW_MS``, and drops the trace otherwise.
+
+Independently of export, :class:`SlowTraceRecorder` keeps the
+``XYTE_SLOW_TRACES`` slowest traces of the last ``XYTE_SLOW_TRACE_WINDOW``
+seconds in memory; ``/debug/slow`` serves them through :func:`slow_traces`.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import sys
+import threading
+import time
+from typing import Any, Sequence
+
+from cachetools import LRUCache
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
+from opentelemetry.util.types import Attributes
+
+from .config import get_settings
+from .logging_utils import log_json
+
+# Unsampled traces whose local root has not ended yet
+MAX_PENDING_TRACES = 1024
+# Spans buffered per unsampled trace; later ones are dropped
+MAX_PENDING_SPANS = 256
+# Time slots of the slow trace ring; a slot expires as a whole
+SLOW_TRACE_SLOTS = 6
+
+
+class StderrConsoleSpanExporter(ConsoleSpanExporter):
+    """Console span exporter that writes to stderr instead of stdout."""
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Export spans to stderr instead of stdout."""
+        for span in spans:
+            print(self._span_to_str(span), file=sys.stderr)
+        return SpanExportResult.SUCCESS
+
+    def _span_to_str(self, span: ReadableSpan) -> str:
+        """Convert span to string format."""
+        # Basic implementation since _span_to_str was removed from newer versions
+        return f"[{span.name}] {span.start_time} - {span.end_time}"
+
+
+class FileSpanExporter(SpanExporter):
+    """Append spans to a file as JSON lines."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class HeadSampler(Sampler):
+    """Sample a ratio of new traces, follow the parent otherwise.
+
+    Traces that are not sampled are still recorded, so that
+    :class:`TailSamplingProcessor` can keep them if they turn out interesting.
+    """
+
+    def __init__(self, ratio: float) -> None:
+        self._ratio = TraceIdRatioBased(ratio)
+
+    def should_sample(
+        self,
+        parent_context: Context | None,
+        trace_id: int,
+        name: str,
+        kind: trace.SpanKind | None = None,
+        attributes: Attributes = None,
+        links: Sequence[trace.Link] | None = None,
+        trace_state: trace.TraceState | None = None,
+    ) -> SamplingResult:
+        parent = trace.get_current_span(parent_context).get_span_context()
+        if parent.is_valid:
+            sampled = parent.trace_flags.sampled
+        else:
+            sampled = self._ratio.should_sample(
+                parent_context, trace_id, name
+            ).decision.is_sampled()
+        decision = Decision.RECORD_AND_SAMPLE if sampled else Decision.RECORD_ONLY
+        return SamplingResult(
+            decision, attributes, parent.trace_state if parent.is_valid else trace_state
+        )
+
+    def get_description(self) -> str:
+        return f"HeadSampler({self._ratio.get_description()})"
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Return a copy of ``span`` flagged as sampled so exporters accept it."""
+    ctx = span.context
+    assert ctx is not None
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            ctx.trace_id,
+            ctx.span_id,
+            ctx.is_remote,
+            TraceFlags(TraceFlags.SAMPLED),
+            ctx.trace_state,
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Forward sampled spans and keep unsampled traces that failed or were slow.
+
+    Args:
+        downstream: Processor that receives the kept spans.
+        slow_seconds: Tool spans at least this long keep their trace.
+    """
+
+    def __init__(self, downstream: SpanProcessor, slow_seconds: float) -> None:
+        self._downstream = downstream
+        self._slow_ns = int(slow_seconds * 1e9)
+        self._pending: LRUCache[int, list[ReadableSpan]] = LRUCache(maxsize=MAX_PENDING_TRACES)
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        self._downstream.on_start(span, parent_context)
+
+    def _interesting(self, span: ReadableSpan) -> bool:
+        if span.status.status_code is StatusCode.ERROR:
+            return True
+        duration = (span.end_time or 0) - (span.start_time or 0)
+        return span.name.startswith("tool:") and duration >= self._slow_ns
+
+    def on_end(self, span: ReadableSpan) -> None:
+        ctx = span.context
+        if ctx is None or ctx.trace_flags.sampled:
+            self._downstream.on_end(span)
+            return
+        with self._lock:
+            spans = self._pending.setdefault(ctx.trace_id, [])
+            if len(spans) < MAX_PENDING_SPANS:
+                spans.append(span)
+            if not _is_local_root(span):
+                return
+            # The local root ended: decide for the whole trace
+            del self._pending[ctx.trace_id]
+        if any(self._interesting(s) for s in spans):
+            for kept in spans:
+                self._downstream.on_end(_as_sampled(kept))
+
+    def shutdown(self) -> None:
+        self._downstream.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._downstream.force_flush(timeout_millis)
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    return span.parent is None or span.parent.is_remote
+
+
+class SlowTraceRecorder(SpanProcessor):
+    """Keep the slowest recently finished traces in memory.
+
+    The window is split into :data:`SLOW_TRACE_SLOTS` slots used as a ring.
+    Each slot holds the ``limit`` slowest traces whose local root ended in
+    it, so expiring old traces costs no more than resetting a slot.
+
+    Args:
+        limit: Traces kept per slot and returned by :meth:`snapshot`.
+        window_seconds: How long a trace stays eligible.
+    """
+
+    def __init__(self, limit: int, window_seconds: float) -> None:
+        self._limit = limit
+        self._slot_ns = int(window_seconds / SLOW_TRACE_SLOTS * 1e9)
+        # (slot number, min-heap of (duration_ns, trace_id, spans))
+        self._ring: list[tuple[int, list[tuple[int, int, list[ReadableSpan]]]]] = [
+            (-1, []) for _ in range(SLOW_TRACE_SLOTS)
+        ]
+        self._pending: LRUCache[int, list[ReadableSpan]] = LRUCache(maxsize=MAX_PENDING_TRACES)
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        ctx = span.context
+        if ctx is None:
+            return
+        with self._lock:
+            spans = self._pending.setdefault(ctx.trace_id, [])
+            if len(spans) < MAX_PENDING_SPANS:
+                spans.append(span)
+            if not _is_local_root(span):
+                return
+            del self._pending[ctx.trace_id]
+            end = span.end_time or 0
+            duration = end - (span.start_time or 0)
+            slot = end // self._slot_ns
+            index = slot % SLOW_TRACE_SLOTS
+            number, heap = self._ring[index]
+            if number != slot:
+                heap = []
+                self._ring[index] = (slot, heap)
+            entry = (duration, ctx.trace_id, spans)
+            if len(heap) < self._limit:
+                heapq.heappush(heap, entry)
+            elif duration > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return the slowest traces of the window, slowest first."""
+        oldest = time.time_ns() // self._slot_ns - SLOW_TRACE_SLOTS + 1
+        with self._lock:
+            entries = [e for number, heap in self._ring if number >= oldest for e in heap]
+        entries = heapq.nlargest(self._limit, entries, key=lambda e: e[0])
+        return [_trace_to_dict(duration, trace_id, spans) for duration, trace_id, spans in entries]
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _trace_to_dict(duration: int, trace_id: int, spans: list[ReadableSpan]) -> dict[str, Any]:
+    start = min(s.start_time or 0 for s in spans)
+    return {
+        "trace_id": format(trace_id, "032x"),
+        "duration_ms": round(duration / 1e6, 3),
+        "root": spans[-1].name,
+        "spans": [
+            {
+                "name": s.name,
+                "span_id": format(s.context.span_id, "016x") if s.context else None,
+                "parent_id": format(s.parent.span_id, "016x") if s.parent else None,
+                "start_ms": round(((s.start_time or 0) - start) / 1e6, 3),
+                "duration_ms": round(((s.end_time or 0) - (s.start_time or 0)) / 1e6, 3),
+                "status": s.status.status_code.name,
+                "attributes": dict(s.attributes or {}),
+                "events": [
+                    {"name": e.name, "attributes": dict(e.attributes or {})} for e in s.events
+                ],
+            }
+            for s in sorted(spans, key=lambda s: s.start_time or 0)
+        ],
+    }
+
+
+_recorder: SlowTraceRecorder | None = None
+
+
+def slow_traces() -> list[dict[str, Any]]:
+    """Return the traces kept by the slow trace recorder, slowest first."""
+    return _recorder.snapshot() if _recorder is not None else []
+
+
+def _build_exporter(name: str) -> SpanExporter | None:
+    if name == "console":
+        return StderrConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(get_settings().trace_file)
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (  # type: ignore[import-not-found]
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            log_json(
+                logging.WARNING,
+                event="otlp_unavailable",
+                detail='install "xyte-mcp[otlp]" to export traces over OTLP; traces are not exported',
+            )
+            return None
+        return OTLPSpanExporter()
+    return None
+
+
+def configure_tracing() -> None:
+    """Install a tracer provider exporting and recording spans as configured."""
+    global _recorder
+    settings = get_settings()
+    exporter = _build_exporter(settings.trace_exporter)
+    if exporter is None and not settings.slow_traces:
+        return
+    provider = TracerProvider(sampler=HeadSampler(settings.trace_sample_ratio))
+    if settings.slow_traces:
+        _recorder = SlowTraceRecorder(settings.slow_traces, settings.slow_trace_window)
+        provider.add_span_processor(_recorder)
+    if exporter is not None:
+        provider.add_span_processor(
+            TailSamplingProcessor(BatchSpanProcessor(exporter), settings.trace_slow_ms / 1000)
+        )
+    trace.set_tracer_provider(provider)
@@ -0,0 +1,138 @@
+"""Connection pools shared by all Xyte API clients on an event loop.
+
+Clients are created per request, so giving each one its own pool would open
+fresh sockets for every call. Instead every client on a loop sends through
+one pooled transport. With ``XYTE_HTTP2=true`` the pool speaks HTTP/2 and
+multiplexes concurrent calls over a few connections. Servers that do not
+negotiate HTTP/2 are still reached over HTTP/1.1. If the optional ``h2``
+package is missing, the pool falls back to HTTP/1.1 and logs a warning.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import weakref
+from typing import AsyncIterator, Iterator
+
+import httpx
+from prometheus_client import Gauge
+from prometheus_client.core import GaugeMetricFamily
+
+from . import metrics
+from .config import get_settings
+from .logging_utils import log_json
+
+ACTIVE_STREAMS = Gauge(
+    "xyte_upstream_active_streams",
+    "Requests to the Xyte API currently awaiting or streaming a response",
+    ["host"],
+    multiprocess_mode="livesum",
+)
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def http2_available() -> bool:
+    """Return ``True`` if the optional ``h2`` dependency is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _build_pool() -> httpx.AsyncBaseTransport:
+    settings = get_settings()
+    http2 = settings.http2
+    if http2 and not http2_available():
+        log_json(
+            logging.WARNING,
+            event="http2_unavailable",
+            detail="install httpx[http2] to enable HTTP/2; using HTTP/1.1",
+        )
+        http2 = False
+    limits = httpx.Limits(
+        max_keepalive_connections=settings.http_max_keepalive,
+        max_connections=settings.http_max_connections,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+
+def get_pool() -> httpx.AsyncBaseTransport:
+    """Return the pooled transport for the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = _build_pool()
+    return pool
+
+
+async def close_pool() -> None:
+    """Close the pooled transport of the running event loop."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.aclose()
+
+
+def _open_connections() -> float:
+    total = 0
+    for pool in list(_pools.values()):
+        inner = getattr(pool, "_pool", None)
+        total += len(getattr(inner, "connections", ()))
+    return float(total)
+
+
+class _PoolCollector:
+    """Report open pool connections at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        yield GaugeMetricFamily(
+            "xyte_upstream_connections",
+            "Open connections in the shared upstream pools",
+            value=_open_connections(),
+        )
+
+
+metrics.register_local(_PoolCollector())
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that releases its stream slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, host: str) -> None:
+        self._stream = stream
+        self._host = host
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            ACTIVE_STREAMS.labels(host=self._host).dec()
+        await self._stream.aclose()
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Client-facing transport that borrows the loop's pool.
+
+    Closing it leaves the pool open for other clients; use :func:`close_pool`
+    when the loop shuts down.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        ACTIVE_STREAMS.labels(host=host).inc()
+        try:
+            response = await get_pool().handle_async_request(request)
+        except BaseException:
+            ACTIVE_STREAMS.labels(host=host).dec()
+            raise
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _TrackedStream(response.stream, host)
+        return response
+
+    async def aclose(self) -> None:
+        return None
@@ -0,0 +1,200 @@
+"""Per-tenant usage accounting.
+
+Tenants are identified by :func:`xyte_mcp.tenant.key_id`, never by their raw
+key. Each process counts, per tenant, the measures in :data:`FIELDS`:
+upstream attempts and response bytes, cache hits and misses, and tool calls.
+Recording one is a dictionary update, so it is done inline on the request
+path.
+
+Every ``XYTE_USAGE_FLUSH_SECONDS`` the counts gathered since the previous
+flush are added to ``XYTE_USAGE_SINK``:
+
+* ``redis``: ``HINCRBY`` into the hash ``usage:<YYYYMMDD>:<tenant>``, which
+  expires ``XYTE_USAGE_RETENTION_DAYS`` after its last update.
+* ``db``: one :class:`~xyte_mcp.usage_model.UsageRecord` row per tenant.
+* ``none``: nothing is written or kept for writing.
+
+A failed flush keeps its counts for the next one.
+
+For a quick look without the sink, each measure also feeds a
+:class:`SpaceSaving` sketch of ``XYTE_USAGE_SKETCH_SIZE`` tenants, which
+``/usage`` reports as the heaviest tenants since the process started.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from prometheus_client import Counter
+
+from .config import get_settings
+from .logging_utils import log_json
+from .tenant import key_id
+
+FIELDS = ("upstream_calls", "upstream_bytes", "cache_hits", "cache_misses", "tool_calls")
+
+USAGE_FLUSHES = Counter(
+    "xyte_usage_flushes_total",
+    "Usage flushes to the configured sink",
+    ["result"],
+)
+
+
+class SpaceSaving:
+    """Approximate heavy hitters with the space-saving algorithm.
+
+    At most ``capacity`` keys are tracked. A new key replaces the smallest
+    one and inherits its count, recorded as the new key's ``error``: its true
+    count lies between ``count - error`` and ``count``. Every key whose share
+    of the total exceeds ``1 / capacity`` is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        # key -> [count, error]
+        self._counts: dict[str, list[int]] = {}
+
+    def add(self, key: str, weight: int = 1) -> None:
+        entry = self._counts.get(key)
+        if entry is not None:
+            entry[0] += weight
+            return
+        if len(self._counts) < self.capacity:
+            self._counts[key] = [weight, 0]
+            return
+        smallest = min(self._counts, key=lambda k: self._counts[k][0])
+        floor = self._counts.pop(smallest)[0]
+        self._counts[key] = [floor + weight, floor]
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """Return up to ``limit`` keys with the highest counts, highest first."""
+        best = heapq.nlargest(limit, self._counts.items(), key=lambda item: item[1][0])
+        return [
+            {"tenant": key, "count": count, "error": error} for key, (count, error) in best
+        ]
+
+
+_lock = threading.Lock()
+# Counts since the last flush, per tenant
+_pending: dict[str, dict[str, int]] = {}
+_sketches: dict[str, SpaceSaving] = {}
+_flusher: asyncio.Task[None] | None = None
+
+
+def _sketch(field: str) -> SpaceSaving:
+    sketch = _sketches.get(field)
+    if sketch is None:
+        sketch = _sketches[field] = SpaceSaving(get_settings().usage_sketch_size)
+    return sketch
+
+
+def record(tenant: str | None, field: str, amount: int = 1) -> None:
+    """Add ``amount`` to ``tenant``'s count of ``field``.
+
+    ``None`` stands for the server's own key, as in single-tenant mode.
+    """
+    settings = get_settings()
+    if tenant is None:
+        tenant = key_id(settings.xyte_api_key)
+    flushing = settings.usage_sink != "none"
+    with _lock:
+        _sketch(field).add(tenant, amount)
+        if flushing:
+            counts = _pending.get(tenant)
+            if counts is None:
+                counts = _pending[tenant] = dict.fromkeys(FIELDS, 0)
+            counts[field] += amount
+    if flushing:
+        _ensure_flushing()
+
+
+def top(limit: int) -> dict[str, list[dict[str, Any]]]:
+    """Return the heaviest ``limit`` tenants of each measure."""
+    with _lock:
+        return {field: _sketch(field).top(limit) for field in FIELDS}
+
+
+def _take() -> dict[str, dict[str, int]]:
+    global _pending
+    with _lock:
+        batch, _pending = _pending, {}
+    return batch
+
+
+def _restore(batch: dict[str, dict[str, int]]) -> None:
+    with _lock:
+        for tenant, counts in batch.items():
+            pending = _pending.setdefault(tenant, dict.fromkeys(FIELDS, 0))
+            for field, value in counts.items():
+                pending[field] += value
+
+
+async def _write_redis(batch: dict[str, dict[str, int]]) -> None:
+    from .events import get_redis
+
+    day = time.strftime("%Y%m%d", time.gmtime())
+    ttl = get_settings().usage_retention_days * 86400
+    pipe = get_redis().pipeline(transaction=False)
+    for tenant, counts in batch.items():
+        key = f"usage:{day}:{tenant}"
+        for field, value in counts.items():
+            if value:
+                pipe.hincrby(key, field, value)
+        pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def _write_db(batch: dict[str, dict[str, int]]) -> None:
+    from .db import get_session
+    from .usage_model import UsageRecord
+
+    now = datetime.now(timezone.utc)
+    async with get_session() as session:
+        session.add_all(
+            UsageRecord(tenant=tenant, flushed_at=now, **counts)
+            for tenant, counts in batch.items()
+        )
+        await session.commit()
+
+
+async def flush() -> None:
+    """Add the counts gathered since the last flush to the configured sink."""
+    sink = get_settings().usage_sink
+    batch = _take()
+    if not batch or sink == "none":
+        return
+    try:
+        await (_write_redis(batch) if sink == "redis" else _write_db(batch))
+    except Exception as exc:
+        _restore(batch)
+        USAGE_FLUSHES.labels("error").inc()
+        log_json(logging.WARNING, event="usage_flush_failed", sink=sink, error=str(exc))
+        return
+    USAGE_FLUSHES.labels("success").inc()
+
+
+async def _flush_periodically() -> None:
+    try:
+        while True:
+            await asyncio.sleep(get_settings().usage_flush_seconds)
+            await flush()
+    finally:
+        # Loop shutdown cancels this task; write what was counted so far
+        await asyncio.shield(flush())
+
+
+def _ensure_flushing() -> None:
+    global _flusher
+    if _flusher is not None and not _flusher.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # recorded outside a loop; the next call starts it
+        return
+    _flusher = loop.create_task(_flush_periodically())
@@ -0,0 +1,24 @@
+"""Database table receiving flushed usage counts.
+
+Each flush appends one row per tenant rather than updating a running total,
+so workers never contend for the same row; sum the rows of a tenant over a
+time range to get its usage.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class UsageRecord(SQLModel, table=True):  # type: ignore[misc,call-arg]
+    __table_args__ = (Index("ix_usagerecord_tenant_flushed_at", "tenant", "flushed_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    tenant: str
+    flushed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    upstream_calls: int = 0
+    upstream_bytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    tool_calls: int = 0
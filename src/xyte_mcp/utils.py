@@ -1,12 +1,14 @@
+import copy
 import logging
 import time
 from typing import Any, Dict, Awaitable, TYPE_CHECKING, Callable
-from collections import deque
 
 from pydantic import ValidationError
-from .config import get_settings
 
+from .concurrency import UpstreamBusy
+from .limits import TenantRateLimiter, tenant_limit
 from .models import DeviceId, TicketId
+from .tenant import DEFAULT_TENANT, current_key_id
 
 import httpx
 from prometheus_client import Counter, Histogram
@@ -45,31 +47,24 @@ def register_payload_transform(
     _PAYLOAD_TRANSFORMS.append(func)
 
 
-# Simple in-memory rate limiter
-_REQUEST_TIMESTAMPS: deque[float] = deque()
+# Per-tenant limiter for API calls made by tools and resources
+_RATE_LIMITER = TenantRateLimiter()
 
 
 def enforce_rate_limit() -> None:
-    """Enforce rate limiting for API requests.
+    """Enforce the calling tenant's rate limit for API requests.
 
     Raises:
         MCPError: If rate limit is exceeded
     """
-    now = time.time()
-    limit = get_settings().rate_limit_per_minute
-
-    # Remove timestamps older than 60 seconds
-    while _REQUEST_TIMESTAMPS and _REQUEST_TIMESTAMPS[0] < now - 60:
-        _REQUEST_TIMESTAMPS.popleft()
-
-    if len(_REQUEST_TIMESTAMPS) >= limit:
+    tenant = current_key_id() or DEFAULT_TENANT
+    limit = tenant_limit(tenant)
+    if _RATE_LIMITER.check(tenant, limit):
         raise MCPError(
             code="rate_limited",
             message=f"Rate limit exceeded. Maximum {limit} requests per minute.",
         )
 
-    _REQUEST_TIMESTAMPS.append(now)
-
 
 def validate_device_id(device_id: str) -> str:
     """Validate and sanitize a device identifier."""
@@ -97,9 +92,19 @@ def validate_payload(data: Any) -> Dict[str, Any]:
     raise MCPError(code="invalid_payload", message="Payload must be a JSON object")
 
 
-async def handle_api(endpoint: str, coro: Awaitable[Any]) -> Dict[str, Any]:
-    """Handle API response with error conversion and metrics reporting."""
-    enforce_rate_limit()
+async def handle_api(
+    endpoint: str, coro: Awaitable[Any], *, rate_limit: bool = True
+) -> Dict[str, Any]:
+    """Handle API response with error conversion and metrics reporting.
+
+    Args:
+        endpoint: Endpoint name used in metrics and error codes.
+        coro: Awaitable performing the API call.
+        rate_limit: Set to ``False`` for calls that are part of a batch whose
+            rate limit was already enforced once.
+    """
+    if rate_limit:
+        enforce_rate_limit()
 
     start_time = time.time()
     try:
@@ -117,7 +122,9 @@ async def handle_api(endpoint: str, coro: Awaitable[Any]) -> Dict[str, Any]:
         elif not isinstance(result, dict):
             result = {"data": result}
 
-        # Apply transform hooks
+        # Apply transform hooks to a copy: cached payloads are shared
+        if _PAYLOAD_TRANSFORMS:
+            result = copy.deepcopy(result)
         for hook in _PAYLOAD_TRANSFORMS:
             try:
                 result = hook(result)
@@ -177,6 +184,12 @@ async def handle_api(endpoint: str, coro: Awaitable[Any]) -> Dict[str, Any]:
         ERROR_COUNT.labels(endpoint=endpoint, code="timeout").inc()
         raise MCPError(code="timeout", message="Request timed out")
 
+    except UpstreamBusy:
+        ERROR_COUNT.labels(endpoint=endpoint, code="upstream_busy").inc()
+        raise MCPError(
+            code="upstream_busy", message="Too many concurrent Xyte API calls, retry later"
+        )
+
     except httpx.NetworkError as e:
         ERROR_COUNT.labels(endpoint=endpoint, code="network_error").inc()
         raise MCPError(code="network_error", message=f"Network error: {str(e)}")
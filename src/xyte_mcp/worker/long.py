@@ -1,20 +1,12 @@
-import asyncio
 from xyte_mcp.celery_app import celery_app
-from xyte_mcp.tasks import save, Task
-from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.tasks import execute_send_command
+from xyte_mcp.worker import runtime
 
 
 @celery_app.task(name="xyte_mcp.worker.long.send_command")
 def send_command_long(task_id: str, payload: dict, xyte_key: str) -> None:
     async def _run() -> None:
-        await save(Task(id=task_id, status="running"))
-        client = XyteAPIClient(api_key=xyte_key)
-        try:
-            result = await client.send_command(**payload)
-            await save(Task(id=task_id, status="done", result=result))
-        except Exception as exc:  # pragma: no cover - best effort
-            await save(Task(id=task_id, status="error", result={"msg": str(exc)}))
-        finally:
-            await client.close()
+        client = await runtime.get_client(xyte_key)
+        await execute_send_command(task_id, payload, client)
 
-    asyncio.run(_run())
+    runtime.run(_run())
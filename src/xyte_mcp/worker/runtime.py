@@ -0,0 +1,109 @@
+"""Long-lived asyncio runtime shared by Celery tasks in a worker process.
+
+Every worker process owns one event loop running in a background thread.
+Tasks submit coroutines to it, so the API client connection pools and the
+async database engine survive between tasks instead of being rebuilt by a
+fresh ``asyncio.run`` call each time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine, TypeVar
+
+from cachetools import LRUCache  # type: ignore[import-untyped]
+from celery.signals import worker_process_init, worker_process_shutdown  # type: ignore
+
+from xyte_mcp import db, transport
+from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.tenant import tenant_key
+
+T = TypeVar("T")
+
+# Maximum number of tenant clients kept open per worker process
+MAX_CLIENTS = 64
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_clients: LRUCache[str, XyteAPIClient] = LRUCache(maxsize=MAX_CLIENTS)
+
+
+def _reset() -> None:
+    """Forget state inherited from a parent process."""
+    global _loop, _thread
+    _loop = None
+    _thread = None
+    _clients.clear()
+    db.reset_engine()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the worker event loop, starting it on first use."""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="xyte-worker-loop", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` on the worker loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+async def get_client(xyte_key: str) -> XyteAPIClient:
+    """Return a pooled API client for the tenant owning ``xyte_key``."""
+    tenant = tenant_key(xyte_key)
+    client = _clients.get(tenant)
+    if client is None:
+        client = XyteAPIClient(api_key=xyte_key)
+        evicted = _clients.popitem() if len(_clients) >= _clients.maxsize else None
+        _clients[tenant] = client
+        if evicted is not None:
+            await evicted[1].close()
+    return client
+
+
+async def _close_all() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+    await transport.close_pool()
+    await db.dispose_engine()
+
+
+def shutdown() -> None:
+    """Close pooled resources and stop the worker loop."""
+    global _loop, _thread
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return
+    run(_close_all())
+    loop.call_soon_threadsafe(loop.stop)
+    if _thread is not None:
+        _thread.join(timeout=5)
+    loop.close()
+    _loop = None
+    _thread = None
+
+
+@worker_process_init.connect
+def _on_process_init(**_: Any) -> None:
+    _reset()
+
+
+@worker_process_shutdown.connect
+def _on_process_shutdown(**_: Any) -> None:
+    shutdown()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset)
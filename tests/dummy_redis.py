@@ -5,6 +5,7 @@ class DummyRedis:
     def __init__(self) -> None:
         self.stream: List[Dict[str, Any]] = []
         self.groups: Dict[str, int] = {}
+        self.published: List[tuple[str, Any]] = []
 
     async def xadd(self, stream: str, fields: Dict[str, Any], maxlen=None, approximate=None):
         self.stream.append(fields)
@@ -27,3 +28,7 @@ class DummyRedis:
 
     async def xack(self, stream: str, group: str, eid: Any):
         pass
+
+    async def publish(self, channel: str, message: Any):
+        self.published.append((channel, message))
+        return 0
@@ -103,13 +103,10 @@ async def test_forwarding_single_tenant(monkeypatch):
 
 
 async def test_rate_limit(monkeypatch):
-    from starlette.responses import Response
+    async def deny(self, tenant):
+        return 1.0
 
-    async def deny(self, scope, receive, send):
-        resp = Response("Rate limit", status_code=429)
-        await resp(scope, receive, send)
-
-    monkeypatch.setattr(http_mod.RateLimitMiddleware, "__call__", deny)
+    monkeypatch.setattr(http_mod.AuthHeaderMiddleware, "retry_after", deny)
     async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
         r = await c.get("/v1/devices", headers=OK)
     assert r.status_code == 429
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+
+import httpx
+
+from xyte_mcp import cache, events, utils
+from xyte_mcp.client import XyteAPIClient
+from tests.dummy_redis import DummyRedis
+
+
+class CacheInvalidationTestCase(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant_cache = cache.get_cache("A" * 40)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cache_shared_between_clients(self):
+        async def build():
+            first = XyteAPIClient(api_key="A" * 40)
+            second = XyteAPIClient(api_key="A" * 40)
+            other = XyteAPIClient(api_key="B" * 40)
+            try:
+                return first.cache, second.cache, other.cache
+            finally:
+                for c in (first, second, other):
+                    await c.close()
+
+        first, second, other = asyncio.run(build())
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_caches_keyed_by_full_digest(self):
+        tenant = cache.tenant_key("A" * 40)
+        self.assertEqual(len(tenant), 64)
+        self.assertIs(cache._caches[tenant], self.tenant_cache)
+
+    def test_device_event_patches_in_place(self):
+        self.tenant_cache["device:abc"] = {"id": "abc", "status": "online"}
+        self.tenant_cache["devices"] = {"items": [{"id": "abc", "status": "online"}]}
+
+        cache.apply_event({"type": "device_status_changed", "data": {"id": "abc", "status": "offline"}})
+
+        self.assertEqual(self.tenant_cache["device:abc"]["status"], "offline")
+        self.assertEqual(self.tenant_cache["devices"]["items"][0]["status"], "offline")
+
+    def test_unknown_device_evicts_list(self):
+        self.tenant_cache["devices"] = {"items": [{"id": "abc"}]}
+        cache.apply_event({"type": "device_claimed", "data": {"id": "new", "name": "X"}})
+        self.assertNotIn("devices", self.tenant_cache)
+
+    def test_device_removal_evicts(self):
+        self.tenant_cache["device:abc"] = {"id": "abc", "status": "online"}
+        self.tenant_cache["devices"] = {"items": [{"id": "abc", "status": "online"}]}
+        cache.apply_event({"type": "device_deleted", "data": {"id": "abc", "status": "gone"}})
+        self.assertNotIn("device:abc", self.tenant_cache)
+        self.assertNotIn("devices", self.tenant_cache)
+
+    def test_device_event_copies_known_fields_only(self):
+        self.tenant_cache["device:abc"] = {"id": "abc", "status": "online"}
+        cache.apply_event(
+            {"type": "device_updated", "data": {"id": "abc", "status": "offline", "owner": "x"}}
+        )
+        self.assertEqual(self.tenant_cache["device:abc"], {"id": "abc", "status": "offline"})
+
+    def test_writes_evict_affected_keys(self):
+        key = "A" * 40
+        gets = []
+
+        def handler(request):
+            if request.method == "GET":
+                gets.append(request.url.path)
+                return httpx.Response(200, json={"items": [{"id": "abc"}]})
+            return httpx.Response(200, json={})
+
+        async def run():
+            api = XyteAPIClient(api_key=key, base_url="http://x")
+            api.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            try:
+                await api.get_devices()
+                await api.get_devices()
+                version = cache.version()
+                await api.delete_device("abc")
+                self.assertGreater(cache.version(), version)
+                await api.get_devices()
+                await api.get_tickets()
+                await api.mark_ticket_resolved("1")
+                await api.get_tickets()
+            finally:
+                await api.close()
+
+        asyncio.run(run())
+        self.assertEqual(len(gets), 4)
+
+    def test_payload_hooks_do_not_modify_the_cache(self):
+        cached = {"items": [{"id": "abc"}]}
+        self.tenant_cache["devices"] = cached
+
+        def hook(payload):
+            payload["transformed"] = True
+            payload["items"][0]["seen"] = True
+            return payload
+
+        async def fetch():
+            return self.tenant_cache["devices"]
+
+        utils._PAYLOAD_TRANSFORMS.append(hook)
+        self.addCleanup(utils._PAYLOAD_TRANSFORMS.remove, hook)
+        result = asyncio.run(utils.handle_api("get_devices", fetch(), rate_limit=False))
+        self.assertTrue(result["transformed"])
+        self.assertEqual(cached, {"items": [{"id": "abc"}]})
+
+    def test_incident_event_evicts(self):
+        self.tenant_cache["incidents"] = {"items": []}
+        self.tenant_cache["tickets"] = {"items": []}
+        cache.apply_event({"type": "incident_created", "data": {"id": "1"}})
+        self.assertNotIn("incidents", self.tenant_cache)
+        self.assertIn("tickets", self.tenant_cache)
+
+    def test_event_scoped_to_tenant(self):
+        other = cache.get_cache("B" * 40)
+        other["incidents"] = {"items": []}
+        self.tenant_cache["incidents"] = {"items": []}
+        cache.apply_event({"type": "incident_created", "data": {}}, cache.tenant_key("A" * 40))
+        self.assertNotIn("incidents", self.tenant_cache)
+        self.assertIn("incidents", other)
+
+    def test_push_event_invalidates(self):
+        events.redis = DummyRedis()
+        self.tenant_cache["incidents"] = {"items": []}
+        asyncio.run(events.push_event({"type": "incident_created", "data": {"id": "1"}}))
+        self.assertNotIn("incidents", self.tenant_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from xyte_mcp import circuit, concurrency
+from xyte_mcp.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from xyte_mcp.client import XyteAPIClient
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def test_opens_after_threshold_and_probes_once(self):
+        breaker = CircuitBreaker("ep", failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        with patch("xyte_mcp.circuit.time.monotonic", return_value=breaker.opened_at + 11):
+            self.assertEqual(breaker.state, HALF_OPEN)
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("ep", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        with patch("xyte_mcp.circuit.time.monotonic", return_value=breaker.opened_at + 11):
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, OPEN)
+
+    def test_abandoned_probe_frees_slot(self):
+        breaker = CircuitBreaker("ep", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.abandon()
+        self.assertTrue(breaker.allow())
+
+
+class ClientCircuitTestCase(unittest.TestCase):
+    def tearDown(self):
+        circuit.reset()
+        concurrency.reset()
+
+    def test_failing_endpoint_does_not_block_others(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path.endswith("/histories"):
+                raise httpx.ConnectError("down", request=request)
+            return httpx.Response(200, json={})
+
+        async def run():
+            client = XyteAPIClient(api_key="A" * 40, base_url="http://x")
+            client.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            with patch("xyte_mcp.client.anyio.sleep", return_value=None):
+                with self.assertRaises(httpx.ConnectError):
+                    await client.get_device_histories()
+                with self.assertRaises(httpx.NetworkError) as cm:
+                    await client.get_device_histories()
+            self.assertEqual(str(cm.exception), "backend_unavailable")
+            # A fresh client for the same tenant shares the open breaker
+            other = XyteAPIClient(api_key="A" * 40, base_url="http://x")
+            other.client = client.client
+            with self.assertRaises(httpx.NetworkError):
+                await other.get_device_histories()
+            resp = await other._request("GET", "/devices", endpoint="get_devices")
+            await client.close()
+            return resp.status_code
+
+        self.assertEqual(asyncio.run(run()), 200)
+        self.assertEqual(calls.count("/devices/histories"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
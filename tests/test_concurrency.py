@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from xyte_mcp import concurrency
+from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.concurrency import AdaptiveLimiter, UpstreamBusy, parse_retry_after
+from xyte_mcp.tenant import key_id
+
+
+class AdaptiveLimiterTestCase(unittest.TestCase):
+    def test_additive_increase_multiplicative_decrease(self):
+        async def run():
+            limiter = AdaptiveLimiter("ep", initial=4, maximum=8, queue_size=10)
+            for _ in range(4):
+                await limiter.acquire()
+            for _ in range(4):
+                limiter.release(200, 0.01)
+            grown = limiter.limit
+            await limiter.acquire()
+            limiter.release(429, 0.01)
+            return grown, limiter.limit
+
+        grown, throttled = asyncio.run(run())
+        self.assertGreater(grown, 4)
+        self.assertAlmostEqual(throttled, grown / 2)
+
+    def test_latency_inflation_reduces_limit(self):
+        async def run():
+            limiter = AdaptiveLimiter("ep", initial=10, maximum=10, queue_size=10)
+            await limiter.acquire()
+            limiter.release(200, 0.01)
+            limiter._last_decrease = -1.0
+            await limiter.acquire()
+            limiter.release(200, 0.5)
+            return limiter.limit
+
+        self.assertAlmostEqual(asyncio.run(run()), 9.0)
+
+    def test_queue_waits_for_slot_and_deadline(self):
+        async def run():
+            limiter = AdaptiveLimiter("ep", initial=1, maximum=1, queue_size=1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire(timeout=1))
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.queued, 1)
+            with self.assertRaises(UpstreamBusy):
+                await limiter.acquire(timeout=1)
+            limiter.release(200, 0.01)
+            await waiter
+            self.assertEqual(limiter.in_flight, 1)
+            with self.assertRaises(httpx.TimeoutException):
+                await limiter.acquire(timeout=0.01)
+            self.assertEqual(limiter.queued, 0)
+
+        asyncio.run(run())
+
+    def test_retry_after_pauses_queue(self):
+        async def run():
+            limiter = AdaptiveLimiter("ep", initial=2, maximum=2, queue_size=5)
+            await limiter.acquire()
+            limiter.release(429, 0.01, retry_after=0.05)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await limiter.acquire(timeout=1)
+            return loop.time() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.04)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class ClientConcurrencyTestCase(unittest.TestCase):
+    def tearDown(self):
+        concurrency.reset()
+
+    def test_client_feeds_limiter_per_endpoint(self):
+        def handler(request):
+            if request.url.path.endswith("/incidents"):
+                return httpx.Response(429, headers={"Retry-After": "1"}, json={})
+            return httpx.Response(200, json={"items": []})
+
+        async def run():
+            client = XyteAPIClient(api_key="A" * 40, base_url="http://x")
+            client.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            await client.get_devices()
+            # POST is not retried, so the limiter sees exactly one 429
+            resp = await client._request("POST", "/incidents", endpoint="get_incidents")
+            await client.close()
+            return resp.status_code
+
+        self.assertEqual(asyncio.run(run()), 429)
+        incidents = concurrency.get_limiter(key_id("A" * 40), "get_incidents")
+        devices = concurrency.get_limiter(key_id("A" * 40), "get_devices")
+        self.assertLess(incidents.limit, devices.limit)
+        self.assertGreater(incidents.blocked_until, 0)
+        self.assertEqual(devices.blocked_until, 0)
+
+    def test_full_queue_is_not_retried(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200, json={"items": []})
+
+        async def run():
+            client = XyteAPIClient(api_key="B" * 40, base_url="http://x")
+            client.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            limiter = concurrency.get_limiter(key_id("B" * 40), "get_devices")
+            limiter.queue_size = 0
+            limiter.in_flight = int(limiter.limit)
+            try:
+                with self.assertRaises(UpstreamBusy):
+                    await client._request("GET", "/devices", endpoint="get_devices")
+            finally:
+                await client.close()
+
+        with patch("xyte_mcp.client.anyio.sleep") as backoff:
+            asyncio.run(run())
+        backoff.assert_not_called()
+        self.assertEqual(sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
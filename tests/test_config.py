@@ -29,6 +29,12 @@ class SettingsTestCase(unittest.TestCase):
         validate_settings(settings)
         self.assertTrue(settings.multi_tenant)
 
+    def test_workers_need_celery_backend(self):
+        settings = Settings(XYTE_HTTP_WORKERS=4, XYTE_TASK_BACKEND="local")
+        with self.assertRaisesRegex(ValueError, "XYTE_TASK_BACKEND"):
+            validate_settings(settings)
+        validate_settings(Settings(XYTE_HTTP_WORKERS=4, XYTE_TASK_BACKEND="celery"))
+
 
 if __name__ == "__main__":
     unittest.main()
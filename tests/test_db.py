@@ -0,0 +1,57 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from xyte_mcp import db, tasks
+from xyte_mcp.config import reload_settings
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    def tearDown(self):
+        reload_settings()
+
+    def test_pool_options_from_settings(self):
+        with patch.dict(os.environ, {"XYTE_DB_POOL_SIZE": "7", "XYTE_DB_POOL_RECYCLE": "60"}):
+            reload_settings()
+            options = db._engine_options("postgresql+asyncpg://u:p@h/db")
+        self.assertEqual(options["pool_size"], 7)
+        self.assertEqual(options["pool_recycle"], 60)
+        self.assertTrue(options["pool_pre_ping"])
+
+    def test_sqlite_skips_sizing(self):
+        options = db._engine_options("sqlite+aiosqlite:///tasks.db")
+        self.assertNotIn("pool_size", options)
+
+
+class UpsertTestCase(unittest.TestCase):
+    def test_status_transitions_keep_payload(self):
+        try:
+            import aiosqlite  # noqa: F401
+        except ImportError:  # pragma: no cover - optional dependency
+            self.skipTest("aiosqlite not installed")
+
+        tmp = tempfile.mkdtemp()
+
+        async def run():
+            await db.init_db()
+            await tasks.save(tasks.Task(id="t", status="queued", batch_id="b", payload={"a": 1}))
+            await tasks.save(tasks.Task(id="t", status="done", result={"ok": True}))
+            task = await tasks.fetch("t")
+            self.assertGreaterEqual(db._pool_checked_out(), 0)
+            await db.dispose_engine()
+            return task
+
+        with patch.object(db, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/t.db"):
+            db.reset_engine()
+            task = asyncio.run(run())
+
+        self.assertEqual(task.status, "done")
+        self.assertEqual(task.batch_id, "b")
+        self.assertEqual(task.payload, {"a": 1})
+        self.assertEqual(task.result, {"ok": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
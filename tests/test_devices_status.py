@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import httpx
+
+from xyte_mcp import resources
+from xyte_mcp.utils import MCPError
+
+
+class DummyClient:
+    def __init__(self):
+        self.cache = {"device:1": {"id": "1", "cached": True}}
+        self.fetched = []
+        self.active = 0
+        self.peak = 0
+
+    async def get_device(self, device_id):
+        if f"device:{device_id}" in self.cache:
+            return self.cache[f"device:{device_id}"]
+        self.fetched.append(device_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if device_id == "404":
+            request = httpx.Request("GET", "http://x")
+            response = httpx.Response(404, request=request, text="missing")
+            raise httpx.HTTPStatusError("missing", request=request, response=response)
+        return {"id": device_id}
+
+
+class DevicesStatusTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = DummyClient()
+        self.clients_opened = 0
+
+        @asynccontextmanager
+        async def fake_get_client(request=None):
+            self.clients_opened += 1
+            yield self.client
+
+        patcher = patch("xyte_mcp.resources.get_client", fake_get_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        limit = patch("xyte_mcp.resources.enforce_rate_limit")
+        self.rate_limit = limit.start()
+        self.addCleanup(limit.stop)
+
+    def test_dedupes_uses_cache_and_reports_partial_failures(self):
+        ids = ["1", "2", "2", "404"] + [str(i) for i in range(10, 40)]
+        with patch("xyte_mcp.utils.enforce_rate_limit") as inner:
+            result = asyncio.run(resources.devices_status(None, ids))
+        inner.assert_not_called()
+
+        # One token per upstream request; the cached device costs none
+        self.assertEqual(self.rate_limit.call_count, 32)
+        self.assertEqual(self.clients_opened, 1)
+        self.assertNotIn("1", self.client.fetched)
+        self.assertEqual(self.client.fetched.count("2"), 1)
+        self.assertLessEqual(self.client.peak, 10)
+        self.assertEqual(result["errors"]["404"]["code"], "device_not_found")
+        self.assertEqual(result["devices"]["1"]["cached"], True)
+        self.assertEqual(
+            result["summary"],
+            {"requested": 33, "cached": 1, "fetched": 31, "failed": 1},
+        )
+
+    def test_devices_over_the_rate_limit_are_reported(self):
+        calls = []
+
+        def enforce():
+            calls.append(1)
+            if len(calls) > 2:
+                raise MCPError(code="rate_limited", message="Rate limit exceeded")
+
+        self.rate_limit.side_effect = enforce
+        result = asyncio.run(resources.devices_status(None, ["1", "2", "3", "4"]))
+        self.assertEqual(len(self.client.fetched), 2)
+        self.assertEqual(
+            sorted(code["code"] for code in result["errors"].values()),
+            ["rate_limited"],
+        )
+        self.assertEqual(result["summary"]["failed"], 1)
+
+    def test_fully_cached_call_counts_once(self):
+        asyncio.run(resources.devices_status(None, ["1"]))
+        self.assertEqual(self.rate_limit.call_count, 1)
+
+    def test_rejects_empty_and_oversized_requests(self):
+        for ids in ([], [str(i) for i in range(resources.MAX_STATUS_DEVICES + 1)]):
+            with self.assertRaises(MCPError):
+                asyncio.run(resources.devices_status(None, ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
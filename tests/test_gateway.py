@@ -0,0 +1,162 @@
+import asyncio
+import unittest
+
+import httpx
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from xyte_mcp.auth_xyte import RequireXyteKey
+from xyte_mcp.gateway import GatewayMiddleware, Rejection
+from xyte_mcp.logging_utils import request_id_var, request_var
+from xyte_mcp.tenant import key_id
+
+
+async def whoami(request):
+    return JSONResponse(
+        {
+            "key": getattr(request.state, "xyte_key", None),
+            "key_id": getattr(request.state, "key_id", None),
+            "request_id": request_id_var.get(),
+            "same_request": request_var.get().scope is request.scope,
+        }
+    )
+
+
+class KeyGateway(GatewayMiddleware):
+    def authenticate(self, headers):
+        key = headers.get("x-xyte-api-key")
+        return key if key else Rejection(401, "missing_xyte_key")
+
+
+def _get(app, path, headers=None):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get(path, headers=headers)
+
+    return asyncio.run(run())
+
+
+class GatewayTestCase(unittest.TestCase):
+    def setUp(self):
+        routes = [Route("/whoami", whoami), Route("/healthz", whoami)]
+        self.app = KeyGateway(Starlette(routes=routes), limit_per_minute=2)
+
+    def test_sets_state_and_request_context(self):
+        r = _get(self.app, "/whoami", {"X-Xyte-API-Key": "secret"})
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertEqual(body["key"], "secret")
+        self.assertEqual(body["key_id"], key_id("secret"))
+        self.assertTrue(body["request_id"])
+        self.assertTrue(body["same_request"])
+
+    def test_rejection(self):
+        r = _get(self.app, "/whoami")
+        self.assertEqual(r.status_code, 401)
+        self.assertEqual(r.json(), {"error": "missing_xyte_key"})
+
+    def test_rate_limit_sets_retry_after(self):
+        codes = [_get(self.app, "/whoami", {"X-Xyte-API-Key": "k"}) for _ in range(3)]
+        self.assertEqual([r.status_code for r in codes], [200, 200, 429])
+        self.assertEqual(codes[-1].json(), {"error": "rate_limit"})
+        self.assertEqual(codes[-1].headers["Retry-After"], "30")
+
+    def test_public_paths_skip_auth_and_limits(self):
+        codes = [_get(self.app, "/healthz").status_code for _ in range(5)]
+        self.assertEqual(codes, [200] * 5)
+
+    def test_streaming_body_is_not_buffered(self):
+        release = asyncio.Event()
+
+        async def stream(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"a", "more_body": True})
+            await release.wait()
+            await send({"type": "http.response.body", "body": b"b"})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body") == b"a":
+                release.set()
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/healthz",
+            "headers": [],
+            "query_string": b"",
+        }
+        asyncio.run(asyncio.wait_for(GatewayMiddleware(stream)(scope, receive, send), 1))
+        self.assertEqual([m.get("body") for m in sent], [None, b"a", b"b"])
+
+
+class RequireXyteKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = RequireXyteKey(Starlette(routes=[Route("/whoami", whoami)]))
+
+    def test_missing_and_short_keys(self):
+        self.assertEqual(_get(self.app, "/whoami").status_code, 401)
+        r = _get(self.app, "/whoami", {"Authorization": "Bearer short"})
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(r.json(), {"error": "invalid_xyte_key"})
+
+    def test_bearer_key_accepted(self):
+        key = "k" * 40
+        r = _get(self.app, "/whoami", {"Authorization": f"Bearer {key}"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["key_id"], key_id(key))
+
+
+def _count(method, path, status):
+    value = REGISTRY.get_sample_value(
+        "xyte_http_requests_total", {"method": method, "path": path, "status": status}
+    )
+    return value or 0.0
+
+
+class PathLabelTestCase(unittest.TestCase):
+    def setUp(self):
+        inner = Starlette(routes=[Route("/task/{task_id}", whoami)])
+        self.app = GatewayMiddleware(
+            Starlette(routes=[Mount("/v1", app=inner)]), max_paths=2
+        )
+
+    def test_ids_share_the_route_template(self):
+        before = _count("GET", "/v1/task/{task_id}", "200")
+        for task_id in ("a", "b", "c"):
+            self.assertEqual(_get(self.app, f"/v1/task/{task_id}").status_code, 200)
+        self.assertEqual(_count("GET", "/v1/task/{task_id}", "200") - before, 3)
+        self.assertEqual(_count("GET", "/v1/task/a", "200"), 0)
+
+    def test_unknown_paths_and_methods_are_folded(self):
+        before = _count("OTHER", "unmatched", "404")
+
+        async def run():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+                await c.request("BREW", "/nope/1")
+                await c.request("BREW", "/nope/2")
+
+        asyncio.run(run())
+        self.assertEqual(_count("OTHER", "unmatched", "404") - before, 2)
+
+    def test_labels_beyond_the_limit_overflow(self):
+        routes = [Route(f"/r{i}", whoami) for i in range(3)]
+        app = GatewayMiddleware(Starlette(routes=routes), max_paths=2)
+        before = _count("GET", "__overflow__", "200")
+        for i in range(3):
+            _get(app, f"/r{i}")
+        self.assertEqual(_count("GET", "/r1", "200"), 1)
+        self.assertEqual(_count("GET", "__overflow__", "200") - before, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
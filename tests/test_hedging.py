@@ -0,0 +1,112 @@
+import asyncio
+import os
+import unittest
+
+import httpx
+
+from xyte_mcp import circuit, concurrency, hedging, retry
+from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.config import get_settings
+from xyte_mcp.hedging import Hedger
+
+
+def primed(budget_ratio=1.0):
+    hedger = Hedger("ep", percentile=0.9, budget_ratio=budget_ratio)
+    for _ in range(hedging.MIN_SAMPLES):
+        hedger.record(0.01)
+    return hedger
+
+
+class HedgerTestCase(unittest.TestCase):
+    def test_no_hedge_without_history(self):
+        self.assertIsNone(Hedger("ep", 0.9, 1.0).delay())
+        self.assertAlmostEqual(primed().delay(), 0.01)
+
+    def test_hedge_wins_and_primary_is_cancelled(self):
+        hedger = primed()
+        calls = []
+        cancelled = []
+
+        async def send():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+            return httpx.Response(200, text=str(len(calls)))
+
+        async def run():
+            resp = await hedger.run(send)
+            await asyncio.sleep(0)
+            return resp
+
+        resp = asyncio.run(run())
+        self.assertEqual(resp.text, "2")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cancelled, [True])
+
+    def test_failed_primary_falls_back_to_hedge(self):
+        hedger = primed()
+        calls = []
+
+        async def send():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.05)
+                raise httpx.ReadError("reset")
+            await asyncio.sleep(0.1)
+            return httpx.Response(200)
+
+        self.assertEqual(asyncio.run(hedger.run(send)).status_code, 200)
+
+    def test_budget_limits_hedges(self):
+        hedger = primed(budget_ratio=0.0)
+        hedger.budget.balance = 0
+        calls = []
+
+        async def send():
+            calls.append(1)
+            await asyncio.sleep(0.03)
+            return httpx.Response(200)
+
+        asyncio.run(hedger.run(send))
+        self.assertEqual(len(calls), 1)
+
+
+class ClientHedgingTestCase(unittest.TestCase):
+    def tearDown(self):
+        os.environ.pop("XYTE_HEDGE_ENDPOINTS", None)
+        get_settings.cache_clear()
+        for module in (circuit, concurrency, hedging, retry):
+            module.reset()
+
+    def test_only_configured_gets_are_hedged(self):
+        os.environ["XYTE_HEDGE_ENDPOINTS"] = '["get_device"]'
+        get_settings.cache_clear()
+        for _ in range(hedging.MIN_SAMPLES):
+            hedging.get_hedger("get_device").record(0.001)
+        self.assertIsNone(hedging.get_hedger("get_devices"))
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.path)
+            if calls.count(request.url.path) == 1:
+                await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"id": 1})
+
+        async def run():
+            client = XyteAPIClient(api_key="A" * 40, base_url="http://x")
+            client.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            await client.get_device("1")
+            await client.close()
+
+        asyncio.run(run())
+        self.assertEqual(calls, ["/devices/1", "/devices/1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
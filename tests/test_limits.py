@@ -0,0 +1,71 @@
+import asyncio
+import os
+import unittest
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from xyte_mcp.config import get_settings
+from xyte_mcp.gateway import GatewayMiddleware
+from xyte_mcp.limits import TenantRateLimiter, tenant_limit
+from xyte_mcp.tenant import key_id
+
+
+class TenantRateLimiterTestCase(unittest.TestCase):
+    def tearDown(self):
+        os.environ.pop("XYTE_RATE_LIMIT_TIERS", None)
+        os.environ.pop("XYTE_TENANT_TIERS", None)
+        get_settings.cache_clear()
+
+    def test_allows_limit_per_window(self):
+        limiter = TenantRateLimiter()
+        results = [limiter.check("a", 6, now=0.0) for _ in range(7)]
+        self.assertEqual(results[:6], [0.0] * 6)
+        self.assertAlmostEqual(results[6], 10.0)
+        # One request's worth of quota is restored every 10 seconds
+        self.assertEqual(limiter.check("a", 6, now=10.0), 0.0)
+        self.assertGreater(limiter.check("a", 6, now=10.0), 0.0)
+
+    def test_memory_is_bounded(self):
+        limiter = TenantRateLimiter(max_tenants=10)
+        for i in range(100):
+            limiter.check(f"t{i}", 5, now=0.0)
+        self.assertEqual(len(limiter), 10)
+
+    def test_tier_limits(self):
+        os.environ["XYTE_RATE_LIMIT_TIERS"] = '{"pro": 600}'
+        os.environ["XYTE_TENANT_TIERS"] = '{"abcd1234": "pro"}'
+        get_settings.cache_clear()
+        self.assertEqual(tenant_limit("abcd1234"), 600)
+        self.assertEqual(tenant_limit("other", 30), 30)
+
+
+class FairnessTestCase(unittest.TestCase):
+    def test_noisy_tenant_does_not_starve_others(self):
+        async def ok(request):
+            return PlainTextResponse("ok")
+
+        app = GatewayMiddleware(Starlette(routes=[Route("/", ok)]), limit_per_minute=20)
+        noisy = {"X-Xyte-API-Key": "N" * 40}
+        quiet = [{"X-Xyte-API-Key": f"{i}" * 40} for i in range(5)]
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+                async def hit(headers, n):
+                    return [(await c.get("/", headers=headers)).status_code for _ in range(n)]
+
+                return await asyncio.gather(hit(noisy, 200), *(hit(h, 10) for h in quiet))
+
+        noisy_codes, *quiet_codes = asyncio.run(run())
+        self.assertEqual(noisy_codes.count(200), 20)
+        self.assertEqual(noisy_codes.count(429), 180)
+        for codes in quiet_codes:
+            self.assertEqual(codes, [200] * 10)
+        self.assertIn(key_id("N" * 40), app.limiter._tat)
+
+
+if __name__ == "__main__":
+    unittest.main()
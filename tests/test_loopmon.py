@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import unittest
+
+os.environ.setdefault("XYTE_API_KEY", "test")
+
+from xyte_mcp import loopmon  # noqa: E402
+from xyte_mcp.config import reload_settings  # noqa: E402
+from xyte_mcp.logging_utils import instrument  # noqa: E402
+
+
+async def busy_then_wait():
+    time.sleep(0.05)
+    await asyncio.sleep(0.1)
+    return "done"
+
+
+async def hog_the_loop():
+    await asyncio.sleep(0)
+    time.sleep(0.6)
+
+
+def _events(logs, name):
+    return [json.loads(m.split(":", 2)[2]) for m in logs.output if f'"event": "{name}"' in m]
+
+
+class LoopTimerTestCase(unittest.TestCase):
+    def test_splits_busy_and_waiting_time(self):
+        async def run():
+            timer = loopmon.LoopTimer(busy_then_wait())
+            start = time.perf_counter()
+            result = await timer
+            return result, timer.busy, time.perf_counter() - start
+
+        result, busy, wall = asyncio.run(run())
+        self.assertEqual(result, "done")
+        self.assertGreaterEqual(busy, 0.05)
+        self.assertLess(busy, 0.09)
+        self.assertGreaterEqual(wall - busy, 0.09)
+
+    def test_exceptions_and_cancellation_reach_the_coroutine(self):
+        seen = []
+
+        async def sleeper():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                seen.append("cancelled")
+                raise
+
+        async def run():
+            task = asyncio.ensure_future(loopmon.LoopTimer(sleeper()))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(seen, ["cancelled"])
+
+    def test_awaits_any_awaitable(self):
+        async def run():
+            future = asyncio.get_running_loop().create_future()
+            asyncio.get_running_loop().call_later(0.01, future.set_result, 42)
+            return await loopmon.LoopTimer(future)
+
+        self.assertEqual(asyncio.run(run()), 42)
+
+    def test_instrument_logs_loop_time(self):
+        with self.assertLogs("xyte_mcp", logging.INFO) as logs:
+            asyncio.run(instrument("tool", "busy")(busy_then_wait)())
+        (complete,) = _events(logs, "tool_complete")
+        self.assertGreaterEqual(complete["loop_ms"], 50)
+        self.assertGreaterEqual(complete["duration_ms"], 150)
+
+
+class SlowCallbackTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["XYTE_SLOW_CALLBACK_SECONDS"] = "0.1"
+        reload_settings()
+
+    def tearDown(self):
+        os.environ.pop("XYTE_SLOW_CALLBACK_SECONDS")
+        reload_settings()
+
+    def test_blocking_callback_is_reported_with_stack(self):
+        async def run():
+            loopmon.ensure_started()
+            # Let the watchdog post its first ping
+            await asyncio.sleep(0.2)
+            await asyncio.create_task(hog_the_loop(), name="hog")
+
+        before = loopmon.SLOW_CALLBACKS._value.get()
+        with self.assertLogs("xyte_mcp", logging.WARNING) as logs:
+            asyncio.run(run())
+        self.assertGreater(loopmon.SLOW_CALLBACKS._value.get(), before)
+        report = _events(logs, "slow_callback")[0]
+        self.assertEqual(report["task"], "hog")
+        self.assertEqual(report["coroutine"], "hog_the_loop")
+        self.assertTrue(any("hog_the_loop" in line for line in report["stack"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
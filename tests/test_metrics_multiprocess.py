@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from xyte_mcp import metrics, transport  # noqa: F401 - registers its collector
+
+# Record one proxied request, as a worker serving it would
+WORKER = (
+    "from xyte_mcp.logging_utils import HTTP_REQUEST_COUNT\n"
+    "from xyte_mcp import transport\n"
+    "HTTP_REQUEST_COUNT.labels('GET', '/v1/healthz', 200).inc()\n"
+    "transport.ACTIVE_STREAMS.labels(host='x').inc()\n"
+)
+SCRAPE = "import sys\nfrom xyte_mcp import metrics, transport\nsys.stdout.write(metrics.render().decode())\n"
+
+
+def _run(code, directory):
+    env = {**os.environ, "XYTE_API_KEY": "test", metrics.MULTIPROC_ENV: directory}
+    env["PYTHONPATH"] = os.pathsep.join(["src", env.get("PYTHONPATH", "")])
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, env=env, text=True, check=True
+    )
+    return result.stdout
+
+
+class MultiprocessMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def test_render_merges_workers(self):
+        _run(WORKER, self.dir)
+        _run(WORKER, self.dir)
+        text = _run(SCRAPE, self.dir)
+        self.assertIn(
+            'xyte_http_requests_total{method="GET",path="/v1/healthz",status="200"} 2.0',
+            text,
+        )
+        # Exited workers no longer count towards live gauges
+        self.assertNotIn('xyte_upstream_active_streams{host="x"}', text)
+        # Process-local collectors are reported by the scraped worker
+        self.assertIn("xyte_upstream_connections 0.0", text)
+
+    def test_prepare_clears_previous_run(self):
+        stale = Path(self.dir, "counter_1.db")
+        stale.write_bytes(b"")
+        metrics.prepare_multiprocess(self.dir)
+        try:
+            self.assertFalse(stale.exists())
+            self.assertEqual(os.environ[metrics.MULTIPROC_ENV], self.dir)
+        finally:
+            os.environ.pop(metrics.MULTIPROC_ENV)
+
+    def test_reap_removes_gauges_of_dead_workers(self):
+        pid = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        dead = Path(self.dir, f"gauge_livesum_{pid}.db")
+        alive = Path(self.dir, f"gauge_livesum_{os.getpid()}.db")
+        dead.write_bytes(b"")
+        alive.write_bytes(b"")
+        metrics.reap_dead_workers(self.dir)
+        self.assertFalse(dead.exists())
+        self.assertTrue(alive.exists())
+
+    def test_single_process_uses_default_registry(self):
+        self.assertIsNone(metrics.multiprocess_dir())
+        self.assertIn(b"xyte_upstream_connections 0.0", metrics.render())
+
+    def test_render_reuses_recent_exposition(self):
+        first = metrics.render(max_age=60)
+        transport.ACTIVE_STREAMS.labels(host="render-cache").inc()
+        self.assertIs(metrics.render(max_age=60), first)
+        self.assertIn(b'host="render-cache"', metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+import unittest
+
+os.environ.setdefault("XYTE_API_KEY", "test")
+
+from xyte_mcp import cache, inventory, loopmon, offload  # noqa: E402
+from xyte_mcp.config import reload_settings  # noqa: E402
+
+DEVICES = [
+    {"id": str(i), "name": f"Room {i}", "model": "XY-100" if i % 2 else "XY-200", "status": "online"}
+    for i in range(50)
+]
+
+
+class InventoryTestCase(unittest.TestCase):
+    def test_parse_query(self):
+        kind, text, filters = inventory.parse_query('type:devices q:room model:contains:"XY-1"')
+        self.assertEqual(kind, "devices")
+        self.assertEqual(text, "room")
+        self.assertEqual(filters, {"model": {"op": "contains", "value": "xy-1"}})
+
+    def test_extract_wrapped_records(self):
+        self.assertEqual(inventory.extract_records("tickets", {"data": {"tickets": [1]}}), [1])
+        self.assertEqual(inventory.extract_records("devices", {"items": [2]}), [2])
+        self.assertEqual(inventory.extract_records("devices", "bad"), [])
+
+    def test_match_records(self):
+        filters = {"model": {"op": "eq", "value": "xy-100"}}
+        matches = inventory.match_records(DEVICES, "devices", "room 1", filters)
+        self.assertEqual([m[1] for m in matches][:2], ["device_1", "device_11"])
+        idx, _, result = matches[0]
+        self.assertIs(DEVICES[idx], DEVICES[1])
+        self.assertEqual(result["url"], "/devices/1")
+
+
+class OffloadTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["XYTE_OFFLOAD_WORKERS"] = "1"
+        os.environ["XYTE_OFFLOAD_MIN_ITEMS"] = "10"
+        reload_settings()
+
+    def tearDown(self):
+        offload.shutdown()
+        os.environ.pop("XYTE_OFFLOAD_WORKERS")
+        os.environ.pop("XYTE_OFFLOAD_MIN_ITEMS")
+        reload_settings()
+
+    def _search(self, records):
+        args = ("devices", None, {"model": {"op": "eq", "value": "xy-200"}})
+        return asyncio.run(offload.map_records(inventory.match_records, records, *args))
+
+    def test_large_inventory_matches_inline_result(self):
+        filters = {"model": {"op": "eq", "value": "xy-200"}}
+        expected = inventory.match_records(DEVICES, "devices", None, filters)
+        before = offload.OFFLOADED.labels(task="match_records")._value.get()
+        self.assertEqual(self._search(DEVICES), expected)
+        self.assertEqual(self._search(DEVICES), expected)
+        self.assertEqual(offload.OFFLOADED.labels(task="match_records")._value.get(), before + 2)
+
+    def test_inventory_pickled_once_per_version(self):
+        self._search(DEVICES)
+        key, blob = offload._snapshot(DEVICES)
+        self._search(DEVICES)
+        self.assertEqual(offload._snapshot(DEVICES), (key, blob))
+        self.assertNotEqual(offload._snapshot(list(DEVICES))[0], key)
+
+    def test_patched_inventory_is_pickled_again(self):
+        devices = [dict(d) for d in DEVICES]
+        cache.get_cache("offload-key")["devices"] = devices
+        self.addCleanup(cache.clear)
+        self.assertEqual(len(self._search(devices)), 25)
+        cache.apply_event(
+            {"type": "device.updated", "data": {"id": "1", "model": "XY-200"}},
+            tenant=None,
+        )
+        self.assertEqual(devices[1]["model"], "XY-200")
+        self.assertEqual(len(self._search(devices)), 26)
+
+    def test_small_inventory_stays_inline(self):
+        before = offload.OFFLOADED.labels(task="match_records")._value.get()
+        self._search(DEVICES[:5])
+        self.assertEqual(offload.OFFLOADED.labels(task="match_records")._value.get(), before)
+
+    def test_disabled_pool_runs_inline(self):
+        os.environ["XYTE_OFFLOAD_WORKERS"] = "0"
+        reload_settings()
+        self.assertEqual(asyncio.run(offload.run(sorted, [3, 1, 2])), [1, 2, 3])
+        self.assertIsNone(offload._pool)
+
+
+class LoopLagTestCase(unittest.TestCase):
+    def test_blocked_loop_is_recorded(self):
+        os.environ["XYTE_LOOP_LAG_INTERVAL"] = "0.01"
+        reload_settings()
+
+        async def block():
+            loopmon.ensure_started()
+            await asyncio.sleep(0.02)
+            time.sleep(0.2)
+            await asyncio.sleep(0.05)
+
+        try:
+            before = loopmon.LOOP_LAG._sum.get()
+            asyncio.run(block())
+            self.assertGreater(loopmon.LOOP_LAG._sum.get() - before, 0.1)
+        finally:
+            os.environ.pop("XYTE_LOOP_LAG_INTERVAL")
+            reload_settings()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from redis.exceptions import ConnectionError, NoScriptError
+
+from xyte_mcp import rate_limiter
+
+
+class FakeRedis:
+    """Python model of ``bucket.lua`` counting round trips."""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.calls = 0
+        self.loads = 0
+        self.fail = False
+        self.flush_script = False
+
+    async def script_load(self, lua):
+        self.loads += 1
+        return "sha"
+
+    async def evalsha(self, sha, numkeys, key, limit, ttl, size):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        if self.flush_script:
+            self.flush_script = False
+            raise NoScriptError("NOSCRIPT")
+        used = self.counts.get(key, 0)
+        grant = max(min(int(size), int(limit) - used), 0)
+        self.counts[key] = used + grant
+        return [grant, int(ttl) * 1000]
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        rate_limiter.reset()
+        self.redis = FakeRedis()
+        rate_limiter._redis = self.redis
+
+    def tearDown(self):
+        rate_limiter.reset()
+
+    def _consume(self, n, key="k", limit=20):
+        async def run():
+            return [await rate_limiter.consume(key, limit=limit) for _ in range(n)]
+
+        return asyncio.run(run())
+
+    def test_leases_quota_in_chunks(self):
+        results = self._consume(25)
+        self.assertEqual(results, [True] * 20 + [False] * 5)
+        # Two leases of 10 plus one exhausted lookup; later denials stay local
+        self.assertEqual(self.redis.calls, 3)
+        self.assertEqual(self.redis.loads, 1)
+
+    def test_shared_window_across_processes(self):
+        self._consume(5)
+        # A second process draws from the same Redis window
+        rate_limiter._buckets.clear()
+        self.assertEqual(self._consume(15), [True] * 10 + [False] * 5)
+
+    def test_reloads_flushed_script(self):
+        self.redis.flush_script = True
+        self.assertEqual(self._consume(1), [True])
+        self.assertEqual(self.redis.loads, 2)
+
+    def test_falls_back_to_local_window(self):
+        self.redis.fail = True
+        self.assertEqual(self._consume(22), [True] * 20 + [False] * 2)
+        # Redis is not retried until the back-off expires
+        self.assertEqual(self.redis.calls, 1)
+
+        self.redis.fail = False
+        with patch("xyte_mcp.rate_limiter.REDIS_RETRY_SECONDS", 0):
+            rate_limiter._redis_down_until = 0.0
+            self.assertEqual(self._consume(1, key="other"), [True])
+        self.assertEqual(self.redis.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
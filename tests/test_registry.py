@@ -0,0 +1,109 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+
+from xyte_mcp import registry
+from xyte_mcp.logging_utils import instrument
+
+
+async def add(a: int, b: int = 1) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+def _server(snapshot=None) -> FastMCP:
+    server = FastMCP("test")
+    if snapshot is not None:
+        registry.install(server, snapshot)
+    server.tool()(instrument("tool", "add")(add))
+    return server
+
+
+class RegistrySnapshotTestCase(unittest.TestCase):
+    def test_snapshot_tools_match_generated_schemas(self):
+        snapshot = registry.build_snapshot(_server())
+        server = _server(snapshot)
+        tool = server._tool_manager.get_tool("add")
+        self.assertIsInstance(tool, registry.SnapshotTool)
+        self.assertIsNone(tool.fn_metadata)
+
+        listed = asyncio.run(server.list_tools())
+        expected = asyncio.run(_server().list_tools())
+        self.assertEqual(
+            [t.model_dump() for t in listed], [t.model_dump() for t in expected]
+        )
+
+    def test_snapshot_tool_validates_arguments_on_first_call(self):
+        server = _server(registry.build_snapshot(_server()))
+        result = asyncio.run(server._tool_manager.call_tool("add", {"a": "2"}))
+        self.assertEqual(result, 3)
+        with self.assertRaises(ToolError):
+            asyncio.run(server._tool_manager.call_tool("add", {"a": "x"}))
+
+    def test_server_tools_take_the_snapshot_path(self):
+        # Fails when an mcp upgrade makes registry.install fall back to normal
+        # registration: the server still works, without the snapshot speed-up
+        from xyte_mcp.server import mcp
+
+        snapshot = registry.build_snapshot(mcp)
+        server = FastMCP("test")
+        registry.install(server, snapshot)
+        for tool in mcp._tool_manager.list_tools():
+            server.tool(
+                name=tool.name, description=tool.description, annotations=tool.annotations
+            )(tool.fn)
+
+        tools = server._tool_manager.list_tools()
+        self.assertEqual(len(tools), len(snapshot["tools"]))
+        for tool in tools:
+            self.assertIsInstance(tool, registry.SnapshotTool, tool.name)
+        listed = asyncio.run(server.list_tools())
+        expected = asyncio.run(mcp.list_tools())
+        self.assertEqual(
+            [t.model_dump() for t in listed], [t.model_dump() for t in expected]
+        )
+
+    def test_unsupported_internals_use_normal_registration(self):
+        snapshot = registry.build_snapshot(_server())
+        server = FastMCP("test")
+        del server._tool_manager._tools
+        registry.install(server, snapshot)
+        self.assertFalse(hasattr(server._tool_manager, "_tools"))
+        self.assertNotIn("add_tool", vars(server._tool_manager))
+
+    def test_unknown_registration_options_use_normal_registration(self):
+        calls = []
+        server = FastMCP("test")
+        manager = server._tool_manager
+
+        def add_tool(fn, name=None, description=None, annotations=None, **options):
+            calls.append(options)
+            return "registered normally"
+
+        manager.add_tool = add_tool
+        registry.install(server, registry.build_snapshot(_server()))
+        self.assertEqual(manager.add_tool(add, name="add", title="Add"), "registered normally")
+        self.assertEqual(calls, [{"title": "Add"}])
+
+    def test_unknown_tools_use_normal_registration(self):
+        server = _server({"hash": "", "tools": {}})
+        self.assertNotIsInstance(server._tool_manager.get_tool("add"), registry.SnapshotTool)
+
+    def test_load_snapshot_checks_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "snapshot.json"
+            self.assertIsNone(registry.load_snapshot(path))
+            snapshot = registry.build_snapshot(_server())
+            path.write_text(json.dumps(snapshot))
+            self.assertEqual(registry.load_snapshot(path), snapshot)
+            path.write_text(json.dumps({**snapshot, "hash": "stale"}))
+            self.assertIsNone(registry.load_snapshot(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+import anyio
+import httpx
+
+from xyte_mcp import circuit, concurrency, retry
+from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.config import get_settings
+from xyte_mcp.models import CommandRequest
+from xyte_mcp.retry import RetryBudget, backoff_delay, is_retryable
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_idempotency(self):
+        request = httpx.Request("POST", "http://x")
+        self.assertTrue(is_retryable("GET", status=503))
+        self.assertFalse(is_retryable("GET", status=500))
+        self.assertTrue(is_retryable("GET", httpx.ReadTimeout("t", request=request)))
+        self.assertFalse(is_retryable("POST", status=503))
+        self.assertFalse(is_retryable("POST", httpx.ReadTimeout("t", request=request)))
+        self.assertTrue(is_retryable("POST", httpx.ConnectError("c", request=request)))
+        self.assertFalse(is_retryable("GET", concurrency.UpstreamBusy("upstream_busy")))
+
+    def test_backoff_is_jittered_and_capped(self):
+        delays = [backoff_delay(10) for _ in range(100)]
+        self.assertTrue(all(0 <= d <= retry.MAX_DELAY for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(backoff_delay(1, retry_after=5.0), 5.0)
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, capacity=1)
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+        budget.record_request()
+        budget.record_request()
+        self.assertTrue(budget.try_spend())
+
+
+class ClientRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ["XYTE_CIRCUIT_FAILURES"] = "1000"
+        get_settings.cache_clear()
+
+    def tearDown(self):
+        os.environ.pop("XYTE_CIRCUIT_FAILURES", None)
+        get_settings.cache_clear()
+        circuit.reset()
+        concurrency.reset()
+        retry.reset()
+
+    def _run(self, handler, call):
+        async def run():
+            client = XyteAPIClient(api_key="A" * 40, base_url="http://x")
+            client.client = httpx.AsyncClient(
+                base_url="http://x", transport=httpx.MockTransport(handler)
+            )
+            try:
+                with patch("xyte_mcp.client.anyio.sleep", return_value=None):
+                    return await call(client)
+            finally:
+                await client.close()
+
+        return asyncio.run(run())
+
+    def test_get_retried_until_success(self):
+        codes = iter([503, 502, 200])
+        resp = self._run(
+            lambda r: httpx.Response(next(codes), json={}),
+            lambda c: c._request("GET", "/devices", endpoint="get_devices"),
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_post_not_retried_after_send(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ReadTimeout("slow", request=request)
+
+        command = CommandRequest(name="reboot", friendly_name="Reboot")
+        with self.assertRaises(httpx.ReadTimeout):
+            self._run(handler, lambda c: c.send_command("1", command))
+        self.assertEqual(len(calls), 1)
+
+    def test_post_retried_when_never_sent(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={})
+
+        command = CommandRequest(name="reboot", friendly_name="Reboot")
+        self._run(handler, lambda c: c.send_command("1", command))
+        self.assertEqual(len(calls), 2)
+
+    def test_budget_caps_amplification(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503, json={})
+
+        async def brownout(client):
+            for _ in range(100):
+                await client._request("GET", "/devices", endpoint="get_devices")
+
+        self._run(handler, brownout)
+        # 100 requests with up to 2 retries each would be 300 attempts
+        self.assertLess(len(calls), 100 + 10 + 100 * 0.2 + 5)
+
+    def test_retry_respects_deadline(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503, headers={"Retry-After": "5"}, json={})
+
+        async def call(client):
+            with anyio.fail_after(1):
+                return await client._request("GET", "/devices", endpoint="get_devices")
+
+        self.assertEqual(self._run(handler, call).status_code, 503)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
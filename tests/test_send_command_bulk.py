@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import httpx
+from pydantic import ValidationError
+
+from xyte_mcp.logging_utils import request_var
+from xyte_mcp.models import SendCommandBulkRequest
+from xyte_mcp.tools import device as device_tools
+from xyte_mcp.utils import MCPError
+
+INVENTORY = {
+    "items": [
+        {"id": 1, "name": "Amp", "type": "amplifier", "space_name": "Building A / Hall"},
+        {"id": 2, "name": "Amp", "type": "amplifier", "space_name": "Building A / Lobby"},
+        {"id": 3, "name": "Amp", "type": "amplifier", "space_name": "Building B"},
+        {"id": 4, "name": "Display", "type": "display", "space_name": "Building A / Hall"},
+    ]
+}
+
+
+class DummyClient:
+    def __init__(self):
+        self.sent = []
+
+    async def get_devices(self):
+        return INVENTORY
+
+    async def send_command(self, device_id, command):
+        await asyncio.sleep(0)
+        if device_id == "2":
+            request = httpx.Request("POST", "http://x")
+            response = httpx.Response(503, request=request, text="busy")
+            raise httpx.HTTPStatusError("busy", request=request, response=response)
+        self.sent.append((device_id, command.name))
+        return {"ok": True}
+
+
+class DummyCtx:
+    def __init__(self):
+        self.progress = []
+
+    async def info(self, message):
+        pass
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.progress.append((progress, total))
+
+
+class SendCommandBulkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = DummyClient()
+
+        self.requests = []
+
+        @asynccontextmanager
+        async def fake_get_client(request=None):
+            self.requests.append(request)
+            yield self.client
+
+        for target in (
+            patch("xyte_mcp.tools.device.get_client", fake_get_client),
+            patch("xyte_mcp.tools.device.enforce_rate_limit"),
+            patch("xyte_mcp.utils.enforce_rate_limit"),
+        ):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def _run(self, ctx=None, **kwargs):
+        data = SendCommandBulkRequest(name="mute", friendly_name="Mute", **kwargs)
+        return asyncio.run(device_tools.send_command_bulk(data, ctx or DummyCtx()))
+
+    def test_query_selects_from_inventory(self):
+        ctx = DummyCtx()
+        result = self._run(ctx, query="amplifier hall")
+        self.assertEqual(result.data, {"sent": ["1"], "failed": {}})
+        result = self._run(ctx, query="Amplifier")
+        self.assertEqual(
+            result.data, {"sent": ["1", "3"], "failed": {"2": "service_unavailable"}}
+        )
+        self.assertEqual(ctx.progress[-1], (3, 3))
+
+    def test_explicit_ids_are_deduped(self):
+        result = self._run(device_ids=["1", "1", "3"])
+        self.assertEqual(result.data["sent"], ["1", "3"])
+
+    def test_client_uses_the_request_key(self):
+        request = object()
+        token = request_var.set(request)
+        self.addCleanup(request_var.reset, token)
+        self._run(device_ids=["1"])
+        self.assertEqual(self.requests, [request])
+
+    def test_each_device_counts_against_the_rate_limit(self):
+        calls = []
+
+        def enforce():
+            calls.append(1)
+            if len(calls) > 2:
+                raise MCPError(code="rate_limited", message="Rate limit exceeded")
+
+        with patch("xyte_mcp.tools.device.enforce_rate_limit", enforce):
+            result = self._run(device_ids=["1", "3", "4"])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(result.data["failed"], {"4": "rate_limited"})
+
+    def test_dry_run_sends_nothing(self):
+        result = self._run(query="amp", dry_run=True)
+        self.assertEqual(result.data, {"dry_run": True, "device_ids": ["1", "2", "3"]})
+        self.assertEqual(self.client.sent, [])
+
+    def test_guards(self):
+        with self.assertRaises(MCPError) as cm:
+            self._run(query="amp", max_devices=2)
+        self.assertEqual(cm.exception.code, "too_many_devices")
+        with self.assertRaises(MCPError):
+            self._run(query="projector")
+        with self.assertRaises(ValidationError):
+            SendCommandBulkRequest(name="mute", friendly_name="Mute")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+# Dependencies that only specific features need and must not slow down startup
+DEFERRED = ["sqlmodel", "sqlalchemy", "redis", "opentelemetry.sdk", "yaml", "celery"]
+
+
+class StartupImportsTestCase(unittest.TestCase):
+    def test_server_startup_defers_optional_backends(self):
+        code = (
+            "import json, sys\n"
+            "import xyte_mcp.server as server\n"
+            "server.get_server()\n"
+            f"print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))\n"
+        )
+        env = {**os.environ, "XYTE_API_KEY": "test"}
+        env["PYTHONPATH"] = os.pathsep.join(["src", env.get("PYTHONPATH", "")])
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, env=env, text=True, check=True
+        )
+        self.assertEqual(json.loads(result.stdout.splitlines()[-1]), [])
+
+    def test_sample_plugin_registered_in_chatgpt_mode(self):
+        code = (
+            "from xyte_mcp import server, utils\n"
+            "server.get_server()\n"
+            "print([h.__name__ for h in utils._PAYLOAD_TRANSFORMS])\n"
+        )
+        env = {**os.environ, "XYTE_API_KEY": "test", "CHATGPT_MODE": "true"}
+        env["PYTHONPATH"] = os.pathsep.join(["src", env.get("PYTHONPATH", "")])
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, env=env, text=True, check=True
+        )
+        self.assertIn("add_transformed_flag", result.stdout.splitlines()[-1])
+
+    def test_task_model_loads_on_demand(self):
+        from xyte_mcp import tasks
+        from xyte_mcp.task_model import Task
+
+        self.assertIs(tasks.Task, Task)
+
+
+class HttpMainTestCase(unittest.TestCase):
+    def _run_main(self, run):
+        os.environ.setdefault("XYTE_API_KEY", "test")
+        from xyte_mcp import http as http_mod
+
+        with patch("uvicorn.run", run):
+            http_mod.main()
+
+    def test_runs_on_uvicorn_without_jitter_option(self):
+        calls = []
+
+        # uvicorn.run as of 0.34, which has no limit_max_requests_jitter
+        def run(app, *, host="127.0.0.1", port=8000, workers=None,
+                limit_max_requests=None, timeout_graceful_shutdown=None):
+            calls.append((app, workers, limit_max_requests))
+
+        self._run_main(run)
+        self.assertEqual(calls, [("xyte_mcp.http:app", 1, None)])
+
+    def test_passes_jitter_when_supported(self):
+        seen = {}
+
+        def run(app, *, limit_max_requests_jitter=None, **options):
+            seen.update(options, jitter=limit_max_requests_jitter)
+
+        self._run_main(run)
+        self.assertEqual(seen["jitter"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,14 @@
 import asyncio
+import json
 import unittest
 import os
+import time
 from unittest.mock import patch
 
 from sqlmodel import SQLModel, Session, create_engine
 
 from xyte_mcp import tasks
+from xyte_mcp import task_model  # noqa: F401  registers the Task table
 from xyte_mcp.models import SendCommandRequest
 
 
@@ -31,6 +34,7 @@ class TaskStatusTestCase(unittest.IsolatedAsyncioTestCase):
         class DummyAsyncSession:
             def __init__(self, engine):
                 self.session = Session(engine)
+                self.bind = engine
 
             async def merge(self, obj):
                 self.session.merge(obj)
@@ -41,6 +45,15 @@ class TaskStatusTestCase(unittest.IsolatedAsyncioTestCase):
             async def get(self, model, pk):
                 return self.session.get(model, pk)
 
+            async def execute(self, stmt):
+                return self.session.execute(stmt)
+
+            def add(self, obj):
+                self.session.add(obj)
+
+            def add_all(self, objs):
+                self.session.add_all(objs)
+
             async def close(self):
                 self.session.close()
 
@@ -57,12 +70,39 @@ class TaskStatusTestCase(unittest.IsolatedAsyncioTestCase):
         self.get_session_patch = patch("xyte_mcp.tasks.get_session", get_session)
         self.get_session_patch.start()
 
+        async def no_init_db():
+            pass
+
+        self.init_db_patch = patch("xyte_mcp.db.init_db", no_init_db)
+        self.init_db_patch.start()
+
+        # Single-tenant unless a test says otherwise: every task is visible
+        self.env_patch = patch.dict(os.environ, {"XYTE_API_KEY": "envkey"})
+        self.env_patch.start()
+        from xyte_mcp.config import reload_settings
+
+        reload_settings()
+
     async def asyncTearDown(self) -> None:
         self.get_session_patch.stop()
+        self.init_db_patch.stop()
+        self.env_patch.stop()
         self.engine.dispose()
+        for name in (
+            "XYTE_TASK_BACKEND",
+            "XYTE_TASK_QUEUE_SIZE",
+            "XYTE_TASK_WORKERS",
+            "ENABLE_ASYNC_TASKS",
+        ):
+            os.environ.pop(name, None)
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.task_backend import reset_backend
+
+        reload_settings()
+        reset_backend()
 
     async def test_get_task_status_unknown(self):
-        status = await tasks.get_task_status("missing")
+        status = await tasks.get_task_status("missing", DummyCtx())
         self.assertEqual(status["status"], "unknown")
 
     async def test_send_command_async(self):
@@ -99,10 +139,408 @@ class TaskStatusTestCase(unittest.IsolatedAsyncioTestCase):
             resp = await tasks.send_command_async(req, ctx)
             tid = resp.data["task_id"]
             await asyncio.sleep(0.05)
-            status = await tasks.get_task_status(tid)
+            status = await tasks.get_task_status(tid, DummyCtx())
             self.assertEqual(status["status"], "done")
             self.assertEqual(captured["tid"], tid)
 
+    async def test_local_backend_runs_by_priority(self):
+        from xyte_mcp.task_backend import LocalBackend
+
+        order = []
+
+        class DummyClient:
+            def __init__(self, api_key=None):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def send_command(self, device_id, command_data):
+                order.append(device_id)
+                return {"device": device_id}
+
+        backend = LocalBackend(workers=1)
+        with patch("xyte_mcp.client.XyteAPIClient", DummyClient):
+            await backend.start()
+            # Occupy the only worker so the remaining tasks queue up
+            await backend.submit("t0", _payload("0"), "K" * 40)
+            await backend.submit("t1", _payload("low"), "K" * 40, priority=5)
+            await backend.submit("t2", _payload("high"), "K" * 40, priority=1)
+            await backend.join()
+            await backend.stop()
+
+        self.assertEqual(order, ["0", "high", "low"])
+        status = await tasks.get_task_status("t1", DummyCtx())
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["result"], {"device": "low"})
+
+    async def test_local_backend_resumes_pending(self):
+        from xyte_mcp.task_backend import LocalBackend
+        from xyte_mcp.tenant import tenant_key
+
+        await tasks.save(
+            tasks.Task(id="pending", status="queued", payload=_payload("9"), tenant=tenant_key("envkey"))
+        )
+        await tasks.save(
+            tasks.Task(id="other", status="running", payload=_payload("7"), tenant="someone")
+        )
+        await tasks.save(tasks.Task(id="legacy", status="queued", payload=_payload("6")))
+        await tasks.save(
+            tasks.Task(
+                id="leased",
+                status="queued",
+                payload=_payload("5"),
+                tenant=tenant_key("envkey"),
+                owner="alive",
+                lease_expires=time.time() + 60,
+            )
+        )
+        await tasks.save(tasks.Task(id="finished", status="done", payload=_payload("8")))
+        sent = []
+
+        class DummyClient:
+            def __init__(self, api_key=None):
+                self.api_key = api_key
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def send_command(self, device_id, command_data):
+                sent.append((device_id, self.api_key))
+                return {}
+
+        from xyte_mcp.config import reload_settings
+
+        backend = LocalBackend(workers=2)
+        with patch.dict(os.environ, {"XYTE_API_KEY": "envkey"}), patch(
+            "xyte_mcp.client.XyteAPIClient", DummyClient
+        ):
+            reload_settings()
+            await backend.start()
+            await backend.join()
+            await backend.stop()
+
+        self.assertEqual(sent, [("9", "envkey")])
+        self.assertEqual((await tasks.get_task_status("pending", DummyCtx()))["status"], "done")
+        for tid in ("other", "legacy"):
+            status = await tasks.get_task_status(tid, DummyCtx())
+            self.assertEqual(status, {"status": "error", "result": {"msg": "interrupted by restart"}})
+        leased = await tasks.fetch("leased")
+        self.assertEqual((leased.status, leased.owner), ("queued", "alive"))
+
+    async def test_server_lifespan_starts_the_backend(self):
+        from xyte_mcp import server
+        from xyte_mcp.config import reload_settings
+
+        calls = []
+
+        class Backend:
+            async def start(self):
+                calls.append("start")
+
+            async def stop(self):
+                calls.append("stop")
+
+        os.environ["ENABLE_ASYNC_TASKS"] = "true"
+        reload_settings()
+        with patch("xyte_mcp.server.get_backend", Backend):
+            async with server.lifespan():
+                self.assertEqual(calls, ["start"])
+        self.assertEqual(calls, ["start", "stop"])
+
+    async def test_only_one_backend_claims_a_task(self):
+        from xyte_mcp.task_backend import PENDING_STATUSES
+
+        await tasks.save(tasks.Task(id="orphan", status="running", payload=_payload("1")))
+        now = time.time()
+        won = await asyncio.gather(
+            *(tasks.claim("orphan", f"p{i}", now, now + 60, PENDING_STATUSES) for i in range(3))
+        )
+        self.assertEqual(sorted(won), [False, False, True])
+        task = await tasks.fetch("orphan")
+        self.assertEqual(task.owner, f"p{won.index(True)}")
+
+    async def test_full_queue_fails_the_saved_task(self):
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.logging_utils import request_var
+        from xyte_mcp.task_backend import get_backend, reset_backend
+        from xyte_mcp.utils import MCPError
+
+        os.environ["ENABLE_ASYNC_TASKS"] = "true"
+        os.environ["XYTE_TASK_BACKEND"] = "local"
+        os.environ["XYTE_TASK_QUEUE_SIZE"] = "1"
+        os.environ["XYTE_TASK_WORKERS"] = "1"
+        reload_settings()
+        reset_backend()
+
+        class MockRequest:
+            state = type("MockState", (), {"xyte_key": "X" * 40})()
+
+        request_var.set(MockRequest())
+        backend = get_backend()
+        await backend.start()
+        for task in backend._tasks:  # keep the queued task from being picked up
+            task.cancel()
+        req = SendCommandRequest(**_payload("1"))
+        first = await tasks.send_command_async(req, DummyCtx())
+        with self.assertRaises(MCPError):
+            await tasks.send_command_async(req, DummyCtx())
+        await backend.stop()
+
+        rows = await tasks.fetch_pending(("queued", "error"))
+        statuses = {row.id: row.status for row in rows}
+        self.assertEqual(statuses.pop(first.data["task_id"]), "queued")
+        self.assertEqual(list(statuses.values()), ["error"])
+
+    async def test_send_command_batch(self):
+        submitted = []
+
+        class RecordingBackend:
+            async def start(self):
+                pass
+
+            def lease(self):
+                return {}
+
+            async def submit(self, task_id, payload, xyte_key, priority=0):
+                submitted.append(task_id)
+
+        os.environ["ENABLE_ASYNC_TASKS"] = "true"
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.logging_utils import request_var
+        from xyte_mcp.models import SendCommandBatchRequest
+
+        reload_settings()
+
+        class MockRequest:
+            state = type("MockState", (), {"xyte_key": "X" * 40})()
+
+        request_var.set(MockRequest())
+        with patch("xyte_mcp.task_backend.get_backend", lambda: RecordingBackend()):
+            resp = await tasks.send_command_batch(
+                SendCommandBatchRequest(
+                    commands=[
+                        SendCommandRequest(**_payload("1")),
+                        SendCommandRequest(**_payload("2")),
+                        SendCommandRequest(**_payload("3")),
+                    ]
+                ),
+                DummyCtx(),
+            )
+        batch_id = resp.data["batch_id"]
+        self.assertEqual(submitted, resp.data["task_ids"])
+
+        status = await tasks.get_batch_status(batch_id)
+        self.assertEqual(status["status"], "running")
+        self.assertEqual(status["counts"], {"queued": 3})
+
+        for tid in submitted[:2]:
+            await tasks.save(tasks.Task(id=tid, status="done", result={"ok": True}))
+        await tasks.save(tasks.Task(id=submitted[2], status="error"))
+        status = await tasks.get_batch_status(batch_id)
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["counts"], {"done": 2, "error": 1})
+        self.assertEqual(status["total"], 3)
+
+        task = await tasks.fetch(submitted[0])
+        self.assertEqual(task.batch_id, batch_id)
+        self.assertEqual(task.payload["device_id"], "1")
+
+    async def test_failed_submit_fails_the_rest_of_the_batch(self):
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.logging_utils import request_var
+        from xyte_mcp.models import SendCommandBatchRequest
+        from xyte_mcp.utils import MCPError
+
+        submitted = []
+
+        class FullBackend:
+            def lease(self):
+                return {}
+
+            async def submit(self, task_id, payload, xyte_key, priority=0):
+                if submitted:
+                    raise MCPError(code="queue_full", message="Task queue is full, retry later")
+                submitted.append(task_id)
+
+        os.environ["ENABLE_ASYNC_TASKS"] = "true"
+        reload_settings()
+
+        class MockRequest:
+            state = type("MockState", (), {"xyte_key": "X" * 40})()
+
+        request_var.set(MockRequest())
+        commands = [SendCommandRequest(**_payload(str(i))) for i in range(3)]
+        with patch("xyte_mcp.task_backend.get_backend", FullBackend):
+            with self.assertRaises(MCPError):
+                await tasks.send_command_batch(
+                    SendCommandBatchRequest(commands=commands), DummyCtx()
+                )
+
+        batch_id = (await tasks.fetch(submitted[0])).batch_id
+        status = await tasks.get_batch_status(batch_id)
+        self.assertEqual(status["counts"], {"queued": 1, "error": 2})
+
+    async def test_send_command_batch_tool(self):
+        from xyte_mcp import server
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.logging_utils import request_var
+
+        submitted = []
+
+        class RecordingBackend:
+            def lease(self):
+                return {}
+
+            async def submit(self, task_id, payload, xyte_key, priority=0):
+                submitted.append((payload["device_id"], priority))
+
+        os.environ["ENABLE_ASYNC_TASKS"] = "true"
+        reload_settings()
+
+        class MockRequest:
+            state = type("MockState", (), {"xyte_key": "X" * 40})()
+
+        request_var.set(MockRequest())
+        tool = server.mcp._tool_manager.get_tool("send_command_batch")
+        self.assertNotIn("priority", tool.parameters["properties"])
+        with patch("xyte_mcp.task_backend.get_backend", RecordingBackend):
+            content = await server.mcp.call_tool(
+                "send_command_batch",
+                {"data": {"commands": [_payload("1"), _payload("2")]}},
+            )
+        self.assertEqual(submitted, [("1", 0), ("2", 0)])
+        self.assertEqual(len(json.loads(content[0].text)["data"]["task_ids"]), 2)
+
+    async def test_tasks_visible_only_to_their_tenant(self):
+        from xyte_mcp.config import reload_settings
+        from xyte_mcp.logging_utils import request_var
+        from xyte_mcp.tenant import tenant_key
+
+        await tasks.save(
+            tasks.Task(id="mine", status="done", batch_id="b", result={"ok": 1}, tenant=tenant_key("X" * 40))
+        )
+        os.environ.pop("XYTE_API_KEY")
+        reload_settings()
+
+        class Request:
+            def __init__(self, key):
+                self.state = type("State", (), {"xyte_key": key})()
+
+        request_var.set(Request("Y" * 40))
+        self.assertEqual(await tasks.read_task_status("mine"), {"status": "unknown"})
+        self.assertEqual(await tasks.read_task_status("mine", wait=1), {"status": "unknown"})
+        self.assertEqual((await tasks.get_batch_status("b"))["status"], "unknown")
+        request_var.set(Request("X" * 40))
+        self.assertEqual(await tasks.read_task_status("mine"), {"status": "done", "result": {"ok": 1}})
+        self.assertEqual((await tasks.get_batch_status("b"))["total"], 1)
+
+    async def test_batch_status_unknown(self):
+        status = await tasks.get_batch_status("missing")
+        self.assertEqual(status["status"], "unknown")
+
+    async def test_wait_for_task_notified(self):
+        from xyte_mcp import events
+        from tests.dummy_redis import DummyRedis
+
+        events.redis = DummyRedis()
+        await tasks.save(tasks.Task(id="w1", status="queued", payload=_payload("1")))
+
+        class DummyClient:
+            async def send_command(self, device_id, command_data):
+                return {"sent": device_id}
+
+        progress = []
+
+        class Ctx:
+            async def report_progress(self, current, total, message=None):
+                progress.append(current)
+
+        fetches = []
+        real_fetch = tasks.fetch
+
+        async def counting_fetch(tid):
+            fetches.append(tid)
+            return await real_fetch(tid)
+
+        with patch("xyte_mcp.tasks.fetch", counting_fetch):
+            waiter = asyncio.create_task(tasks.get_task_status("w1", wait=5, ctx=Ctx()))
+            await asyncio.sleep(0.01)
+            await tasks.execute_send_command("w1", _payload("1"), DummyClient())
+            status = await asyncio.wait_for(waiter, 1)
+
+        self.assertEqual(status, {"status": "done", "result": {"sent": "1"}})
+        self.assertEqual(fetches, ["w1"])
+        self.assertEqual(progress, [0.5, 1.0])
+        self.assertEqual(tasks._waiters, {})
+        self.assertEqual(
+            [json.loads(m)["status"] for _, m in events.redis.published],
+            ["running", "done"],
+        )
+        self.assertEqual(events.redis.stream[-1]["type"], '"task_completed"')
+        # The event stream is shared by all tenants: no command result on it
+        self.assertEqual(
+            json.loads(events.redis.stream[-1]["data"]), {"task_id": "w1", "status": "done"}
+        )
+
+    async def test_wait_subscribes_before_reading(self):
+        from xyte_mcp import events
+
+        order = []
+
+        class PubSub:
+            async def subscribe(self, channel):
+                order.append("subscribe")
+
+            async def listen(self):
+                await asyncio.Event().wait()
+                yield {}
+
+            async def unsubscribe(self, channel):
+                pass
+
+            async def aclose(self):
+                pass
+
+        class Redis:
+            def pubsub(self):
+                return PubSub()
+
+        real_fetch = tasks.fetch
+
+        async def recording_fetch(tid):
+            order.append("fetch")
+            return await real_fetch(tid)
+
+        os.environ["XYTE_TASK_BACKEND"] = "local"
+        from xyte_mcp.config import reload_settings
+
+        reload_settings()
+        events.redis = Redis()
+        await tasks.save(tasks.Task(id="w3", status="done", result={}))
+        with patch("xyte_mcp.tasks.fetch", recording_fetch):
+            status = await tasks.get_task_status("w3", DummyCtx(), wait=1)
+        tasks._listener.cancel()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(order, ["subscribe", "fetch"])
+
+    async def test_wait_for_task_timeout(self):
+        await tasks.save(tasks.Task(id="w2", status="running"))
+        status = await tasks.get_task_status("w2", DummyCtx(), wait=0.05)
+        self.assertEqual(status["status"], "running")
+
+
+def _payload(device_id: str) -> dict:
+    return SendCommandRequest(
+        device_id=device_id, name="ping", friendly_name="Ping", file_id=None
+    ).model_dump()
+
 
 if __name__ == "__main__":
     unittest.main()
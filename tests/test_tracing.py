@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from opentelemetry.sdk.trace import TracerProvider
+from starlette.testclient import TestClient
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+os.environ.setdefault("XYTE_API_KEY", "secret")
+
+from xyte_mcp import cache, circuit, concurrency, retry, tracing, client as client_mod  # noqa: E402
+from xyte_mcp import http as http_mod  # noqa: E402
+from xyte_mcp.client import XyteAPIClient  # noqa: E402
+from xyte_mcp.config import get_settings  # noqa: E402
+from xyte_mcp.tracing import (  # noqa: E402
+    FileSpanExporter,
+    HeadSampler,
+    SlowTraceRecorder,
+    TailSamplingProcessor,
+)
+
+
+def _provider(ratio, slow_seconds=0.05):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=HeadSampler(ratio))
+    provider.add_span_processor(TailSamplingProcessor(SimpleSpanProcessor(exporter), slow_seconds))
+    return provider.get_tracer("test"), exporter
+
+
+def _names(exporter):
+    return sorted(span.name for span in exporter.get_finished_spans())
+
+
+class SamplingTestCase(unittest.TestCase):
+    def test_head_sampled_traces_are_exported(self):
+        tracer, exporter = _provider(1.0)
+        with tracer.start_as_current_span("tool:fast"):
+            with tracer.start_as_current_span("upstream:get_devices"):
+                pass
+        self.assertEqual(_names(exporter), ["tool:fast", "upstream:get_devices"])
+
+    def test_unsampled_fast_trace_is_dropped(self):
+        tracer, exporter = _provider(0.0)
+        with tracer.start_as_current_span("tool:fast"):
+            with tracer.start_as_current_span("upstream:get_devices"):
+                pass
+        self.assertEqual(_names(exporter), [])
+
+    def test_errors_keep_the_whole_trace(self):
+        tracer, exporter = _provider(0.0)
+        with self.assertRaises(ValueError):
+            with tracer.start_as_current_span("tool:broken"):
+                with tracer.start_as_current_span("upstream:get_devices"):
+                    pass
+                raise ValueError("boom")
+        self.assertEqual(_names(exporter), ["tool:broken", "upstream:get_devices"])
+        self.assertTrue(all(s.context.trace_flags.sampled for s in exporter.get_finished_spans()))
+
+    def test_slow_tool_calls_are_kept(self):
+        tracer, exporter = _provider(0.0, slow_seconds=0.01)
+        with tracer.start_as_current_span("resource:slow"):
+            time.sleep(0.02)
+        with tracer.start_as_current_span("tool:slow"):
+            time.sleep(0.02)
+        self.assertEqual(_names(exporter), ["tool:slow"])
+
+
+class FileExporterTestCase(unittest.TestCase):
+    def test_writes_json_lines(self):
+        path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(FileSpanExporter(path)))
+        with provider.get_tracer("test").start_as_current_span("tool:x"):
+            pass
+        provider.shutdown()
+        with open(path) as f:
+            (line,) = f.readlines()
+        self.assertEqual(json.loads(line)["name"], "tool:x")
+
+
+class UpstreamSpanTestCase(unittest.TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_request_span_and_cache_attribute(self):
+        tracer, exporter = _provider(1.0)
+
+        async def run():
+            api = XyteAPIClient(api_key="T" * 40, base_url="http://x")
+            api.client = httpx.AsyncClient(
+                base_url="http://x",
+                transport=httpx.MockTransport(lambda r: httpx.Response(200, json={"items": []})),
+            )
+            try:
+                for _ in range(2):
+                    with tracer.start_as_current_span("tool:list"):
+                        await api.get_devices()
+            finally:
+                await api.close()
+
+        with patch.object(client_mod, "tracer", tracer):
+            asyncio.run(run())
+        spans = exporter.get_finished_spans()
+        upstream = [s for s in spans if s.name == "upstream:get_devices"]
+        self.assertEqual(len(upstream), 1)
+        self.assertEqual(upstream[0].attributes["http.response.status_code"], 200)
+        self.assertEqual(upstream[0].attributes["xyte.endpoint"], "get_devices")
+        tools = [s.attributes["xyte.cache_hit"] for s in spans if s.name == "tool:list"]
+        self.assertEqual(tools, [False, True])
+
+    def test_attempt_spans_and_decode_span(self):
+        tracer, exporter = _provider(1.0)
+        codes = iter([503, 200])
+
+        async def run():
+            api = XyteAPIClient(api_key="T" * 40, base_url="http://x")
+            api.client = httpx.AsyncClient(
+                base_url="http://x",
+                transport=httpx.MockTransport(
+                    lambda r: httpx.Response(next(codes), json={"items": []})
+                ),
+            )
+            try:
+                with patch("xyte_mcp.client.anyio.sleep", return_value=None):
+                    await api.get_incidents()
+            finally:
+                await api.close()
+
+        try:
+            with patch.object(client_mod, "tracer", tracer):
+                asyncio.run(run())
+        finally:
+            circuit.reset()
+            concurrency.reset()
+            retry.reset()
+        finished = exporter.get_finished_spans()
+        attempts = [s for s in finished if s.name == "attempt:get_incidents"]
+        spans = {s.name: s for s in finished if s not in attempts}
+        upstream = spans["upstream:get_incidents"]
+        self.assertEqual([a.attributes["xyte.attempt"] for a in attempts], [1, 2])
+        self.assertEqual([a.attributes["http.response.status_code"] for a in attempts], [503, 200])
+        self.assertEqual(attempts[1].attributes["http.response.body.size"], 12)
+        self.assertTrue(all(a.parent.span_id == upstream.context.span_id for a in attempts))
+        decode = spans["decode:get_incidents"]
+        self.assertFalse(decode.attributes["xyte.response_hook"])
+
+
+class SlowTraceRecorderTestCase(unittest.TestCase):
+    def _record(self, recorder, name, seconds):
+        provider = TracerProvider()
+        provider.add_span_processor(recorder)
+        tracer = provider.get_tracer("test")
+        with tracer.start_as_current_span(name):
+            with tracer.start_as_current_span("upstream:get_devices"):
+                time.sleep(seconds)
+
+    def test_keeps_the_slowest_traces(self):
+        recorder = SlowTraceRecorder(limit=2, window_seconds=60)
+        for name, seconds in (("tool:a", 0.01), ("tool:b", 0.03), ("tool:c", 0.001), ("tool:d", 0.02)):
+            self._record(recorder, name, seconds)
+        traces = recorder.snapshot()
+        self.assertEqual([t["root"] for t in traces], ["tool:b", "tool:d"])
+        self.assertEqual([s["name"] for s in traces[0]["spans"]], ["tool:b", "upstream:get_devices"])
+        self.assertEqual(traces[0]["spans"][1]["parent_id"], traces[0]["spans"][0]["span_id"])
+
+    def test_old_traces_expire(self):
+        recorder = SlowTraceRecorder(limit=2, window_seconds=60)
+        self._record(recorder, "tool:a", 0)
+        with patch("xyte_mcp.tracing.time.time_ns", return_value=time.time_ns() + 70 * 10**9):
+            self.assertEqual(recorder.snapshot(), [])
+
+    def test_endpoint_requires_the_api_key(self):
+        recorder = SlowTraceRecorder(limit=5, window_seconds=60)
+        self._record(recorder, "tool:a", 0)
+        client = TestClient(http_mod.app)
+        with patch.object(tracing, "_recorder", recorder):
+            self.assertEqual(client.get("/v1/debug/slow").status_code, 401)
+            resp = client.get(
+                "/v1/debug/slow", headers={"X-API-Key": get_settings().xyte_api_key}
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([t["root"] for t in resp.json()["traces"]], ["tool:a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
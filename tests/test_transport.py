@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from xyte_mcp import transport
+from xyte_mcp.client import XyteAPIClient
+from xyte_mcp.config import get_settings
+
+
+class Body(httpx.AsyncByteStream):
+    """Unbuffered body, like responses from a real connection."""
+
+    async def __aiter__(self):
+        yield b"{}"
+
+
+class SharedTransportTestCase(unittest.TestCase):
+    def test_clients_share_pool_per_loop(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.path)
+            return httpx.Response(200, stream=Body())
+
+        async def run():
+            pool = httpx.MockTransport(handler)
+            with patch("xyte_mcp.transport._build_pool", return_value=pool):
+                for _ in range(3):
+                    async with XyteAPIClient(api_key="A" * 40, base_url="http://x") as c:
+                        await c._request("GET", "/devices", endpoint="get_devices")
+                self.assertIs(transport.get_pool(), pool)
+                host = transport.ACTIVE_STREAMS.labels(host="x")
+                self.assertEqual(host._value.get(), 0)
+                await transport.close_pool()
+
+        asyncio.run(run())
+        self.assertEqual(seen, ["/devices"] * 3)
+
+    def test_http2_falls_back_without_h2(self):
+        get_settings.cache_clear()
+        with patch.dict("os.environ", {"XYTE_HTTP2": "true"}), patch(
+            "xyte_mcp.transport.http2_available", return_value=False
+        ), patch("xyte_mcp.transport.httpx.AsyncHTTPTransport") as cls:
+            transport._build_pool()
+        get_settings.cache_clear()
+        self.assertFalse(cls.call_args.kwargs["http2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+os.environ.setdefault("XYTE_API_KEY", "secret")
+
+from xyte_mcp import cache, db, usage  # noqa: E402
+from xyte_mcp import http as http_mod  # noqa: E402
+from xyte_mcp.auth import AuthHeaderMiddleware  # noqa: E402
+from xyte_mcp.client import XyteAPIClient  # noqa: E402
+from xyte_mcp.config import get_settings, reload_settings  # noqa: E402
+from xyte_mcp.server import usage_endpoint  # noqa: E402
+from xyte_mcp.tenant import key_id  # noqa: E402
+
+
+class FakePipeline:
+    def __init__(self, store, fail=False):
+        self.store = store
+        self.fail = fail
+        self.ops = []
+
+    def hincrby(self, key, field, value):
+        self.ops.append(("hincrby", key, field, value))
+
+    def expire(self, key, ttl):
+        self.ops.append(("expire", key, ttl))
+
+    async def execute(self):
+        if self.fail:
+            raise ConnectionError("redis down")
+        for op in self.ops:
+            if op[0] == "hincrby":
+                _, key, field, value = op
+                fields = self.store.setdefault(key, {})
+                fields[field] = fields.get(field, 0) + value
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store, self.fail)
+
+
+def _reset():
+    usage._take()
+    usage._sketches.clear()
+
+
+class SpaceSavingTestCase(unittest.TestCase):
+    def test_finds_heavy_hitters_in_a_long_tail(self):
+        sketch = usage.SpaceSaving(capacity=20)
+        stream = ["big"] * 3000 + ["medium"] * 1500 + [f"t{i}" for i in range(5000)]
+        random.Random(0).shuffle(stream)
+        for tenant in stream:
+            sketch.add(tenant)
+        top = sketch.top(2)
+        self.assertEqual([t["tenant"] for t in top], ["big", "medium"])
+        for entry, true_count in zip(top, (3000, 1500)):
+            self.assertGreaterEqual(entry["count"], true_count)
+            self.assertLessEqual(entry["count"] - entry["error"], true_count)
+
+    def test_weights_add_up(self):
+        sketch = usage.SpaceSaving(capacity=2)
+        sketch.add("a", 10)
+        sketch.add("b", 3)
+        sketch.add("c", 1)
+        self.assertEqual(sketch.top(5), [
+            {"tenant": "a", "count": 10, "error": 0},
+            {"tenant": "c", "count": 4, "error": 3},
+        ])
+
+
+class FlushTestCase(unittest.TestCase):
+    def setUp(self):
+        _reset()
+
+    def tearDown(self):
+        for name in ("XYTE_USAGE_SINK", "XYTE_USAGE_FLUSH_SECONDS"):
+            os.environ.pop(name, None)
+        reload_settings()
+        _reset()
+
+    def _sink(self, sink):
+        os.environ["XYTE_USAGE_SINK"] = sink
+        reload_settings()
+
+    def test_no_sink_keeps_only_the_sketch(self):
+        usage.record("t1", "tool_calls")
+        self.assertEqual(usage._take(), {})
+        self.assertEqual(usage.top(1)["tool_calls"][0]["tenant"], "t1")
+
+    def test_redis_flush_and_retry_after_failure(self):
+        self._sink("redis")
+        redis = FakeRedis()
+        usage.record("t1", "upstream_calls")
+        usage.record("t1", "upstream_bytes", 512)
+        usage.record("t2", "cache_hits")
+        with patch("xyte_mcp.events.get_redis", return_value=redis):
+            redis.fail = True
+            with self.assertLogs("xyte_mcp", "WARNING"):
+                asyncio.run(usage.flush())
+            self.assertEqual(redis.store, {})
+            usage.record("t1", "upstream_calls")
+            redis.fail = False
+            asyncio.run(usage.flush())
+        (t1,) = [v for k, v in redis.store.items() if k.endswith(":t1")]
+        self.assertEqual(t1, {"upstream_calls": 2, "upstream_bytes": 512})
+        self.assertEqual(len(redis.store), 2)
+        self.assertEqual(usage._take(), {})
+
+    def test_flusher_writes_periodically_and_on_shutdown(self):
+        self._sink("redis")
+        os.environ["XYTE_USAGE_FLUSH_SECONDS"] = "0.05"
+        reload_settings()
+        redis = FakeRedis()
+
+        async def run():
+            usage.record("t1", "tool_calls")
+            await asyncio.sleep(0.12)
+            usage.record("t1", "tool_calls")
+
+        with patch("xyte_mcp.events.get_redis", return_value=redis):
+            asyncio.run(run())
+        (t1,) = redis.store.values()
+        self.assertEqual(t1, {"tool_calls": 2})
+
+    def test_db_flush_appends_rows(self):
+        self._sink("db")
+        tmp = tempfile.mkdtemp()
+
+        async def run():
+            from sqlmodel import select
+
+            from xyte_mcp.usage_model import UsageRecord
+
+            await db.init_db()
+            usage.record("t1", "upstream_calls", 3)
+            await usage.flush()
+            usage.record("t1", "upstream_calls")
+            await usage.flush()
+            async with db.get_session() as session:
+                rows = (await session.execute(select(UsageRecord))).scalars().all()
+            await db.dispose_engine()
+            return rows
+
+        with patch.object(db, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/u.db"):
+            db.reset_engine()
+            rows = asyncio.run(run())
+        self.assertEqual([(r.tenant, r.upstream_calls) for r in rows], [("t1", 3), ("t1", 1)])
+
+
+class ClientUsageTestCase(unittest.TestCase):
+    def setUp(self):
+        _reset()
+
+    def tearDown(self):
+        cache.clear()
+        _reset()
+
+    def test_upstream_and_cache_usage_are_attributed(self):
+        key = "U" * 40
+
+        async def run():
+            api = XyteAPIClient(api_key=key, base_url="http://x")
+            api.client = httpx.AsyncClient(
+                base_url="http://x",
+                transport=httpx.MockTransport(lambda r: httpx.Response(200, json={"items": []})),
+            )
+            try:
+                await api.get_devices()
+                await api.get_devices()
+            finally:
+                await api.close()
+
+        asyncio.run(run())
+        top = usage.top(1)
+        tenant = key_id(key)
+        self.assertEqual(top["upstream_calls"], [{"tenant": tenant, "count": 1, "error": 0}])
+        self.assertEqual(top["upstream_bytes"][0]["count"], len(b'{"items":[]}'))
+        self.assertEqual(top["cache_misses"][0]["count"], 1)
+        self.assertEqual(top["cache_hits"][0]["count"], 1)
+
+    def test_endpoint(self):
+        usage.record("t1", "tool_calls", 2)
+        client = TestClient(http_mod.app)
+        self.assertEqual(client.get("/v1/usage").status_code, 401)
+        resp = client.get(
+            "/v1/usage?limit=1", headers={"X-API-Key": get_settings().xyte_api_key}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["top"]["tool_calls"], [{"tenant": "t1", "count": 2, "error": 0}])
+
+    def test_admin_token_in_multi_tenant_mode(self):
+        usage.record("t1", "tool_calls")
+        api_key = os.environ.pop("XYTE_API_KEY")
+        os.environ["XYTE_ADMIN_TOKEN"] = "operator-token"
+        reload_settings()
+
+        def restore():
+            os.environ["XYTE_API_KEY"] = api_key
+            os.environ.pop("XYTE_ADMIN_TOKEN")
+            reload_settings()
+
+        self.addCleanup(restore)
+        app = AuthHeaderMiddleware(Starlette(routes=[Route("/v1/usage", usage_endpoint)]))
+        client = TestClient(app)
+        self.assertEqual(client.get("/v1/usage").status_code, 401)
+        tenant = {"Authorization": "T" * 40}
+        self.assertEqual(client.get("/v1/usage", headers=tenant).status_code, 401)
+        wrong = {"X-Admin-Token": "guess"}
+        self.assertEqual(client.get("/v1/usage", headers=wrong).status_code, 401)
+        resp = client.get("/v1/usage", headers={"X-Admin-Token": "operator-token"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["top"]["tool_calls"][0]["tenant"], "t1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,14 +4,14 @@ import unittest
 from xyte_mcp.utils import (
     enforce_rate_limit,
     MCPError,
-    _REQUEST_TIMESTAMPS,
+    _RATE_LIMITER,
     convert_device_id,
 )
 
 
 class RateLimitTestCase(unittest.TestCase):
     def setUp(self):
-        _REQUEST_TIMESTAMPS.clear()
+        _RATE_LIMITER.clear()
         os.environ["XYTE_RATE_LIMIT"] = "1"
         from xyte_mcp.config import get_settings
         get_settings.cache_clear()
@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from xyte_mcp import tasks
+from xyte_mcp.worker import long, runtime
+
+
+class DummyClient:
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def send_command(self, device_id, command_data):
+        self.calls.append((device_id, command_data.name))
+        return {"ok": True}
+
+    async def close(self):
+        pass
+
+
+class WorkerRuntimeTestCase(unittest.TestCase):
+    def tearDown(self):
+        runtime.shutdown()
+
+    def test_tasks_share_loop_and_client(self):
+        seen = []
+
+        async def fake_execute(task_id, payload, client):
+            seen.append((asyncio.get_running_loop(), client))
+
+        with patch("xyte_mcp.worker.long.execute_send_command", fake_execute), patch(
+            "xyte_mcp.worker.runtime.XyteAPIClient", lambda api_key: DummyClient()
+        ):
+            long.send_command_long("t1", {}, "K" * 40)
+            long.send_command_long("t2", {}, "K" * 40)
+            long.send_command_long("t3", {}, "L" * 40)
+
+        self.assertIs(seen[0][0], seen[1][0])
+        self.assertIs(seen[0][1], seen[1][1])
+        self.assertIsNot(seen[0][1], seen[2][1])
+
+    def test_execute_send_command_dispatch(self):
+        saved = []
+
+        async def fake_save(task):
+            saved.append((task.status, task.result))
+
+        client = DummyClient()
+        payload = {"device_id": "7", "name": "reboot", "friendly_name": "Reboot", "file_id": None}
+        with patch("xyte_mcp.tasks.save", fake_save):
+            asyncio.run(tasks.execute_send_command("t1", payload, client))
+
+        self.assertEqual(client.calls, [("7", "reboot")])
+        self.assertEqual([s for s, _ in saved], ["running", "done"])
+        self.assertEqual(saved[-1][1], {"ok": True})
+
+
+if __name__ == "__main__":
+    unittest.main()